@@ -0,0 +1,139 @@
+"""
+In-process registry of per-view request metrics.
+
+The last RING_SIZE samples are kept in a ring buffer for percentiles, and
+running totals per view back the Prometheus counters, so memory is bounded
+however long the process lives. Everything is per process: with several
+workers, each one exposes its own numbers and the scraper aggregates them.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+RING_SIZE = getattr(settings, 'METRICS_RING_SIZE', 5000)
+QUANTILES = (0.5, 0.9, 0.99)
+
+# (metric name, sample field, help text), exposed as Prometheus summaries
+SUMMARIES = (
+    ('gearguard_request_duration_seconds', 'duration', 'Total time spent handling the request'),
+    ('gearguard_request_db_seconds', 'db_time', 'Time spent executing SQL'),
+    ('gearguard_request_template_seconds', 'template_time', 'Time spent rendering templates'),
+    ('gearguard_request_queries', 'queries', 'Number of SQL queries executed'),
+)
+
+
+class Sample:
+    """Measurements of one request"""
+    __slots__ = ('view', 'method', 'status', 'queries', 'db_time', 'template_time', 'duration', 'timestamp')
+
+    def __init__(self, view, method, status, queries, db_time, template_time, duration):
+        self.view = view
+        self.method = method
+        self.status = status
+        self.queries = queries
+        self.db_time = db_time
+        self.template_time = template_time
+        self.duration = duration
+        self.timestamp = time.time()
+
+
+class Registry:
+
+    def __init__(self, size=RING_SIZE):
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=size)
+        # view -> field -> running sum; view -> count
+        self.sums = {}
+        self.counts = {}
+        # (view, method, status) -> count
+        self.responses = {}
+        # view -> number of requests over their query budget
+        self.budget_exceeded = {}
+
+    def record(self, sample):
+        with self.lock:
+            self.samples.append(sample)
+            sums = self.sums.setdefault(sample.view, dict.fromkeys([field for _, field, _ in SUMMARIES], 0))
+            for _, field, _ in SUMMARIES:
+                sums[field] += getattr(sample, field)
+            self.counts[sample.view] = self.counts.get(sample.view, 0) + 1
+            key = (sample.view, sample.method, sample.status)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def record_budget_exceeded(self, view):
+        with self.lock:
+            self.budget_exceeded[view] = self.budget_exceeded.get(view, 0) + 1
+
+    def recent(self, view=None):
+        with self.lock:
+            samples = list(self.samples)
+        if view:
+            samples = [sample for sample in samples if sample.view == view]
+        return samples
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.sums.clear()
+            self.counts.clear()
+            self.responses.clear()
+            self.budget_exceeded.clear()
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self.lock:
+            samples = list(self.samples)
+            sums = {view: dict(values) for view, values in self.sums.items()}
+            counts = dict(self.counts)
+            responses = dict(self.responses)
+            budget_exceeded = dict(self.budget_exceeded)
+
+        by_view = {}
+        for sample in samples:
+            by_view.setdefault(sample.view, []).append(sample)
+
+        lines = [
+            '# HELP gearguard_requests_total Requests handled, by view, method and status',
+            '# TYPE gearguard_requests_total counter',
+        ]
+        for (view, method, status), count in sorted(responses.items()):
+            lines.append(
+                f'gearguard_requests_total{{view="{_escape(view)}",method="{method}",status="{status}"}} {count}'
+            )
+
+        for name, field, help_text in SUMMARIES:
+            lines.append(f'# HELP {name} {help_text} (quantiles over the last {len(samples)} requests)')
+            lines.append(f'# TYPE {name} summary')
+            for view in sorted(counts):
+                label = f'view="{_escape(view)}"'
+                values = sorted(getattr(sample, field) for sample in by_view.get(view, ()))
+                for quantile in QUANTILES:
+                    if values:
+                        lines.append(f'{name}{{{label},quantile="{quantile}"}} {_format(_quantile(values, quantile))}')
+                lines.append(f'{name}_sum{{{label}}} {_format(sums[view][field])}')
+                lines.append(f'{name}_count{{{label}}} {counts[view]}')
+
+        lines.append('# HELP gearguard_query_budget_exceeded_total Requests that ran more queries than their view allows')
+        lines.append('# TYPE gearguard_query_budget_exceeded_total counter')
+        for view, count in sorted(budget_exceeded.items()):
+            lines.append(f'gearguard_query_budget_exceeded_total{{view="{_escape(view)}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _quantile(values, quantile):
+    """Nearest-rank quantile of a sorted, non-empty list"""
+    index = min(len(values) - 1, max(0, int(round(quantile * len(values))) - 1))
+    return values[index]
+
+
+def _format(value):
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
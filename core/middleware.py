@@ -0,0 +1,153 @@
+"""
+Per-request instrumentation: query count, DB time, template render time and
+total latency, recorded into core.metrics.registry under the view name.
+
+SQL is timed by an execute wrapper installed on every database connection
+as it is opened, and templates by wrapping the Django template backend's
+render(); both only add to the measurement of the request in the current
+context, so they cost next to nothing outside a request.
+
+Views listed in settings.QUERY_BUDGETS get a maximum query count. Going over
+it is logged, or raises QueryBudgetExceeded when QUERY_BUDGET_MODE is
+'raise' (as the query budget tests set it), so an N+1 regression fails the
+test that hits the view. Streaming responses (exports) are measured up
+to the point they are returned; their body is produced afterwards.
+"""
+import contextvars
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template.backends import django as django_backend
+
+from .metrics import Sample, registry
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED = '<unresolved>'
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than its budget in settings.QUERY_BUDGETS"""
+
+
+class Measurement:
+    """Running totals of the request being handled in this context"""
+    __slots__ = ('queries', 'db_time', 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+_current = contextvars.ContextVar('gearguard_measurement', default=None)
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    measurement = _current.get()
+    if measurement is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        measurement.db_time += time.perf_counter() - start
+        measurement.queries += 1
+
+
+def _install_execute_wrapper(sender, connection, **kwargs):
+    # Wrappers live on the connection wrapper and survive reconnects
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def _timed_render(render):
+    def wrapper(self, context=None, request=None):
+        measurement = _current.get()
+        if measurement is None:
+            return render(self, context, request)
+        # Widgets and includes render templates inside the page's template;
+        # only the outermost render is timed so nothing is counted twice
+        measurement.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            measurement.template_depth -= 1
+            if not measurement.template_depth:
+                measurement.template_time += time.perf_counter() - start
+    wrapper._gearguard_timed = True
+    return wrapper
+
+
+def install():
+    """Hook SQL execution and template rendering; safe to call repeatedly"""
+    connection_created.connect(_install_execute_wrapper, dispatch_uid='gearguard_metrics')
+    from django.db import connections
+    for connection in connections.all(initialized_only=True):
+        _install_execute_wrapper(None, connection)
+    if not getattr(django_backend.Template.render, '_gearguard_timed', False):
+        django_backend.Template.render = _timed_render(django_backend.Template.render)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNRESOLVED
+
+
+class MetricsMiddleware:
+    """Record per-view metrics and enforce query budgets; works under WSGI and ASGI"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        self.budget_mode = getattr(settings, 'QUERY_BUDGET_MODE', 'log')
+        install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        measurement = Measurement()
+        token = _current.set(measurement)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, measurement, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        # Views run through sync_to_async copy this context, so queries made
+        # in their thread still land on the same Measurement
+        measurement = Measurement()
+        token = _current.set(measurement)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, measurement, time.perf_counter() - start)
+        return response
+
+    def finish(self, request, response, measurement, duration):
+        view = view_name(request)
+        registry.record(Sample(
+            view, request.method, response.status_code, measurement.queries,
+            measurement.db_time, measurement.template_time, duration,
+        ))
+        budget = self.budgets.get(view)
+        if budget is not None and measurement.queries > budget:
+            registry.record_budget_exceeded(view)
+            message = f'{view} ran {measurement.queries} queries, over its budget of {budget} ({request.path})'
+            if self.budget_mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,15 +77,132 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# GEARGUARD_DB_ENGINE selects the backend: sqlite (default) or postgresql.
+#
+# PostgreSQL reads GEARGUARD_DB_NAME/USER/PASSWORD/HOST/PORT and uses
+# psycopg's connection pool (requirements-postgres.txt), sized with
+# GEARGUARD_DB_POOL_MIN/MAX; GEARGUARD_DB_POOL=0 falls back to persistent
+# connections instead.
+#
+# For SQLite, GEARGUARD_DB_PROFILE=production switches to WAL journaling
+# (readers no longer block on writers), synchronous=NORMAL, larger page cache
+# and mmap, a busy timeout, BEGIN IMMEDIATE transactions (writers queue for
+# the lock up front instead of failing when upgrading a read lock) and
+# persistent connections. The GEARGUARD_DB_* variables tune each setting.
+
+DB_ENGINE = os.environ.get('GEARGUARD_DB_ENGINE', 'sqlite')
+DB_PROFILE = os.environ.get('GEARGUARD_DB_PROFILE', 'default')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('GEARGUARD_DB_NAME', 'gearguard'),
+            'USER': os.environ.get('GEARGUARD_DB_USER', 'gearguard'),
+            'PASSWORD': os.environ.get('GEARGUARD_DB_PASSWORD', ''),
+            'HOST': os.environ.get('GEARGUARD_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('GEARGUARD_DB_PORT', '5432'),
+        }
+    }
+    if os.environ.get('GEARGUARD_DB_POOL', '1') != '0':
+        # The pool hands out connections itself, so CONN_MAX_AGE must stay 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('GEARGUARD_DB_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('GEARGUARD_DB_POOL_MAX', 10)),
+                'timeout': float(os.environ.get('GEARGUARD_DB_TIMEOUT', 20)),
+            },
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('GEARGUARD_CONN_MAX_AGE', 600))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('GEARGUARD_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
 
-DATABASES = {
+    if DB_PROFILE == 'production':
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': ';'.join([
+                'PRAGMA journal_mode=WAL',
+                'PRAGMA synchronous=NORMAL',
+                f"PRAGMA mmap_size={int(os.environ.get('GEARGUARD_DB_MMAP_SIZE', 256 * 1024 * 1024))}",
+                # Negative values are KiB rather than pages
+                f"PRAGMA cache_size=-{int(os.environ.get('GEARGUARD_DB_CACHE_KB', 64 * 1024))}",
+                'PRAGMA temp_store=MEMORY',
+            ]),
+            'timeout': float(os.environ.get('GEARGUARD_DB_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('GEARGUARD_CONN_MAX_AGE', 600))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    elif DB_PROFILE != 'default':
+        raise ImproperlyConfigured(f'Unknown GEARGUARD_DB_PROFILE: {DB_PROFILE!r}')
+else:
+    raise ImproperlyConfigured(f'Unknown GEARGUARD_DB_ENGINE: {DB_ENGINE!r}')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Local memory is per process; use a shared backend (file, Redis, Memcached)
+# when running several workers so version bumps reach all of them.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gearguard',
     }
 }
 
 
+# Request metrics and query budgets
+# Maximum SQL queries per view (by URL name), session and user lookups
+# included. Exceeding one is logged, or raises under QUERY_BUDGET_MODE 'raise'.
+# Each budget is the most queries the view was measured to run (GET and
+# POST, cold and warm cache, with TASKS_EAGER on and its tasks committing
+# inside the request) plus two. gearguard/tests.py hits every one of them
+# with the mode forced to 'raise'.
+
+METRICS_RING_SIZE = 5000
+
+QUERY_BUDGETS = {
+    'gearguard:dashboard': 15,
+    'gearguard:equipment_list': 7,
+    'gearguard:equipment_list_api': 6,
+    'gearguard:equipment_detail': 5,
+    'gearguard:kanban_board': 10,
+    'gearguard:kanban_column': 6,
+    'gearguard:request_create': 27,
+    'gearguard:request_update': 28,
+    'gearguard:request_history': 8,
+    'gearguard:equipment_history': 9,
+    'gearguard:calendar_view': 6,
+    'gearguard:calendar_events': 6,
+    'gearguard:reporting': 7,
+    'gearguard:reporting_api': 9,
+    'gearguard:teams_list': 7,
+    'gearguard:search': 5,
+}
+
+QUERY_BUDGET_MODE = os.environ.get('GEARGUARD_QUERY_BUDGET_MODE', 'log')
+
+
+# Background tasks (gearguard/tasks.py)
+# Side effects of request writes are queued in the database and run by
+# `python manage.py run_worker`. With TASKS_EAGER they run in the web process
+# right after the transaction commits instead, so no worker is needed.
+
+TASKS_EAGER = os.environ.get('GEARGUARD_TASKS_EAGER', '1' if DEBUG else '0') == '1'
+
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_MAX_RETRY_DELAY = 3600
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
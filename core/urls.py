@@ -4,9 +4,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from . import views
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', views.metrics, name='metrics'),
     path('accounts/', include('accounts.urls')),  # Changed from '' to 'accounts/'
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('gearguard.urls')),  # GearGuard at root
@@ -0,0 +1,10 @@
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metrics import registry
+
+
+def metrics(request):
+    """Per-view request metrics in the Prometheus text format, for staff only"""
+    if not request.user.is_staff:
+        return HttpResponseForbidden('Staff only')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
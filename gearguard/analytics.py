@@ -0,0 +1,143 @@
+from datetime import datetime, time, timedelta
+
+from django.db import models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Equipment, MaintenanceRequest, MaintenanceTeam, RequestSummary
+
+
+def add_months(month, delta):
+    """Step a first-of-month date by whole calendar months"""
+    index = month.year * 12 + month.month - 1 + delta
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def month_range(first, last):
+    """First-of-month dates from `first` to `last` inclusive, oldest first"""
+    months = []
+    month = first.replace(day=1)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def last_months(count, today=None):
+    """The `count` most recent calendar months, oldest first"""
+    current = (today or timezone.localdate()).replace(day=1)
+    return month_range(add_months(current, -(count - 1)), current)
+
+
+def summary_report(months=6):
+    """Full-history report folded from a single read of RequestSummary"""
+    by_category = {}
+    by_priority = {}
+    by_month = {}
+    by_team = {}
+    cells = RequestSummary.objects.order_by().values_list(
+        'team_id', 'category', 'priority', 'stage', 'month', 'request_count'
+    )
+    for team_id, category, priority, stage, month, count in cells:
+        _add(by_category, category, count)
+        _add(by_priority, priority, count)
+        _add(by_month, month, count)
+        team_counts = by_team.setdefault(team_id, {'total': 0, 'open': 0, 'completed': 0})
+        team_counts['total'] += count
+        if stage in MaintenanceRequest.OPEN_STAGES:
+            team_counts['open'] += count
+        elif stage == 'repaired':
+            team_counts['completed'] += count
+
+    return _build_report(by_category, by_priority, by_month, by_team, last_months(months))
+
+
+def request_report(start=None, end=None, team=None):
+    """
+    Report over live MaintenanceRequest rows with GROUP BY queries, optionally
+    limited to requests created between `start` and `end` (inclusive dates)
+    and to one team id.
+    """
+    requests = MaintenanceRequest.objects.order_by()
+    if start:
+        requests = requests.filter(created_at__gte=_start_of_day(start))
+    if end:
+        requests = requests.filter(created_at__lt=_start_of_day(end + timedelta(days=1)))
+    if team:
+        requests = requests.filter(maintenance_team_id=team)
+
+    by_category = dict(requests.values_list('equipment__category').annotate(count=Count('id')))
+    by_priority = dict(requests.values_list('priority').annotate(count=Count('id')))
+    by_month = dict(
+        requests.annotate(month=TruncMonth('created_at', output_field=models.DateField()))
+        .values_list('month')
+        .annotate(count=Count('id'))
+    )
+    by_team = {
+        row['maintenance_team_id']: {'total': row['total'], 'open': row['open'], 'completed': row['completed']}
+        for row in requests.values('maintenance_team_id').annotate(
+            total=Count('id'),
+            open=Count('id', filter=Q(stage__in=MaintenanceRequest.OPEN_STAGES)),
+            completed=Count('id', filter=Q(stage='repaired')),
+        )
+    }
+
+    if start or end:
+        first = start or min(by_month, default=end)
+        months = month_range(first, end or timezone.localdate())
+    else:
+        months = last_months(6)
+    return _build_report(by_category, by_priority, by_month, by_team, months, team=team)
+
+
+def _add(totals, key, count):
+    totals[key] = totals.get(key, 0) + count
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _build_report(by_category, by_priority, by_month, by_team, months, team=None):
+    teams = MaintenanceTeam.objects.order_by('name').values_list('id', 'name')
+    if team:
+        teams = teams.filter(pk=team)
+
+    requests_by_team = []
+    for team_id, name in teams:
+        team_counts = by_team.get(team_id, {'total': 0, 'open': 0, 'completed': 0})
+        requests_by_team.append({
+            'id': team_id,
+            'name': name,
+            'total_requests': team_counts['total'],
+            'open_requests': team_counts['open'],
+            'completed_requests': team_counts['completed'],
+        })
+    requests_by_team.sort(key=lambda x: x['total_requests'], reverse=True)
+
+    requests_by_category = [
+        {'category': category_name, 'count': by_category[category_code]}
+        for category_code, category_name in Equipment.CATEGORY_CHOICES
+        if by_category.get(category_code)
+    ]
+    requests_by_category.sort(key=lambda x: x['count'], reverse=True)
+
+    requests_by_priority = [
+        {'priority': priority_name, 'count': by_priority.get(priority_code, 0)}
+        for priority_code, priority_name in MaintenanceRequest.PRIORITY_CHOICES
+    ]
+
+    monthly_trend = [
+        {'month': month.strftime('%B %Y'), 'key': month.strftime('%Y-%m'), 'count': by_month.get(month, 0)}
+        for month in months
+    ]
+
+    return {
+        'requests_by_team': requests_by_team,
+        'requests_by_category': requests_by_category,
+        'requests_by_priority': requests_by_priority,
+        'monthly_trend': monthly_trend,
+        'total_requests': sum(team_counts['total'] for team_counts in by_team.values()),
+        'open_requests': sum(team_counts['open'] for team_counts in by_team.values()),
+    }
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GearguardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'gearguard'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,208 @@
+"""
+Monthly archive tables for the maintenance activity log.
+
+MaintenanceLog keeps recent history. The archive_logs command moves older
+entries, a batch per transaction, into one table per month
+(gearguard_maintenancelog_YYYYMM) with the same columns and the same
+(request, timestamp, id) index, so the live table and its indexes stay
+small while old events remain cheap to keep and to query. history_page()
+reads a request's or an equipment's history across the live table and the
+archives as one sequence.
+
+Archive tables are created on demand rather than by migrations, from models
+registered in a registry of their own. Their request and user ids are plain
+columns without foreign keys: deleting a request or a user leaves its
+archived history in place.
+"""
+import datetime
+import re
+
+from django.apps.registry import Apps
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import LogEntry, MaintenanceLog
+from .pagination import KeysetPage, after, decode_cursor, encode_cursor
+
+TABLE_PREFIX = 'gearguard_maintenancelog_'
+TABLE_PATTERN = re.compile(rf'^{TABLE_PREFIX}(\d{{4}})(\d{{2}})$')
+BATCH_SIZE = 5000
+
+# Kept apart from the project's models so migrations never see them
+archive_apps = Apps()
+_models = {}
+
+
+def table_name(month):
+    return f'{TABLE_PREFIX}{month:%Y%m}'
+
+
+def archive_model(month):
+    """Model of the archive table for the month containing `month` (a date)"""
+    month = month.replace(day=1)
+    if month not in _models:
+        table = table_name(month)
+        meta = type('Meta', (), {
+            'app_label': 'gearguard',
+            'apps': archive_apps,
+            'db_table': table,
+            'ordering': LogEntry.Meta.ordering,
+            'indexes': [
+                models.Index(fields=['request_id', 'timestamp', 'id'], name=f'{table}_req'),
+                models.Index(fields=['equipment_id', 'timestamp', 'id'], name=f'{table}_eq'),
+            ],
+        })
+        _models[month] = type(f'ArchivedLog{month:%Y%m}', (LogEntry,), {
+            '__module__': __name__,
+            'Meta': meta,
+            # Ids are kept from the live table
+            'id': models.BigIntegerField(primary_key=True),
+            'request_id': models.BigIntegerField(),
+            'equipment_id': models.BigIntegerField(null=True),
+            'user_id': models.IntegerField(null=True),
+        })
+    return _models[month]
+
+
+def months():
+    """First days of the months that have an archive table, oldest first"""
+    found = []
+    for table in connection.introspection.table_names():
+        match = TABLE_PATTERN.match(table)
+        if match:
+            found.append(datetime.date(int(match[1]), int(match[2]), 1))
+    return sorted(found)
+
+
+def ensure_table(month):
+    model = archive_model(month)
+    if model._meta.db_table not in connection.introspection.table_names():
+        with connection.schema_editor() as editor:
+            editor.create_model(model)
+    return model
+
+
+def month_start(value):
+    """Start of the (local) month containing the datetime or date `value`"""
+    if isinstance(value, datetime.datetime):
+        value = timezone.localtime(value).date()
+    return timezone.make_aware(datetime.datetime(value.year, value.month, 1))
+
+
+def next_month(start):
+    return month_start((start.replace(tzinfo=None) + datetime.timedelta(days=32)).date())
+
+
+def pending(cutoff):
+    """[(month, live entries older than `cutoff` in it)], oldest first"""
+    counts = []
+    start = _oldest_month(cutoff)
+    while start is not None and start < cutoff:
+        end = min(next_month(start), cutoff)
+        count = MaintenanceLog.objects.filter(timestamp__gte=start, timestamp__lt=end).count()
+        if count:
+            counts.append((start.date(), count))
+        start = next_month(start)
+    return counts
+
+
+def archive_before(cutoff, batch_size=BATCH_SIZE, progress=None):
+    """
+    Move live entries older than `cutoff` into their month's archive table.
+    Each batch is copied and deleted in one transaction, and copies ignore
+    rows already archived, so an interrupted run can simply be restarted.
+    Returns [(month, entries moved)].
+    """
+    fields = ['id', 'request_id', 'equipment_id', 'user_id'] + [
+        field.attname for field in LogEntry._meta.get_fields() if field.concrete
+    ]
+    moved = []
+    start = _oldest_month(cutoff)
+    while start is not None and start < cutoff:
+        end = min(next_month(start), cutoff)
+        entries = MaintenanceLog.objects.filter(timestamp__gte=start, timestamp__lt=end).order_by('timestamp', 'id')
+        model = None
+        total = 0
+        while True:
+            rows = list(entries.values(*fields)[:batch_size])
+            if not rows:
+                break
+            model = model or ensure_table(start.date())
+            with transaction.atomic():
+                model.objects.bulk_create([model(**row) for row in rows], ignore_conflicts=True)
+                MaintenanceLog.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+            total += len(rows)
+            if progress:
+                progress(start.date(), total)
+        if total:
+            moved.append((start.date(), total))
+        start = next_month(start)
+    return moved
+
+
+HISTORY_ORDERING = ['-timestamp', '-id']
+HISTORY_FIELDS = ['id', 'request_id', 'equipment_id', 'user_id', 'action_code', 'from_stage', 'to_stage', 'notes', 'timestamp']
+
+
+def history_page(cursor=None, page_size=50, **filters):
+    """
+    One page of log entries matching `filters` (request_id= or
+    equipment_id=), newest first, continuing after `cursor`.
+
+    The live table and every archive month that can hold older entries are
+    each read through their (request or equipment, timestamp, id) index,
+    limited to one page after the cursor, and merged by a single UNION ALL
+    query; a page costs the same however deep into the history it is.
+    Entries come back as unsaved MaintenanceLog instances.
+    """
+    values = _history_cursor(cursor) if cursor else None
+    before = values[0] if values else None
+
+    sources = [MaintenanceLog.objects.all()] + [
+        archive_model(month).objects.all() for month in reversed(months())
+        if before is None or month_start(month) <= before
+    ]
+    quote = connection.ops.quote_name
+    arms, params = [], []
+    for index, source in enumerate(sources):
+        queryset = source.filter(**filters).order_by(*HISTORY_ORDERING)
+        if before:
+            queryset = queryset.filter(after(HISTORY_ORDERING, values))
+        sql, arm_params = queryset.values_list(*HISTORY_FIELDS)[:page_size + 1].query.sql_with_params()
+        # Wrapped, since SQLite doesn't allow LIMIT in the arms of a compound SELECT
+        arms.append(f'SELECT * FROM ({sql}) AS {quote(f"h{index}")}')
+        params += arm_params
+    entries = list(MaintenanceLog.objects.raw(
+        ' UNION ALL '.join(arms)
+        + f' ORDER BY {quote("timestamp")} DESC, {quote("id")} DESC LIMIT {int(page_size) + 1}',
+        params,
+    ))
+
+    next_cursor = None
+    if len(entries) > page_size:
+        entries = entries[:page_size]
+        next_cursor = encode_cursor([entries[-1].timestamp, entries[-1].id])
+    return KeysetPage(entries, next_cursor)
+
+
+def _history_cursor(cursor):
+    """(timestamp, id) from a history cursor, or None if it is not a valid one"""
+    values = decode_cursor(cursor, len(HISTORY_ORDERING))
+    if not values or not isinstance(values[0], str) or type(values[1]) is not int:
+        return None
+    try:
+        timestamp = parse_datetime(values[0])
+    except ValueError:
+        return None
+    if timestamp is None or timezone.is_naive(timestamp):
+        return None
+    return [timestamp, values[1]]
+
+
+def _oldest_month(cutoff):
+    oldest = (
+        MaintenanceLog.objects.filter(timestamp__lt=cutoff)
+        .order_by('timestamp').values_list('timestamp', flat=True).first()
+    )
+    return month_start(oldest) if oldest else None
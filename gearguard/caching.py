@@ -0,0 +1,87 @@
+"""
+Versioned caching of computed page fragments.
+
+Every fragment key embeds a version number: the global version, or the
+version of one maintenance team. Writes never delete cached values, they
+bump the versions they affect (see signals.py), so the next read misses and
+rebuilds while stale entries simply age out. Versions are bumped after the
+surrounding transaction commits, so a fragment can never be rebuilt from
+data that is about to be rolled back or is not yet visible.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+FRAGMENT_TIMEOUT = 300
+
+GLOBAL_VERSION_KEY = 'gearguard:version'
+
+_MISSING = object()
+
+
+# Named scopes versioned on their own, for fragments that only depend on
+# a few tables and would churn if every request write invalidated them
+TECHNICIANS = 'technicians'
+
+
+def scope_version_key(scope):
+    return f'{GLOBAL_VERSION_KEY}:{scope}'
+
+
+def team_version_key(team_id):
+    return scope_version_key(f'team:{team_id}')
+
+
+def _initial_version():
+    # Starts above any count a lost (evicted) version could have reached,
+    # so fragments cached under it are never picked up again
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(team_ids=(), scopes=(), include_global=True):
+    """Invalidate global fragments and those of the given teams and scopes"""
+    keys = [GLOBAL_VERSION_KEY] if include_global else []
+    keys += [team_version_key(team_id) for team_id in set(team_ids) if team_id]
+    keys += [scope_version_key(scope) for scope in scopes]
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+
+
+def bump_on_commit(team_ids=(), scopes=(), include_global=True):
+    team_ids = list(team_ids)
+    scopes = list(scopes)
+    transaction.on_commit(lambda: bump(team_ids, scopes, include_global))
+
+
+def fragment(name, build, team=None, scope=None, timeout=FRAGMENT_TIMEOUT):
+    """
+    Return the cached value of `name`, calling `build()` to compute it on a
+    miss. Tied to one team's or one named scope's version if given, otherwise
+    to the global version; `name` must include anything else the value
+    depends on.
+    """
+    if team:
+        version_key = team_version_key(team)
+    elif scope:
+        version_key = scope_version_key(scope)
+    else:
+        version_key = GLOBAL_VERSION_KEY
+    version = get_version(version_key)
+    key = f'gearguard:fragment:{name}:{version}'
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = build()
+        cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from .models import Equipment, EquipmentRequestBucket, MaintenanceRequest
+
+
+def refresh_equipment_counters(equipment_ids=None, batch_size=500):
+    """
+    Recompute the denormalized request counters on Equipment: open requests
+    from the maintenance_requests table, recent requests from the daily
+    buckets. Returns the number of rows that had drifted.
+    """
+    if equipment_ids is None:
+        equipment_ids = Equipment.objects.order_by('pk').values_list('pk', flat=True)
+    equipment_ids = list(equipment_ids)
+
+    changed = 0
+    # Work in pk batches rather than one long cursor so writes never interleave
+    # with an open read on the same table (SQLite has no per-cursor isolation)
+    for start in range(0, len(equipment_ids), batch_size):
+        changed += _refresh_batch(equipment_ids[start:start + batch_size])
+    return changed
+
+
+def _refresh_batch(equipment_ids):
+    now = timezone.now()
+    recent = dict(
+        EquipmentRequestBucket.objects.filter(
+            equipment_id__in=equipment_ids,
+            day__gte=Equipment.health_window_start(),
+        ).order_by().values_list('equipment_id').annotate(total=Sum('request_count'))
+    )
+
+    rows = Equipment.objects.filter(pk__in=equipment_ids).annotate(
+        actual_open=Count(
+            'maintenance_requests',
+            filter=Q(maintenance_requests__stage__in=MaintenanceRequest.OPEN_STAGES)
+        ),
+    ).only('pk', *Equipment.COUNTER_FIELDS)
+
+    changed = 0
+    batch = []
+    for item in rows:
+        actual_recent = recent.get(item.pk, 0)
+        if item.open_requests_count != item.actual_open or item.recent_requests_count != actual_recent:
+            changed += 1
+        item.open_requests_count = item.actual_open
+        item.recent_requests_count = actual_recent
+        item.counters_refreshed_at = now
+        batch.append(item)
+
+    with transaction.atomic():
+        Equipment.objects.bulk_update(batch, Equipment.COUNTER_FIELDS)
+    return changed
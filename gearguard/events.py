@@ -0,0 +1,184 @@
+"""
+In-process event bus for live Kanban updates.
+
+Changes to maintenance requests are published after their transaction
+commits (see signals.py and transitions.py) as card events: the request's
+new stage and team, where it was before, and the card re-rendered once.
+Server-Sent Events streams (views.kanban_events) subscribe with a team
+filter and forward the events, so screens watching the board get small
+diffs instead of re-running the board query on a timer.
+
+The bus lives in one process: run a single ASGI worker for live updates, or
+screens only see changes made through the worker they are connected to.
+Each event gets an id, and the last HISTORY_SIZE events are kept, so a
+reconnecting stream resumes from its Last-Event-ID; when that is no longer
+possible it is told to reset, and the client reloads the board.
+"""
+import asyncio
+import itertools
+import json
+import threading
+import uuid
+from collections import deque
+
+from django.db import transaction
+from django.template.loader import render_to_string
+
+HISTORY_SIZE = 500
+QUEUE_SIZE = 100
+HEARTBEAT_SECONDS = 15
+
+CARD = 'card'
+RESET = 'reset'
+
+# Event ids are only meaningful within this process
+_BOOT = uuid.uuid4().hex[:8]
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_subscribers = set()
+_history = deque(maxlen=HISTORY_SIZE)
+
+
+class Subscription:
+    """One stream's queue of pending events, filled from any thread"""
+
+    def __init__(self, team_id):
+        self.team_id = team_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def wants(self, event):
+        if self.team_id is None:
+            return True
+        if event['type'] == RESET and event['data'].get('team_id') is None:
+            return True
+        return self.team_id in (event['data'].get('team_id'), event['data'].get('previous_team_id'))
+
+    def deliver(self, event):
+        # Runs on the subscriber's loop; a client that can't keep up gets a
+        # reset instead of an ever-growing backlog
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_reset_event())
+
+
+def _reset_event(event_id=None):
+    return {'id': event_id, 'type': RESET, 'data': {}}
+
+
+def _parse_id(value):
+    boot, _, number = (value or '').partition('-')
+    return int(number) if boot == _BOOT and number.isdigit() else None
+
+
+def has_subscribers():
+    return bool(_subscribers)
+
+
+def publish(event_type, data):
+    """Send an event to every interested subscriber; callable from any thread"""
+    with _lock:
+        event = {'id': f'{_BOOT}-{next(_ids)}', 'type': event_type, 'data': data}
+        _history.append(event)
+        subscribers = [subscriber for subscriber in _subscribers if subscriber.wants(event)]
+    for subscriber in subscribers:
+        try:
+            subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+        except RuntimeError:
+            # The subscriber's event loop is gone
+            unsubscribe(subscriber)
+
+
+def subscribe(team_id=None, last_event_id=None):
+    """
+    Register a stream for `team_id` (None for every team). Must be called
+    from the event loop that will read the subscription's queue.
+    """
+    subscription = Subscription(team_id)
+    with _lock:
+        _subscribers.add(subscription)
+        if last_event_id:
+            last = _parse_id(last_event_id)
+            if last is None or (_history and _parse_id(_history[0]['id']) > last + 1):
+                # Events were missed; the client must start over
+                subscription.deliver(_reset_event())
+            else:
+                for event in _history:
+                    if _parse_id(event['id']) > last and subscription.wants(event):
+                        subscription.deliver(event)
+    return subscription
+
+
+def unsubscribe(subscription):
+    with _lock:
+        _subscribers.discard(subscription)
+
+
+def encode(event):
+    """An event in the text/event-stream format"""
+    lines = [f"event: {event['type']}"]
+    if event['id']:
+        lines.insert(0, f"id: {event['id']}")
+    lines.append(f"data: {json.dumps(event['data'])}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def stream(subscription):
+    """Encoded events for one subscription, with keep-alive comments in between"""
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield encode(event)
+            if event['type'] == RESET:
+                return
+    finally:
+        unsubscribe(subscription)
+
+
+# Publishers
+
+def publish_card_on_commit(request_id, previous_stage=None, previous_team_id=None):
+    """Publish the current state of request `request_id` once the transaction commits"""
+    transaction.on_commit(lambda: publish_card(request_id, previous_stage, previous_team_id))
+
+
+def publish_card(request_id, previous_stage=None, previous_team_id=None):
+    from .models import MaintenanceRequest
+
+    if not has_subscribers():
+        # Nobody would read the card; a reset keeps the id sequence honest
+        # for streams that reconnect later
+        publish(RESET, {'team_id': None})
+        return
+    request = MaintenanceRequest.objects.select_related('equipment', 'assigned_to').filter(pk=request_id).first()
+    if request is None:
+        data = {'id': request_id, 'deleted': True, 'stage': None, 'team_id': None}
+    else:
+        data = {
+            'id': request.pk,
+            'deleted': False,
+            'stage': request.stage,
+            'team_id': request.maintenance_team_id,
+            'html': render_to_string('gearguard/kanban_cards.html', {'cards': [request]}),
+        }
+    data['previous_stage'] = previous_stage
+    data['previous_team_id'] = previous_team_id
+    publish(CARD, data)
+
+
+def publish_reset_on_commit(team_ids):
+    """Ask boards of the given teams to reload, e.g. after a bulk insert"""
+    team_ids = set(team_ids)
+
+    def send():
+        for team_id in team_ids:
+            publish(RESET, {'team_id': team_id})
+    transaction.on_commit(send)
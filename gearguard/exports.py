@@ -0,0 +1,247 @@
+"""
+Streaming exports of equipment, maintenance requests and maintenance logs.
+
+Rows come from a values_list() projection read with iterator(chunk_size=...),
+so no model instances are built and memory stays flat however large the
+table is. Each row is encoded as soon as it is read; the generators here
+are fed straight into a StreamingHttpResponse or written to a file. Log
+exports read the monthly archive tables (archive.py) before the live table.
+"""
+import csv
+import itertools
+import json
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import archive
+from .models import Equipment, MaintenanceLog, MaintenanceRequest
+
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+CHUNK_SIZE = 2000
+
+
+class ExportSpec:
+    """What to read for one kind of export and which fields its filters apply to"""
+
+    def __init__(self, model, columns, date_field, team_field, stage_field=None):
+        self.model = model
+        # (header, values_list lookup) pairs
+        self.columns = columns
+        self.date_field = date_field
+        self.team_field = team_field
+        self.stage_field = stage_field
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    def queryset(self, start=None, end=None, team=None, stage=None):
+        rows = self.model.objects.order_by('pk')
+        if start:
+            rows = rows.filter(**{f'{self.date_field}__gte': _start_of_day(start)})
+        if end:
+            rows = rows.filter(**{f'{self.date_field}__lt': _start_of_day(end + timedelta(days=1))})
+        if team:
+            rows = rows.filter(**{self.team_field: team})
+        if stage:
+            rows = rows.filter(**{self.stage_field: stage})
+        return rows.values_list(*[lookup for _, lookup in self.columns])
+
+    def rows(self, chunk_size=CHUNK_SIZE, **filters):
+        return self.queryset(**filters).iterator(chunk_size=chunk_size)
+
+
+class LogExportSpec(ExportSpec):
+    """Maintenance logs: each archive month, oldest first, then the live table"""
+
+    # Archive tables keep plain id columns without foreign keys, so values
+    # from related tables are read through subqueries instead of joins
+    RELATED = {
+        'request__subject': Subquery(
+            MaintenanceRequest.objects.filter(pk=OuterRef('request_id')).values('subject')[:1]
+        ),
+        'user__username': Subquery(
+            User.objects.filter(pk=OuterRef('user_id')).values('username')[:1]
+        ),
+    }
+
+    def archived_queryset(self, month, start=None, end=None, team=None, stage=None):
+        """The same projection over one archive month, or None if the range excludes it"""
+        month_start = archive.month_start(month)
+        if start and archive.next_month(month_start) <= _start_of_day(start):
+            return None
+        if end and month_start >= _start_of_day(end + timedelta(days=1)):
+            return None
+
+        rows = archive.archive_model(month).objects.order_by('pk')
+        if start:
+            rows = rows.filter(timestamp__gte=_start_of_day(start))
+        if end:
+            rows = rows.filter(timestamp__lt=_start_of_day(end + timedelta(days=1)))
+        if team:
+            rows = rows.filter(request_id__in=MaintenanceRequest.objects.filter(maintenance_team_id=team).values('pk'))
+        if stage:
+            rows = rows.filter(request_id__in=MaintenanceRequest.objects.filter(stage=stage).values('pk'))
+        rows = rows.annotate(**{
+            lookup.replace('__', '_'): expression for lookup, expression in self.RELATED.items()
+        })
+        return rows.values_list(*[lookup.replace('__', '_') for _, lookup in self.columns])
+
+    def rows(self, chunk_size=CHUNK_SIZE, **filters):
+        archived = (self.archived_queryset(month, **filters) for month in archive.months())
+        return itertools.chain(
+            *(rows.iterator(chunk_size=chunk_size) for rows in archived if rows is not None),
+            super().rows(chunk_size, **filters),
+        )
+
+
+EXPORTS = {
+    'equipment': ExportSpec(
+        Equipment,
+        [
+            ('id', 'id'),
+            ('name', 'name'),
+            ('serial_number', 'serial_number'),
+            ('category', 'category'),
+            ('department', 'department'),
+            ('location', 'location'),
+            ('maintenance_team_id', 'maintenance_team_id'),
+            ('maintenance_team', 'maintenance_team__name'),
+            ('assigned_employee', 'assigned_employee__username'),
+            ('default_technician', 'default_technician__username'),
+            ('purchase_date', 'purchase_date'),
+            ('warranty_expiry', 'warranty_expiry'),
+            ('is_scrapped', 'is_scrapped'),
+            ('scrapped_date', 'scrapped_date'),
+            ('created_at', 'created_at'),
+            ('updated_at', 'updated_at'),
+        ],
+        date_field='created_at',
+        team_field='maintenance_team_id',
+    ),
+    'requests': ExportSpec(
+        MaintenanceRequest,
+        [
+            ('id', 'id'),
+            ('subject', 'subject'),
+            ('description', 'description'),
+            ('request_type', 'request_type'),
+            ('priority', 'priority'),
+            ('stage', 'stage'),
+            ('equipment_id', 'equipment_id'),
+            ('equipment_serial', 'equipment__serial_number'),
+            ('maintenance_team_id', 'maintenance_team_id'),
+            ('maintenance_team', 'maintenance_team__name'),
+            ('assigned_to', 'assigned_to__username'),
+            ('created_by', 'created_by__username'),
+            ('scheduled_date', 'scheduled_date'),
+            ('completed_date', 'completed_date'),
+            ('duration_hours', 'duration_hours'),
+            ('created_at', 'created_at'),
+            ('updated_at', 'updated_at'),
+        ],
+        date_field='created_at',
+        team_field='maintenance_team_id',
+        stage_field='stage',
+    ),
+    'logs': LogExportSpec(
+        MaintenanceLog,
+        [
+            ('id', 'id'),
+            ('request_id', 'request_id'),
+            ('request_subject', 'request__subject'),
+            ('equipment_id', 'equipment_id'),
+            ('user', 'user__username'),
+            ('action_code', 'action_code'),
+            ('from_stage', 'from_stage'),
+            ('to_stage', 'to_stage'),
+            ('notes', 'notes'),
+            ('timestamp', 'timestamp'),
+        ],
+        date_field='timestamp',
+        team_field='request__maintenance_team_id',
+        stage_field='request__stage',
+    ),
+}
+
+
+def parse_filters(kind, params):
+    """
+    Validate export filters from a mapping of strings (GET params or command
+    options). Raises ValueError with a user-facing message on bad input.
+    """
+    spec = EXPORTS[kind]
+    filters = {}
+    for param in ('start', 'end'):
+        value = params.get(param)
+        if value:
+            try:
+                filters[param] = parse_date(value)
+            except ValueError:
+                filters[param] = None
+            if filters[param] is None:
+                raise ValueError(f'Invalid {param} date')
+
+    team = params.get('team')
+    if team:
+        if not str(team).isdigit():
+            raise ValueError('Invalid team')
+        filters['team'] = int(team)
+
+    stage = params.get('stage')
+    if stage:
+        if spec.stage_field is None:
+            raise ValueError(f'The stage filter does not apply to {kind}')
+        if stage not in dict(MaintenanceRequest.STAGE_CHOICES):
+            raise ValueError('Invalid stage')
+        filters['stage'] = stage
+    return filters
+
+
+def iter_rows(kind, chunk_size=CHUNK_SIZE, **filters):
+    """Yield value tuples for an export without caching the queryset"""
+    return EXPORTS[kind].rows(chunk_size=chunk_size, **filters)
+
+
+class Echo:
+    """File-like object whose write() hands back the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(kind, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORTS[kind].headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(kind, rows):
+    headers = EXPORTS[kind].headers
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+STREAMS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+}
+
+
+def stream_export(kind, fmt, chunk_size=CHUNK_SIZE, **filters):
+    """Encoded lines of a complete export, produced lazily"""
+    return STREAMS[fmt](kind, iter_rows(kind, chunk_size=chunk_size, **filters))
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
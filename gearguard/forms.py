@@ -1,8 +1,44 @@
 from django import forms
-from .models import Equipment, MaintenanceRequest, MaintenanceTeam
+from django.urls import reverse_lazy
+from . import caching
+from .models import Equipment, MaintenanceRequest, MaintenanceTeam, TeamMember
 from django.contrib.auth.models import User
 
 
+class AutocompleteSelect(forms.Select):
+    """
+    Select that renders only the selected option, plus a search box that
+    fetches matches from `url`. Rendering cost doesn't grow with the table.
+    """
+    template_name = 'gearguard/widgets/autocomplete_select.html'
+    
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+    
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['autocomplete_url'] = self.url
+        return context
+    
+    def optgroups(self, name, value, attrs=None):
+        selected = {str(v) for v in value if v not in (None, '')}
+        options = [self.create_option(name, '', '---------', not selected, 0)]
+        queryset = getattr(self.choices, 'queryset', None)
+        if selected and queryset is not None:
+            for index, item in enumerate(queryset.filter(pk__in=selected), 1):
+                options.append(self.create_option(name, item.pk, str(item), True, index))
+        return [(None, options, 0)]
+
+
+def technician_choices():
+    """(user id, username) for every team member, cached until membership changes"""
+    return caching.fragment('technician_choices', lambda: list(
+        User.objects.filter(team_memberships__isnull=False)
+        .distinct().order_by('username').values_list('id', 'username')
+    ), scope=caching.TECHNICIANS)
+
+
 class EquipmentForm(forms.ModelForm):
     """Form for creating and updating equipment"""
     
@@ -63,7 +99,10 @@ class MaintenanceRequestForm(forms.ModelForm):
             'scheduled_date',
         ]
         widgets = {
-            'equipment': forms.Select(attrs={'class': 'form-control'}),
+            'equipment': AutocompleteSelect(
+                url=reverse_lazy('gearguard:equipment_autocomplete'),
+                attrs={'class': 'form-control'},
+            ),
             'request_type': forms.Select(attrs={'class': 'form-control'}),
             'subject': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Brief description'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 4, 'placeholder': 'Detailed description'}),
@@ -81,10 +120,11 @@ class MaintenanceRequestForm(forms.ModelForm):
         self.fields['scheduled_date'].required = False
         self.fields['maintenance_team'].required = False
         
-        # Filter assigned_to to only show users who are team members
-        from .models import TeamMember
+        # Filter assigned_to to only show users who are team members; the
+        # queryset validates submissions, the cached choices render the select
         technician_ids = TeamMember.objects.values_list('user_id', flat=True)
         self.fields['assigned_to'].queryset = User.objects.filter(id__in=technician_ids)
+        self.fields['assigned_to'].choices = [('', '---------')] + technician_choices()
         
         # Set default stage for new requests
         if not self.instance.pk:
@@ -0,0 +1,129 @@
+"""
+Rolling-window equipment health scoring.
+
+Scores are computed from the EquipmentRequestBucket daily counts, so the cost
+is proportional to the number of buckets in the longest window (at most 90
+per asset) instead of the size of the maintenance request table.
+"""
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Equipment, EquipmentRequestBucket, MaintenanceRequest
+
+WINDOWS = (7, 30, 90)
+
+# Penalty per request, by how recent it is: last 7 days, days 8-30, days 31-90
+WEIGHTS = (10, 5, 1)
+
+
+@dataclass(frozen=True)
+class HealthScore:
+    last_7: int = 0
+    last_30: int = 0
+    last_90: int = 0
+
+    @property
+    def score(self):
+        """0-100, higher is healthier"""
+        penalty = (
+            self.last_7 * WEIGHTS[0]
+            + (self.last_30 - self.last_7) * WEIGHTS[1]
+            + (self.last_90 - self.last_30) * WEIGHTS[2]
+        )
+        return max(0, 100 - penalty)
+
+    @property
+    def status(self):
+        return Equipment.health_for_count(self.last_30)
+
+
+def _window_starts(today):
+    return {days: today - timezone.timedelta(days=days - 1) for days in WINDOWS}
+
+
+def scores_for(equipment_ids, today=None):
+    """Return {equipment_id: HealthScore} from one read of the bucket table"""
+    today = today or timezone.localdate()
+    starts = _window_starts(today)
+    totals = {}
+    buckets = EquipmentRequestBucket.objects.filter(
+        equipment_id__in=list(equipment_ids),
+        day__gte=starts[90],
+        day__lte=today,
+    ).values_list('equipment_id', 'day', 'request_count')
+
+    for equipment_id, day, count in buckets:
+        counts = totals.setdefault(equipment_id, [0, 0, 0])
+        for i, days in enumerate(WINDOWS):
+            if day >= starts[days]:
+                counts[i] += count
+
+    return {
+        equipment_id: HealthScore(*totals.get(equipment_id, (0, 0, 0)))
+        for equipment_id in equipment_ids
+    }
+
+
+def attach_scores(equipment, today=None):
+    """Score a list of Equipment in bulk and attach `health_score` to each"""
+    equipment = list(equipment)
+    scores = scores_for([item.pk for item in equipment], today=today)
+    for item in equipment:
+        item.health_score = scores[item.pk]
+    return equipment
+
+
+def critical_equipment(limit=5, threshold=3, today=None):
+    """
+    Non-scrapped equipment with the most requests in the last 30 days,
+    with `request_count` and `health_score` attached.
+    """
+    today = today or timezone.localdate()
+    top = (
+        EquipmentRequestBucket.objects
+        .filter(day__gte=Equipment.health_window_start(today), day__lte=today, equipment__is_scrapped=False)
+        .order_by()
+        .values('equipment_id')
+        .annotate(total=Sum('request_count'))
+        .filter(total__gte=threshold)
+        .order_by('-total', 'equipment_id')[:limit]
+    )
+    totals = {row['equipment_id']: row['total'] for row in top}
+    if not totals:
+        return []
+
+    equipment = Equipment.objects.in_bulk(list(totals))
+    ranked = [equipment[pk] for pk in totals if pk in equipment]
+    for item in attach_scores(ranked, today=today):
+        item.request_count = totals[item.pk]
+    return ranked
+
+
+def rebuild_buckets(equipment_ids=None):
+    """Recompute the daily buckets from the maintenance request table"""
+    requests = MaintenanceRequest.objects.all()
+    buckets = EquipmentRequestBucket.objects.all()
+    if equipment_ids is not None:
+        equipment_ids = list(equipment_ids)
+        requests = requests.filter(equipment_id__in=equipment_ids)
+        buckets = buckets.filter(equipment_id__in=equipment_ids)
+
+    rows = (
+        requests.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('equipment_id', 'day')
+        .annotate(total=Count('id'))
+    )
+    with transaction.atomic():
+        buckets.delete()
+        EquipmentRequestBucket.objects.bulk_create(
+            [
+                EquipmentRequestBucket(equipment_id=row['equipment_id'], day=row['day'], request_count=row['total'])
+                for row in rows
+            ],
+            batch_size=1000,
+        )
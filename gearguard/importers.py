@@ -0,0 +1,247 @@
+"""
+Streaming bulk import of equipment and maintenance requests.
+
+Rows are read lazily from CSV or JSON Lines, validated with the same field
+rules as EquipmentForm / MaintenanceRequestForm, and written with
+bulk_create() in batches. Foreign keys are resolved against lookups loaded
+once up front, so validation does no per-row queries. Invalid rows are
+reported and skipped; they never abort the import.
+"""
+import abc
+import csv
+import json
+
+from django import forms
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .forms import EquipmentForm, MaintenanceRequestForm
+from .models import Equipment, MaintenanceRequest, MaintenanceTeam, TeamMember
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 1000
+
+
+def iter_rows(stream, fmt):
+    """Yield (line_number, row dict) from a text stream, one row at a time"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, ValueError(f'Invalid JSON: {e}')
+                continue
+            yield line_number, row if isinstance(row, dict) else ValueError('Expected a JSON object')
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+
+def detect_format(filename):
+    if filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+class ImportResult:
+    """Running totals and per-row errors of one import"""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line_number, message):
+        self.errors.append({'line': line_number, 'error': message})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+
+class Lookups:
+    """In-memory maps from the identifiers used in import files to primary keys"""
+
+    def __init__(self, with_equipment=False):
+        self.teams = {}
+        for pk, name in MaintenanceTeam.objects.values_list('pk', 'name'):
+            self.teams[str(pk)] = pk
+            self.teams[name.lower()] = pk
+
+        self.users = {}
+        for pk, username, email in User.objects.values_list('pk', 'username', 'email'):
+            self.users[str(pk)] = pk
+            self.users[username.lower()] = pk
+            if email:
+                self.users.setdefault(email.lower(), pk)
+
+        self.technicians = set(TeamMember.objects.values_list('user_id', flat=True))
+
+        self.serials = set()
+        self.equipment = {}
+        if with_equipment:
+            for pk, serial, team_id in Equipment.objects.values_list('pk', 'serial_number', 'maintenance_team_id'):
+                self.equipment[str(pk)] = (pk, team_id)
+                self.equipment[serial.lower()] = (pk, team_id)
+        else:
+            self.serials = {serial.lower() for serial in Equipment.objects.values_list('serial_number', flat=True)}
+
+
+class BaseImporter(abc.ABC):
+    form_class = None
+    model = None
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, user=None):
+        self.batch_size = batch_size
+        self.user = user
+        self.lookups = self.get_lookups()
+        # Field rules come from one form instance; foreign keys are resolved
+        # from the lookups instead of the ModelChoiceField querysets
+        self.fields = {
+            name: field for name, field in self.form_class().fields.items()
+            if not isinstance(field, forms.ModelChoiceField)
+        }
+        # Blank values fall back to model defaults, as an unbound form's initial would
+        self.defaults = {
+            field.name: field.get_default() for field in self.model._meta.concrete_fields
+            if field.name in self.fields and field.has_default()
+        }
+
+    def get_lookups(self):
+        return Lookups()
+
+    def run(self, rows):
+        result = ImportResult()
+        batch = []
+        for line_number, row in rows:
+            if isinstance(row, Exception):
+                result.add_error(line_number, str(row))
+                continue
+            try:
+                batch.append((line_number, self.build(row)))
+            except ValidationError as e:
+                result.add_error(line_number, '; '.join(e.messages))
+                continue
+            if len(batch) >= self.batch_size:
+                self.flush(batch, result)
+                batch = []
+        if batch:
+            self.flush(batch, result)
+        return result
+
+    def clean_fields(self, row):
+        cleaned = {}
+        errors = []
+        for name, field in self.fields.items():
+            value = row.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            if value in (None, '') and name in self.defaults:
+                cleaned[name] = self.defaults[name]
+                continue
+            try:
+                cleaned[name] = field.clean('' if value is None else value)
+            except ValidationError as e:
+                errors.append(f'{name}: {" ".join(e.messages)}')
+        return cleaned, errors
+
+    def resolve(self, mapping, value, name, errors, required=False):
+        value = str(value).strip().lower() if value not in (None, '') else ''
+        if not value:
+            if required:
+                errors.append(f'{name}: This field is required.')
+            return None
+        if value not in mapping:
+            errors.append(f'{name}: Unknown value "{value}".')
+            return None
+        return mapping[value]
+
+    def flush(self, batch, result):
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create([instance for _, instance in batch])
+            result.created += len(batch)
+        except IntegrityError:
+            # Find the offending rows one at a time; the rest still go in
+            for line_number, instance in batch:
+                instance.pk = None
+                try:
+                    with transaction.atomic():
+                        self.model.objects.bulk_create([instance])
+                    result.created += 1
+                except IntegrityError as e:
+                    result.add_error(line_number, f'Database error: {e}')
+
+    @abc.abstractmethod
+    def build(self, row):
+        """Validate one row and return an unsaved model instance, or raise ValidationError"""
+
+
+class EquipmentImporter(BaseImporter):
+    form_class = EquipmentForm
+    model = Equipment
+
+    def build(self, row):
+        cleaned, errors = self.clean_fields(row)
+        lookups = self.lookups
+        cleaned['maintenance_team_id'] = self.resolve(
+            lookups.teams, row.get('maintenance_team'), 'maintenance_team', errors)
+        cleaned['assigned_employee_id'] = self.resolve(
+            lookups.users, row.get('assigned_employee'), 'assigned_employee', errors)
+        cleaned['default_technician_id'] = self.resolve(
+            lookups.users, row.get('default_technician'), 'default_technician', errors)
+
+        serial = (cleaned.get('serial_number') or '').lower()
+        if serial and serial in lookups.serials:
+            errors.append('serial_number: Equipment with this Serial number already exists.')
+        if errors:
+            raise ValidationError(errors)
+        lookups.serials.add(serial)
+        return Equipment(**cleaned)
+
+
+class RequestImporter(BaseImporter):
+    form_class = MaintenanceRequestForm
+    model = MaintenanceRequest
+
+    def get_lookups(self):
+        return Lookups(with_equipment=True)
+
+    def build(self, row):
+        cleaned, errors = self.clean_fields(row)
+        lookups = self.lookups
+        equipment = self.resolve(lookups.equipment, row.get('equipment'), 'equipment', errors, required=True)
+        team_id = self.resolve(lookups.teams, row.get('maintenance_team'), 'maintenance_team', errors)
+        assigned_to_id = self.resolve(lookups.users, row.get('assigned_to'), 'assigned_to', errors)
+        if assigned_to_id and assigned_to_id not in lookups.technicians:
+            errors.append('assigned_to: Select a valid choice. That choice is not one of the available choices.')
+        if errors:
+            raise ValidationError(errors)
+
+        equipment_id, equipment_team_id = equipment
+        return MaintenanceRequest(
+            equipment_id=equipment_id,
+            maintenance_team_id=team_id or equipment_team_id,
+            assigned_to_id=assigned_to_id,
+            created_by=self.user,
+            **cleaned
+        )
+
+
+IMPORTERS = {
+    'equipment': EquipmentImporter,
+    'requests': RequestImporter,
+}
+
+
+def run_import(kind, stream, fmt, batch_size=DEFAULT_BATCH_SIZE, user=None):
+    importer = IMPORTERS[kind](batch_size=batch_size, user=user)
+    return importer.run(iter_rows(stream, fmt))
@@ -0,0 +1,54 @@
+# gearguard/management/commands/archive_logs.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from gearguard import archive
+
+
+class Command(BaseCommand):
+    help = 'Move maintenance log entries older than a number of months into monthly archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=12,
+                            help='Keep this many whole months (plus the current one) in the live table')
+        parser.add_argument('--batch-size', type=int, default=archive.BATCH_SIZE,
+                            help='Entries moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count what would be archived')
+        parser.add_argument('--list', action='store_true', help='List the existing archive tables and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for month in archive.months():
+                count = archive.archive_model(month).objects.count()
+                self.stdout.write(f'{archive.table_name(month)}: {count} entries')
+            return
+        if options['months'] < 0:
+            raise CommandError('--months must not be negative')
+
+        today = timezone.localdate()
+        index = today.year * 12 + today.month - 1 - options['months']
+        cutoff = archive.month_start(today.replace(year=index // 12, month=index % 12 + 1, day=1))
+        self.stdout.write(f'Archiving entries from before {cutoff:%Y-%m-%d}')
+
+        if options['dry_run']:
+            pending = archive.pending(cutoff)
+            for month, count in pending:
+                self.stdout.write(f'{month:%Y-%m}: {count} entries')
+            self.stdout.write(self.style.SUCCESS(f'✅ {sum(count for _, count in pending)} entries would be archived'))
+            return
+
+        started = time.perf_counter()
+        moved = archive.archive_before(
+            cutoff, batch_size=options['batch_size'],
+            progress=self.report_progress if options['verbosity'] > 1 else None,
+        )
+        for month, count in moved:
+            self.stdout.write(f'{month:%Y-%m}: {count} entries -> {archive.table_name(month)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Archived {sum(count for _, count in moved)} entries in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def report_progress(self, month, total):
+        self.stdout.write(f'{month:%Y-%m}: {total} entries moved')
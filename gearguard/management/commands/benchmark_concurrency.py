@@ -0,0 +1,184 @@
+# gearguard/management/commands/benchmark_concurrency.py
+
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.test import RequestFactory
+from gearguard import transitions, views
+from gearguard.models import MaintenanceRequest
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure Kanban read throughput while other processes keep moving cards, '
+        'using the database settings in effect (see GEARGUARD_DB_PROFILE). '
+        'On SQLite the benchmark runs against a throwaway copy of the database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10, help='Seconds to run')
+        parser.add_argument('--user', help='Username to view the board and move cards as (default: first superuser)')
+        parser.add_argument('--i-know-this-writes', action='store_true', dest='allow_writes',
+                            help='Let writers move real cards (and log it) in the configured database; '
+                                 'required with writers on anything but SQLite')
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        card_ids = list(
+            MaintenanceRequest.objects.filter(stage__in=['new', 'in_progress'])
+            .order_by('pk').values_list('pk', flat=True)[:options['writers'] * 50]
+        )
+        if options['writers'] and not card_ids:
+            raise CommandError('No open maintenance requests to move; load some data first')
+
+        # Writers change stages, assignees and the activity log, so keep them
+        # away from real data unless told otherwise
+        copy = None
+        if options['writers'] and not options['allow_writes']:
+            if connection.vendor != 'sqlite':
+                raise CommandError(
+                    'Writers move real cards in the configured database; run this against a test '
+                    'database, or pass --i-know-this-writes'
+                )
+            copy = self.use_copy()
+            self.stdout.write(f'Benchmarking a copy of the database at {copy}')
+
+        try:
+            self.run(user, card_ids, options)
+        finally:
+            if copy:
+                connection.close()
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(copy + suffix):
+                        os.remove(copy + suffix)
+
+    def run(self, user, card_ids, options):
+        journal_mode = self.journal_mode()
+        # Worker processes, like a pre-forking app server, so the GIL doesn't
+        # hide how the database handles concurrent readers and writers
+        connection.close()
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        deadline = time.time() + options['duration']
+        workers = [
+            context.Process(target=read_worker, args=(user.pk, deadline, results))
+            for _ in range(options['readers'])
+        ]
+        workers += [
+            context.Process(target=write_worker, args=(user.pk, card_ids[i::options['writers']], deadline, results))
+            for i in range(options['writers'])
+        ]
+        for worker in workers:
+            worker.start()
+        stats = {'read': [], 'write': [], 'conflict': 0, 'locked': 0}
+        for _ in workers:
+            for key, value in results.get().items():
+                stats[key] += value
+        for worker in workers:
+            worker.join()
+
+        database = settings.DATABASES['default']
+        self.stdout.write(
+            f"Profile: {settings.DB_PROFILE} (journal_mode={journal_mode}, "
+            f"CONN_MAX_AGE={database.get('CONN_MAX_AGE', 0)})"
+        )
+        self.stdout.write(f"Workers: {options['readers']} readers, {options['writers']} writers, {options['duration']:g}s")
+        for kind in ('read', 'write'):
+            self.stdout.write(self.format_latencies(kind, stats[kind], options['duration']))
+        self.stdout.write(f"Conflicts: {stats['conflict']}  Lock errors: {stats['locked']}")
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark complete'))
+
+    def use_copy(self):
+        """Point the default connection at a throwaway copy of the SQLite database"""
+        handle, path = tempfile.mkstemp(prefix='gearguard-benchmark-', suffix='.sqlite3')
+        os.close(handle)
+        source = sqlite3.connect(connection.settings_dict['NAME'])
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+        connection.close()
+        # Forked workers inherit the changed settings
+        connection.settings_dict['NAME'] = path
+        return path
+
+    def get_user(self, username):
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+        else:
+            users = users.filter(is_superuser=True)
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError('No user to run the benchmark as; pass --user')
+        return user
+
+    def journal_mode(self):
+        if connection.vendor != 'sqlite':
+            return connection.vendor
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0]
+
+    def format_latencies(self, kind, latencies, duration):
+        if not latencies:
+            return f'{kind.title()}s: none completed'
+        latencies = sorted(latencies)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000
+        return (
+            f'{kind.title()}s: {len(latencies)} ({len(latencies) / duration:.1f}/s), '
+            f'p50 {p50:.1f}ms, p95 {p95:.1f}ms, max {latencies[-1] * 1000:.1f}ms'
+        )
+
+
+def read_worker(user_id, deadline, results):
+    stats = {'read': [], 'locked': 0}
+    user = User.objects.get(pk=user_id)
+    factory = RequestFactory()
+    while time.time() < deadline:
+        request = factory.get('/kanban/')
+        request.user = user
+        started = time.perf_counter()
+        try:
+            views.kanban_board(request)
+            stats['read'].append(time.perf_counter() - started)
+        except OperationalError:
+            stats['locked'] += 1
+        # What the request_finished signal does at the end of each request
+        close_old_connections()
+    connection.close()
+    results.put(stats)
+
+
+def write_worker(user_id, card_ids, deadline, results):
+    stats = {'write': [], 'conflict': 0, 'locked': 0}
+    user = User.objects.get(pk=user_id)
+    index = 0
+    while time.time() < deadline:
+        pk = card_ids[index % len(card_ids)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            current = MaintenanceRequest.objects.filter(pk=pk).values_list('stage', flat=True).first()
+            target = 'in_progress' if current == 'new' else 'new'
+            transitions.transition_stage(pk, current, target, user)
+            stats['write'].append(time.perf_counter() - started)
+        except transitions.TransitionConflict:
+            stats['conflict'] += 1
+        except OperationalError:
+            stats['locked'] += 1
+        close_old_connections()
+    connection.close()
+    results.put(stats)
@@ -0,0 +1,175 @@
+# gearguard/management/commands/benchmark_views.py
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from core.metrics import registry
+from gearguard.models import Equipment, MaintenanceLog, MaintenanceRequest, MaintenanceTeam, TeamMember
+
+
+def benchmark_urls():
+    """(name, url) of every page in the suite"""
+    today = timezone.localdate()
+    start = today.replace(day=1) - timedelta(days=7)
+    return [
+        ('dashboard', reverse('gearguard:dashboard')),
+        ('equipment_list', reverse('gearguard:equipment_list')),
+        ('kanban_board', reverse('gearguard:kanban_board')),
+        ('calendar_view', reverse('gearguard:calendar_view')),
+        ('calendar_events', f"{reverse('gearguard:calendar_events')}?start={start}&end={start + timedelta(days=42)}"),
+        ('reporting', reverse('gearguard:reporting')),
+        ('teams_list', reverse('gearguard:teams_list')),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the main pages through the test client and print the results as JSON; '
+        'pass --compare with an earlier result to check for regressions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per page and cache state')
+        parser.add_argument('--views', nargs='+', help='Only benchmark these pages')
+        parser.add_argument('--cache', choices=['cold', 'warm', 'both'], default='both',
+                            help='Measure with an empty cache, a primed one, or both')
+        parser.add_argument('--user', help='Username to request the pages as (default: first superuser)')
+        parser.add_argument('--host', default='localhost', help='Host header; must be in ALLOWED_HOSTS')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=25,
+                            help='Allowed slowdown of the median, in percent, before --compare fails')
+
+    def handle(self, *args, **options):
+        if 'core.middleware.MetricsMiddleware' not in settings.MIDDLEWARE:
+            raise CommandError('core.middleware.MetricsMiddleware must be enabled to count queries')
+        urls = benchmark_urls()
+        if options['views']:
+            unknown = set(options['views']) - {name for name, _ in urls}
+            if unknown:
+                raise CommandError(f"Unknown views: {', '.join(sorted(unknown))}")
+            urls = [(name, url) for name, url in urls if name in options['views']]
+
+        client = Client(SERVER_NAME=options['host'])
+        client.force_login(self.get_user(options['user']))
+        states = ['cold', 'warm'] if options['cache'] == 'both' else [options['cache']]
+
+        results = {
+            'commit': git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'db_profile': getattr(settings, 'DB_PROFILE', None),
+            },
+            'rows': {
+                'teams': MaintenanceTeam.objects.count(),
+                'technicians': TeamMember.objects.values('user').distinct().count(),
+                'equipment': Equipment.objects.count(),
+                'requests': MaintenanceRequest.objects.count(),
+                'logs': MaintenanceLog.objects.count(),
+            },
+            'repeat': options['repeat'],
+            'views': {},
+        }
+        for name, url in urls:
+            results['views'][name] = {'url': url}
+            for state in states:
+                results['views'][name][state] = self.measure(client, url, state, options['repeat'])
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"✅ Results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            self.compare(results, options['compare'], options['threshold'])
+
+    def get_user(self, username):
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+        else:
+            users = users.filter(is_superuser=True)
+        user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError('No user to run the benchmark as; pass --user')
+        return user
+
+    def measure(self, client, url, state, repeat):
+        """Summary of `repeat` timed requests, after a cache clear (cold) or an untimed request (warm)"""
+        samples = []
+        for _ in range(repeat):
+            if state == 'cold':
+                cache.clear()
+            else:
+                client.get(url)
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            sample = registry.recent()[-1]
+            samples.append((elapsed, sample, len(response.content)))
+
+        durations = [elapsed * 1000 for elapsed, _, _ in samples]
+        return {
+            'median_ms': round(statistics.median(durations), 2),
+            'min_ms': round(min(durations), 2),
+            'max_ms': round(max(durations), 2),
+            'queries': max(sample.queries for _, sample, _ in samples),
+            'db_ms': round(statistics.median(sample.db_time * 1000 for _, sample, _ in samples), 2),
+            'template_ms': round(statistics.median(sample.template_time * 1000 for _, sample, _ in samples), 2),
+            'bytes': samples[-1][2],
+        }
+
+    def compare(self, results, path, threshold):
+        with open(path) as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, current in results['views'].items():
+            previous = baseline.get('views', {}).get(name)
+            if not previous:
+                continue
+            for state in ('cold', 'warm'):
+                if state not in current or state not in previous:
+                    continue
+                before, after = previous[state], current[state]
+                change = (after['median_ms'] - before['median_ms']) / before['median_ms'] * 100 if before['median_ms'] else 0
+                self.stderr.write(
+                    f"{name} ({state}): {before['median_ms']}ms -> {after['median_ms']}ms ({change:+.0f}%), "
+                    f"{before['queries']} -> {after['queries']} queries"
+                )
+                if change > threshold:
+                    regressions.append(f'{name} ({state}) is {change:.0f}% slower')
+                if after['queries'] > before['queries']:
+                    regressions.append(f"{name} ({state}) runs {after['queries'] - before['queries']} more queries")
+        if regressions:
+            raise CommandError('Regressions against {}: {}'.format(path, '; '.join(regressions)))
+        self.stderr.write(self.style.SUCCESS(f'✅ No regressions against {path}'))
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,36 @@
+# gearguard/management/commands/export_data.py
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from gearguard.exports import CHUNK_SIZE, EXPORTS, FORMATS, parse_filters, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Stream equipment, maintenance requests or maintenance logs to CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('path', nargs='?', default='-', help='Output file, or - for stdout (default)')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--start', help='Only rows created on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--end', help='Only rows created on or before this date (YYYY-MM-DD)')
+        parser.add_argument('--team', help='Maintenance team id')
+        parser.add_argument('--stage', help='Request stage (requests and logs only)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        try:
+            filters = parse_filters(kind, options)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        lines = stream_export(kind, options['format'], chunk_size=options['chunk_size'], **filters)
+        if options['path'] == '-':
+            sys.stdout.writelines(lines)
+            return
+
+        with open(options['path'], 'w', newline='', encoding='utf-8') as output:
+            output.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f'✅ Exported {kind} to {options["path"]}'))
@@ -0,0 +1,232 @@
+# gearguard/management/commands/generate_load_data.py
+
+import contextlib
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from gearguard import caching
+from gearguard.models import Equipment, MaintenanceRequest, MaintenanceTeam, TeamMember
+
+# Weighted value distributions, roughly what a plant with a mixed fleet sees
+CATEGORY_WEIGHTS = {
+    'computer': 30, 'printer': 10, 'vehicle': 10, 'machinery': 25,
+    'hvac': 10, 'electrical': 10, 'other': 5,
+}
+DEPARTMENT_WEIGHTS = {
+    'production': 35, 'it': 20, 'logistics': 20,
+    'administration': 10, 'maintenance': 10, 'hr': 5,
+}
+REQUEST_TYPE_WEIGHTS = {'corrective': 70, 'preventive': 30}
+PRIORITY_WEIGHTS = {'low': 30, 'medium': 45, 'high': 20, 'critical': 5}
+# Stage mix of requests by age: old requests are mostly closed, recent ones open
+OLD_STAGE_WEIGHTS = {'new': 3, 'in_progress': 4, 'repaired': 92, 'scrap': 1}
+RECENT_STAGE_WEIGHTS = {'new': 35, 'in_progress': 35, 'repaired': 29, 'scrap': 1}
+RECENT_DAYS = 30
+HISTORY_DAYS = 730
+
+FAULTS = [
+    'Overheating', 'Unusual noise', 'Will not start', 'Intermittent failure',
+    'Error code on display', 'Leaking', 'Calibration drift', 'Worn belt',
+    'Network dropouts', 'Paper jam', 'Battery not charging', 'Vibration',
+]
+ASSET_NAMES = {
+    'computer': ['Workstation', 'Laptop', 'Server', 'Thin Client'],
+    'printer': ['Laser Printer', 'Label Printer', 'Plotter'],
+    'vehicle': ['Forklift', 'Delivery Van', 'Pallet Jack'],
+    'machinery': ['CNC Mill', 'Lathe', 'Conveyor', 'Press', 'Packaging Line'],
+    'hvac': ['Air Handler', 'Chiller', 'Rooftop Unit'],
+    'electrical': ['Generator', 'UPS', 'Switchboard'],
+    'other': ['Compressor', 'Pump', 'Scale'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate synthetic teams, technicians, equipment and maintenance requests '
+        'with bulk_create() for performance testing'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000, help='Maintenance requests to create')
+        parser.add_argument('--equipment', type=int, help='Equipment to create (default: requests / 10)')
+        parser.add_argument('--users', type=int, help='Technicians to create (default: requests / 500, at least 10)')
+        parser.add_argument('--teams', type=int, help='Teams to create (default: users / 8, at least 2)')
+        parser.add_argument('--prefix', default='LOAD', help='Prefix for generated names and serial numbers')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data sets')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        # An explicit 0 is kept: only options left out get a default
+        request_count = options['requests']
+        equipment_count = options['equipment']
+        if equipment_count is None:
+            equipment_count = max(1, request_count // 10)
+        user_count = options['users']
+        if user_count is None:
+            user_count = max(10, request_count // 500)
+        team_count = options['teams']
+        if team_count is None:
+            team_count = max(2, user_count // 8)
+        if min(request_count, equipment_count, user_count, team_count) < 0:
+            raise CommandError('Counts must not be negative')
+        # Technicians and equipment are spread over the teams
+        if team_count == 0:
+            raise CommandError('--teams must be at least 1')
+        if request_count and not equipment_count:
+            raise CommandError('--equipment must be at least 1 to generate requests')
+
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        started = time.perf_counter()
+
+        teams = self.create_teams(team_count)
+        technicians = self.create_technicians(user_count, teams)
+        equipment = self.create_equipment(equipment_count, teams, technicians)
+        self.create_requests(request_count, equipment, technicians)
+        # Users and memberships were bulk inserted without their signals
+        caching.bump(teams, scopes=[caching.TECHNICIANS])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Generated {len(teams)} teams, {sum(map(len, technicians.values()))} technicians, '
+            f'{len(equipment)} equipment and {request_count} requests '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def create_teams(self, count):
+        offset = MaintenanceTeam.objects.filter(name__startswith=f'{self.prefix} Team ').count()
+        teams = MaintenanceTeam.objects.bulk_create([
+            MaintenanceTeam(name=f'{self.prefix} Team {offset + i + 1:03d}', description='Generated team')
+            for i in range(count)
+        ], batch_size=self.batch_size)
+        self.stdout.write(f'Created {len(teams)} teams')
+        return [team.pk for team in teams]
+
+    def create_technicians(self, count, teams):
+        username = f'{self.prefix.lower()}.tech'
+        offset = User.objects.filter(username__startswith=f'{username}.').count()
+        # Hashing is deliberately slow; every generated user shares one hash
+        password = make_password('password123')
+        users = User.objects.bulk_create([
+            User(
+                username=f'{username}.{offset + i + 1:06d}',
+                first_name='Tech',
+                last_name=f'{offset + i + 1:06d}',
+                email=f'{username}.{offset + i + 1:06d}@example.com',
+                password=password,
+            )
+            for i in range(count)
+        ], batch_size=self.batch_size)
+        # Every technician is in one team, round robin, the first of each team leading it
+        TeamMember.objects.bulk_create([
+            TeamMember(user_id=user.pk, team_id=teams[i % len(teams)], is_lead=i < len(teams))
+            for i, user in enumerate(users)
+        ], batch_size=self.batch_size)
+        self.stdout.write(f'Created {len(users)} technicians')
+
+        by_team = {}
+        for i, user in enumerate(users):
+            by_team.setdefault(teams[i % len(teams)], []).append(user.pk)
+        return by_team
+
+    def create_equipment(self, count, teams, technicians):
+        offset = Equipment.objects.filter(serial_number__startswith=f'{self.prefix}-').count()
+        # Team sizes follow a long tail: a few teams look after most assets
+        team_weights = [1 / (rank + 1) for rank in range(len(teams))]
+        categories, category_weights = zip(*CATEGORY_WEIGHTS.items())
+        departments, department_weights = zip(*DEPARTMENT_WEIGHTS.items())
+        today = timezone.localdate()
+
+        created = []
+        for start in range(0, count, self.batch_size):
+            batch = []
+            for i in range(start, min(count, start + self.batch_size)):
+                category = self.rng.choices(categories, category_weights)[0]
+                team_id = self.rng.choices(teams, team_weights)[0]
+                purchase_date = today - timedelta(days=self.rng.randint(30, 3650))
+                batch.append(Equipment(
+                    name=f'{self.rng.choice(ASSET_NAMES[category])} {offset + i + 1}',
+                    serial_number=f'{self.prefix}-{offset + i + 1:07d}',
+                    category=category,
+                    department=self.rng.choices(departments, department_weights)[0],
+                    maintenance_team_id=team_id,
+                    default_technician_id=self.rng.choice(technicians[team_id]) if technicians.get(team_id) else None,
+                    purchase_date=purchase_date,
+                    warranty_expiry=purchase_date + timedelta(days=365 * self.rng.choice([1, 2, 3, 5])),
+                    location=f'Building {self.rng.randint(1, 12)}, Bay {self.rng.randint(1, 40)}',
+                ))
+            with transaction.atomic():
+                created += [(item.pk, item.maintenance_team_id) for item in Equipment.objects.bulk_create(batch)]
+        self.stdout.write(f'Created {len(created)} equipment')
+        return created
+
+    def create_requests(self, count, equipment, technicians):
+        if not equipment:
+            return
+        # Some assets break far more often than others (Pareto-distributed)
+        equipment_weights = [self.rng.paretovariate(1.5) for _ in equipment]
+        types, type_weights = zip(*REQUEST_TYPE_WEIGHTS.items())
+        priorities, priority_weights = zip(*PRIORITY_WEIGHTS.items())
+        creators = [user_id for members in technicians.values() for user_id in members]
+
+        created = 0
+        with backdated(MaintenanceRequest, 'created_at'):
+            for start in range(0, count, self.batch_size):
+                batch = []
+                size = min(count, start + self.batch_size) - start
+                for equipment_id, team_id in self.rng.choices(equipment, equipment_weights, k=size):
+                    batch.append(self.build_request(
+                        equipment_id, team_id, technicians.get(team_id) or creators,
+                        creators, types, type_weights, priorities, priority_weights,
+                    ))
+                created += len(MaintenanceRequest.objects.bulk_create(batch))
+                self.stdout.write(f'Created {created}/{count} requests')
+
+    def build_request(self, equipment_id, team_id, team_members, creators, types, type_weights, priorities, priority_weights):
+        # More requests in recent months than long ago
+        age_days = min(HISTORY_DAYS, int(self.rng.expovariate(1 / 180)))
+        created_at = self.now - timedelta(days=age_days, minutes=self.rng.randint(0, 1439))
+        weights = RECENT_STAGE_WEIGHTS if age_days < RECENT_DAYS else OLD_STAGE_WEIGHTS
+        stage = self.rng.choices(list(weights), list(weights.values()))[0]
+        request_type = self.rng.choices(types, type_weights)[0]
+        fault = self.rng.choice(FAULTS)
+
+        request = MaintenanceRequest(
+            subject=fault if request_type == 'corrective' else 'Routine inspection',
+            description=f'{fault} reported by operator.' if request_type == 'corrective' else '',
+            request_type=request_type,
+            priority=self.rng.choices(priorities, priority_weights)[0],
+            stage=stage,
+            equipment_id=equipment_id,
+            maintenance_team_id=team_id,
+            created_by_id=self.rng.choice(creators) if creators else None,
+            created_at=created_at,
+        )
+        if stage != 'new' and team_members:
+            request.assigned_to_id = self.rng.choice(team_members)
+        if request_type == 'preventive':
+            request.scheduled_date = (created_at + timedelta(days=self.rng.randint(0, 60))).date()
+        if stage == 'repaired':
+            hours = round(self.rng.lognormvariate(1, 0.8), 2)
+            request.duration_hours = Decimal(str(min(hours, 999)))
+            request.completed_date = min(self.now, created_at + timedelta(hours=hours + self.rng.randint(1, 72)))
+        return request
+
+
+@contextlib.contextmanager
+def backdated(model, field_name):
+    """Let bulk_create() keep the given value of an auto_now_add field"""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
@@ -0,0 +1,29 @@
+# gearguard/management/commands/generate_preventive_requests.py
+
+from django.core.management.base import BaseCommand
+from gearguard.scheduling import DEFAULT_BATCH_SIZE, DEFAULT_HORIZON_DAYS, generate_preventive_requests
+
+
+class Command(BaseCommand):
+    help = 'Create preventive maintenance requests from the recurring schedules'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon', type=int, default=DEFAULT_HORIZON_DAYS,
+            help='Days ahead to schedule (default: a year)'
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--equipment', type=int, nargs='*',
+            help='Only generate for these equipment ids'
+        )
+
+    def handle(self, *args, **options):
+        created, skipped = generate_preventive_requests(
+            horizon_days=options['horizon'],
+            batch_size=options['batch_size'],
+            equipment_ids=options['equipment'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Created {created} preventive requests ({skipped} already scheduled)'
+        ))
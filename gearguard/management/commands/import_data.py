@@ -0,0 +1,41 @@
+# gearguard/management/commands/import_data.py
+
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from gearguard.importers import DEFAULT_BATCH_SIZE, FORMATS, IMPORTERS, detect_format, run_import
+
+
+class Command(BaseCommand):
+    help = 'Bulk import equipment or maintenance requests from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path', help='File to import, or - for stdin')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--user', help='Username recorded as creator of imported requests')
+        parser.add_argument('--show-errors', type=int, default=20, help='Number of row errors to print')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'Unknown user: {options["user"]}')
+
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        if path == '-':
+            result = run_import(options['kind'], sys.stdin, fmt, options['batch_size'], user)
+        else:
+            with open(path, newline='', encoding='utf-8-sig') as stream:
+                result = run_import(options['kind'], stream, fmt, options['batch_size'], user)
+
+        for error in result.errors[:options['show_errors']]:
+            self.stderr.write(f'Line {error["line"]}: {error["error"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Imported {result.created} {options["kind"]} ({len(result.errors)} rows failed)'
+        ))
@@ -0,0 +1,21 @@
+# gearguard/management/commands/rebuild_request_buckets.py
+
+from django.core.management.base import BaseCommand
+from gearguard.counters import refresh_equipment_counters
+from gearguard.health import rebuild_buckets
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily per-equipment request buckets used for health scoring'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--equipment', type=int, nargs='*',
+            help='Only rebuild buckets for these equipment ids'
+        )
+
+    def handle(self, *args, **options):
+        rebuild_buckets(equipment_ids=options['equipment'])
+        # Recent request counters are derived from the buckets
+        refresh_equipment_counters(equipment_ids=options['equipment'])
+        self.stdout.write(self.style.SUCCESS('✅ Request buckets rebuilt'))
@@ -0,0 +1,12 @@
+# gearguard/management/commands/rebuild_request_summary.py
+
+from django.core.management.base import BaseCommand
+from gearguard.summary import rebuild_summary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pre-aggregated reporting summary from maintenance requests'
+
+    def handle(self, *args, **kwargs):
+        cells = rebuild_summary()
+        self.stdout.write(self.style.SUCCESS(f'✅ Reporting summary rebuilt ({cells} cells)'))
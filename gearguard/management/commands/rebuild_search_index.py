@@ -0,0 +1,14 @@
+# gearguard/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand, CommandError
+from gearguard import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for equipment and maintenance requests'
+
+    def handle(self, *args, **kwargs):
+        if not search.is_available():
+            raise CommandError('Full-text search index requires the SQLite backend')
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('✅ Search index rebuilt'))
@@ -0,0 +1,28 @@
+# gearguard/management/commands/refresh_equipment_counters.py
+
+from django.core.management.base import BaseCommand
+from gearguard import tasks
+from gearguard.counters import refresh_equipment_counters
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the denormalized open/recent request counters on Equipment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--equipment', type=int, nargs='*',
+            help='Only refresh these equipment ids'
+        )
+        parser.add_argument('--defer', action='store_true', help='Queue the refresh for run_worker instead')
+
+    def handle(self, *args, **options):
+        if options['defer']:
+            tasks.enqueue('refresh_counters', options['equipment'])
+            self.stdout.write(self.style.SUCCESS('✅ Counter refresh queued'))
+            return
+        changed = refresh_equipment_counters(
+            equipment_ids=options['equipment'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ Counters refreshed ({changed} equipment corrected)'))
@@ -0,0 +1,92 @@
+# gearguard/management/commands/run_worker.py
+
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from gearguard import tasks
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (activity logs, notification emails, search indexing)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1, help='Tasks to run in parallel')
+        parser.add_argument('--batch-size', type=int, help='Tasks to claim at a time (default: --threads)')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait before checking an empty queue again')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='Seconds after which a running task is assumed abandoned and requeued')
+        parser.add_argument('--once', action='store_true', help='Exit once no task is due instead of waiting')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Give failed tasks a fresh set of attempts before starting')
+
+    def handle(self, *args, **options):
+        threads = max(1, options['threads'])
+        batch_size = options['batch_size'] or threads
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.verbosity = options['verbosity']
+        self.stopping = threading.Event()
+        self.results = {'done': 0, 'retry': 0, 'failed': 0}
+        self.lock = threading.Lock()
+
+        # Finish the tasks in hand on Ctrl+C or SIGTERM; a second signal kills the worker
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self.stop)
+
+        if options['retry_failed']:
+            self.stdout.write(f'Requeued {tasks.retry_failed()} failed tasks')
+
+        self.stdout.write(f'Worker {worker} started with {threads} thread(s)')
+        started = time.perf_counter()
+        last_stale_check = 0
+        pool = ThreadPoolExecutor(threads, thread_name_prefix='gearguard-task') if threads > 1 else None
+        try:
+            while not self.stopping.is_set():
+                if time.monotonic() - last_stale_check > min(60, options['stale_after']):
+                    requeued = tasks.requeue_stale(options['stale_after'])
+                    if requeued:
+                        self.stderr.write(f'Released {requeued} abandoned tasks')
+                    last_stale_check = time.monotonic()
+
+                claimed = tasks.claim(worker, batch_size)
+                if not claimed:
+                    if options['once']:
+                        break
+                    self.stopping.wait(options['poll_interval'])
+                    continue
+                if pool:
+                    list(pool.map(self.run_task, claimed))
+                else:
+                    for queued in claimed:
+                        self.run_task(queued)
+        finally:
+            if pool:
+                pool.shutdown()
+            close_old_connections()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Worker stopped after {time.perf_counter() - started:.1f}s: {self.results['done']} done, "
+            f"{self.results['retry']} to retry, {self.results['failed']} failed"
+        ))
+
+    def run_task(self, queued):
+        try:
+            result = tasks.run(queued)
+        finally:
+            # Long-running workers must not hold on to broken or expired connections
+            close_old_connections()
+        with self.lock:
+            self.results[result] += 1
+        if self.verbosity > 1:
+            self.stdout.write(f'{queued.name} #{queued.pk}: {result}')
+
+    def stop(self, signum, frame):
+        self.stderr.write('Stopping after the current tasks...')
+        signal.signal(signum, signal.SIG_DFL)
+        self.stopping.set()
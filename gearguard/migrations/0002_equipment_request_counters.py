@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:15
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+def backfill_counters(apps, schema_editor):
+    Equipment = apps.get_model('gearguard', 'Equipment')
+    recent_since = timezone.now() - timezone.timedelta(days=30)
+    rows = Equipment.objects.annotate(
+        actual_open=Count('maintenance_requests', filter=Q(maintenance_requests__stage__in=['new', 'in_progress'])),
+        actual_recent=Count('maintenance_requests', filter=Q(maintenance_requests__created_at__gte=recent_since)),
+    )
+    for item in list(rows):
+        Equipment.objects.filter(pk=item.pk).update(
+            open_requests_count=item.actual_open,
+            recent_requests_count=item.actual_recent,
+            counters_refreshed_at=timezone.now(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='counters_refreshed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='open_requests_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='recent_requests_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
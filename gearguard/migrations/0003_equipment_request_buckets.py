@@ -0,0 +1,49 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_buckets(apps, schema_editor):
+    MaintenanceRequest = apps.get_model('gearguard', 'MaintenanceRequest')
+    EquipmentRequestBucket = apps.get_model('gearguard', 'EquipmentRequestBucket')
+    rows = (
+        MaintenanceRequest.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('equipment_id', 'day')
+        .annotate(total=Count('id'))
+    )
+    EquipmentRequestBucket.objects.bulk_create(
+        [
+            EquipmentRequestBucket(equipment_id=row['equipment_id'], day=row['day'], request_count=row['total'])
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0002_equipment_request_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentRequestBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='request_buckets', to='gearguard.equipment')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'equipment'], name='gearguard_e_day_c1e16a_idx')],
+                'unique_together': {('equipment', 'day')},
+            },
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+
+
+def backfill_summary(apps, schema_editor):
+    MaintenanceRequest = apps.get_model('gearguard', 'MaintenanceRequest')
+    RequestSummary = apps.get_model('gearguard', 'RequestSummary')
+    rows = (
+        MaintenanceRequest.objects.order_by()
+        .annotate(month=TruncMonth('created_at', output_field=models.DateField()))
+        .values_list('maintenance_team_id', 'equipment__category', 'priority', 'stage', 'month')
+        .annotate(total=Count('id'))
+    )
+    RequestSummary.objects.bulk_create(
+        [
+            RequestSummary(
+                team_id=team_id, category=category, priority=priority,
+                stage=stage, month=month, request_count=total,
+            )
+            for team_id, category, priority, stage, month, total in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0003_equipment_request_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('computer', 'Computer'), ('printer', 'Printer'), ('vehicle', 'Vehicle'), ('machinery', 'Machinery'), ('hvac', 'HVAC'), ('electrical', 'Electrical'), ('other', 'Other')], max_length=50)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], max_length=20)),
+                ('stage', models.CharField(choices=[('new', 'New'), ('in_progress', 'In Progress'), ('repaired', 'Repaired'), ('scrap', 'Scrap')], max_length=20)),
+                ('month', models.DateField(help_text='First day of the month the requests were created in')),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_summaries', to='gearguard.maintenanceteam')),
+            ],
+            options={
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['month', 'team'], name='gearguard_r_month_bab258_idx')],
+                'unique_together': {('team', 'category', 'priority', 'stage', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
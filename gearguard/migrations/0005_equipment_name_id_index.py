@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0004_request_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['name', 'id'], name='gearguard_e_name_2b961d_idx'),
+        ),
+    ]
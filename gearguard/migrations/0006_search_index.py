@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS gearguard_search_index USING fts5("
+        "title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO gearguard_search_index (rowid, title, body) "
+        "SELECT id * 2, name, serial_number || ' ' || location FROM gearguard_equipment"
+    )
+    schema_editor.execute(
+        "INSERT INTO gearguard_search_index (rowid, title, body) "
+        "SELECT id * 2 + 1, subject, description FROM gearguard_maintenancerequest"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS gearguard_search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0005_equipment_name_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+PRIORITY_RANKS = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+
+def backfill_priority_rank(apps, schema_editor):
+    MaintenanceRequest = apps.get_model('gearguard', 'MaintenanceRequest')
+    for priority, rank in PRIORITY_RANKS.items():
+        MaintenanceRequest.objects.filter(priority=priority).update(priority_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0006_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenancerequest',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.RunPython(backfill_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(fields=['maintenance_team', 'stage', 'priority_rank', 'created_at'], name='gearguard_m_mainten_194e08_idx'),
+        ),
+    ]
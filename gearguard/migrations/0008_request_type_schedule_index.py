@@ -0,0 +1,19 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0007_request_priority_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(fields=['request_type', 'scheduled_date'], name='gearguard_m_request_56599a_idx'),
+        ),
+    ]
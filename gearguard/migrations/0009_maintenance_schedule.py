@@ -0,0 +1,55 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0008_request_type_schedule_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=300)),
+                ('description', models.TextField(blank=True)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], default='medium', max_length=20)),
+                ('frequency', models.CharField(choices=[('days', 'Every N days'), ('months', 'Every N months on a day of the month')], default='days', max_length=10)),
+                ('interval', models.PositiveIntegerField(default=90, help_text='Days or months between occurrences')),
+                ('day_of_month', models.PositiveSmallIntegerField(blank=True, help_text='Monthly schedules only; clamped to the last day of shorter months', null=True)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('generated_until', models.DateField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['equipment', 'start_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(fields=['equipment', 'scheduled_date', 'request_type'], name='gearguard_m_equipme_b8e0d5_idx'),
+        ),
+        migrations.AddField(
+            model_name='maintenanceschedule',
+            name='assigned_to',
+            field=models.ForeignKey(blank=True, help_text="Defaults to the equipment's technician", null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='maintenanceschedule',
+            name='equipment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='gearguard.equipment'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceschedule',
+            index=models.Index(fields=['is_active', 'generated_until'], name='gearguard_m_is_acti_70c300_idx'),
+        ),
+    ]
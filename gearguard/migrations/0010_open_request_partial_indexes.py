@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-17 11:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0009_maintenance_schedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(condition=models.Q(('stage__in', ['new', 'in_progress'])), fields=['equipment'], name='gearguard_open_equipment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(condition=models.Q(('stage__in', ['new', 'in_progress'])), fields=['maintenance_team'], name='gearguard_open_team_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(condition=models.Q(('stage__in', ['new', 'in_progress'])), fields=['assigned_to'], name='gearguard_open_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancerequest',
+            index=models.Index(condition=models.Q(('stage__in', ['new', 'in_progress'])), fields=['scheduled_date'], name='gearguard_open_schedule_idx'),
+        ),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:09
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+CREATED, UPDATED, STAGE_CHANGED, REASSIGNED, OTHER = 1, 2, 3, 4, 9
+ACTION_CODES = {
+    'Request created': CREATED,
+    'Request updated': UPDATED,
+    'Stage changed': STAGE_CHANGED,
+    'Reassigned': REASSIGNED,
+}
+STAGES = ['new', 'in_progress', 'repaired', 'scrap']
+# 'Stage: new → in_progress' at the start of a 'Request updated' note
+UPDATED_STAGE = re.compile(r'^Stage: (\w+) → (\w+)(?:, )?')
+BATCH_SIZE = 2000
+
+
+def encode_actions(apps, schema_editor):
+    MaintenanceLog = apps.get_model('gearguard', 'MaintenanceLog')
+    # Most rows are stage changes, with one of a dozen notes: one UPDATE each
+    for old in STAGES:
+        for new in STAGES:
+            MaintenanceLog.objects.filter(action='Stage changed', notes=f'From {old} to {new}').update(
+                action_code=STAGE_CHANGED, from_stage=old, to_stage=new, notes='',
+            )
+    for action, code in ACTION_CODES.items():
+        MaintenanceLog.objects.filter(action=action, action_code=0).update(action_code=code)
+
+    # Updates that changed the stage keep only the rest of their note
+    changed = []
+    rows = MaintenanceLog.objects.filter(action_code=UPDATED, notes__startswith='Stage: ')
+    for log in rows.only('pk', 'notes').iterator(chunk_size=BATCH_SIZE):
+        match = UPDATED_STAGE.match(log.notes)
+        if match:
+            log.from_stage, log.to_stage = match.groups()
+            log.notes = log.notes[match.end():]
+            changed.append(log)
+    MaintenanceLog.objects.bulk_update(changed, ['from_stage', 'to_stage', 'notes'], batch_size=BATCH_SIZE)
+
+    # Anything else keeps its old action text in the notes
+    for log in MaintenanceLog.objects.filter(action_code=0).only('pk', 'action', 'notes').iterator(chunk_size=BATCH_SIZE):
+        MaintenanceLog.objects.filter(pk=log.pk).update(
+            action_code=OTHER, notes=f'{log.action}: {log.notes}' if log.notes else log.action,
+        )
+
+
+def decode_actions(apps, schema_editor):
+    MaintenanceLog = apps.get_model('gearguard', 'MaintenanceLog')
+    names = {code: action for action, code in ACTION_CODES.items()}
+    for old in STAGES:
+        for new in STAGES:
+            MaintenanceLog.objects.filter(action_code=STAGE_CHANGED, from_stage=old, to_stage=new).update(
+                action='Stage changed', notes=f'From {old} to {new}',
+            )
+    changed = []
+    rows = MaintenanceLog.objects.filter(action_code=UPDATED).exclude(from_stage='')
+    for log in rows.only('pk', 'notes', 'from_stage', 'to_stage').iterator(chunk_size=BATCH_SIZE):
+        stage = f'Stage: {log.from_stage} → {log.to_stage}'
+        log.notes = f'{stage}, {log.notes}' if log.notes else stage
+        changed.append(log)
+    MaintenanceLog.objects.bulk_update(changed, ['notes'], batch_size=BATCH_SIZE)
+    for code, action in names.items():
+        MaintenanceLog.objects.filter(action_code=code).exclude(action_code=STAGE_CHANGED).update(action=action)
+    MaintenanceLog.objects.filter(action_code=OTHER).update(action='Other')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0011_task_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenancelog',
+            name='action_code',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='maintenancelog',
+            name='from_stage',
+            field=models.CharField(blank=True, choices=[('new', 'New'), ('in_progress', 'In Progress'), ('repaired', 'Repaired'), ('scrap', 'Scrap')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='maintenancelog',
+            name='to_stage',
+            field=models.CharField(blank=True, choices=[('new', 'New'), ('in_progress', 'In Progress'), ('repaired', 'Repaired'), ('scrap', 'Scrap')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='maintenancelog',
+            name='action',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.RunPython(encode_actions, decode_actions),
+        migrations.RemoveField(
+            model_name='maintenancelog',
+            name='action',
+        ),
+        migrations.AlterField(
+            model_name='maintenancelog',
+            name='action_code',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Request created'), (2, 'Request updated'), (3, 'Stage changed'), (4, 'Reassigned'), (9, 'Other')]),
+        ),
+        migrations.AlterField(
+            model_name='maintenancelog',
+            name='request',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='logs', to='gearguard.maintenancerequest'),
+        ),
+        migrations.AlterModelOptions(
+            name='maintenancelog',
+            options={'ordering': ['-timestamp', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['request', 'timestamp', 'id'], name='gearguard_log_request_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['timestamp'], name='gearguard_log_time_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:20
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+# Monthly archive tables (gearguard/archive.py) are not managed by migrations
+ARCHIVE_TABLE = re.compile(r'^gearguard_maintenancelog_\d{6}$')
+
+
+def backfill_equipment(apps, schema_editor):
+    MaintenanceLog = apps.get_model('gearguard', 'MaintenanceLog')
+    MaintenanceRequest = apps.get_model('gearguard', 'MaintenanceRequest')
+    MaintenanceLog.objects.update(equipment_id=Subquery(
+        MaintenanceRequest.objects.filter(pk=OuterRef('request_id')).values('equipment_id')[:1]
+    ))
+
+    quote = schema_editor.quote_name
+    for table in schema_editor.connection.introspection.table_names():
+        if not ARCHIVE_TABLE.match(table):
+            continue
+        schema_editor.execute(f'ALTER TABLE {quote(table)} ADD COLUMN {quote("equipment_id")} bigint NULL')
+        schema_editor.execute(
+            f'UPDATE {quote(table)} SET {quote("equipment_id")} = ('
+            f'SELECT {quote("equipment_id")} FROM {quote(MaintenanceRequest._meta.db_table)} '
+            f'WHERE {quote("id")} = {quote(table)}.{quote("request_id")})'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX {quote(table + "_eq")} ON {quote(table)} '
+            f'({quote("equipment_id")}, {quote("timestamp")}, {quote("id")})'
+        )
+
+
+def drop_archive_equipment(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for table in schema_editor.connection.introspection.table_names():
+        if ARCHIVE_TABLE.match(table):
+            schema_editor.execute(f'DROP INDEX {quote(table + "_eq")}')
+            schema_editor.execute(f'ALTER TABLE {quote(table)} DROP COLUMN {quote("equipment_id")}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0012_structured_logs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenancelog',
+            name='equipment',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='logs', to='gearguard.equipment'),
+        ),
+        migrations.RunPython(backfill_equipment, drop_archive_equipment),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['equipment', 'timestamp', 'id'], name='gearguard_log_equip_time_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.9 on 2026-10-17 12:24
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_no_team_cells(apps, schema_editor):
+    """Fold duplicate cells without a team into one, so the constraint can be added"""
+    RequestSummary = apps.get_model('gearguard', 'RequestSummary')
+    duplicates = (
+        RequestSummary.objects.filter(team__isnull=True).order_by()
+        .values('category', 'priority', 'stage', 'month')
+        .annotate(cells=Count('id'), keep=Min('id'), total=Sum('request_count'))
+        .filter(cells__gt=1)
+    )
+    for cell in duplicates:
+        RequestSummary.objects.filter(pk=cell['keep']).update(request_count=cell['total'])
+        RequestSummary.objects.filter(
+            team__isnull=True, category=cell['category'], priority=cell['priority'],
+            stage=cell['stage'], month=cell['month'],
+        ).exclude(pk=cell['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0013_log_equipment'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_no_team_cells, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='requestsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('team__isnull', True)), fields=('category', 'priority', 'stage', 'month'), name='gearguard_summary_no_team_uniq'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# Columns the equipment search matches by prefix when there is no FTS5 index
+PREFIX_COLUMNS = ('name', 'serial_number', 'location')
+
+
+def create_prefix_indexes(apps, schema_editor):
+    # istartswith compiles to UPPER(column::text) LIKE UPPER(...) || '%', which
+    # only a text_pattern_ops index on the same expression can serve
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in PREFIX_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS gearguard_equipment_{column}_prefix '
+            f'ON gearguard_equipment ((UPPER({column}::text)) text_pattern_ops)'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in PREFIX_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS gearguard_equipment_{column}_prefix')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gearguard', '0014_request_summary_no_team_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -1,7 +1,85 @@
-from django.db import models
+import calendar
+import datetime
+
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest, TruncMonth
 from django.contrib.auth.models import User
+from django.dispatch import Signal
 from django.utils import timezone
 
+# Sent after bulk_create() with the created instances, since bulk inserts
+# skip save() and the post_save signal
+bulk_created = Signal()
+
+
+class BulkCreateQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        bulk_created.send(sender=self.model, instances=created)
+        return created
+
+
+class MaintenanceRequestQuerySet(BulkCreateQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create() that applies the same derived fields and side effects as save()"""
+        objs = list(objs)
+        now = timezone.now()
+        
+        # Auto-fill team from equipment
+        missing_team = {obj.equipment_id for obj in objs if not obj.maintenance_team_id}
+        teams = dict(
+            Equipment.objects.filter(pk__in=missing_team).values_list('pk', 'maintenance_team_id')
+        ) if missing_team else {}
+        for obj in objs:
+            if not obj.maintenance_team_id:
+                obj.maintenance_team_id = teams.get(obj.equipment_id)
+            obj.priority_rank = MaintenanceRequest.PRIORITY_RANKS.get(obj.priority, 0)
+            if obj.stage == 'repaired' and not obj.completed_date:
+                obj.completed_date = now
+        
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            scrapped = {obj.equipment_id for obj in created if obj.stage == 'scrap'}
+            if scrapped:
+                Equipment.objects.filter(pk__in=scrapped, is_scrapped=False).update(
+                    is_scrapped=True, scrapped_date=now, updated_at=now
+                )
+            MaintenanceRequest.apply_state_changes([(None, obj.get_tracked_state()) for obj in created])
+        for obj in created:
+            obj._loaded_state = obj.get_tracked_state()
+        return created
+
+
+def upsert_increments(model, key_fields, rows, using='default', where=None):
+    """
+    Add counts to `request_count` for many keys at once with
+    INSERT ... ON CONFLICT DO UPDATE, which SQLite and PostgreSQL both
+    support. `rows` is a list of (key values..., positive increment).
+    `where` is the predicate of a partial unique index to conflict on.
+    """
+    if not rows:
+        return
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [model._meta.get_field(name).column for name in key_fields]
+    placeholders = ', '.join(['%s'] * (len(columns) + 1))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(quote(c) for c in columns)}, {quote('request_count')}) "
+        f"VALUES ({placeholders}) "
+        f"ON CONFLICT ({', '.join(quote(c) for c in columns)}) "
+        f"{f'WHERE {where} ' if where else ''}"
+        f"DO UPDATE SET {quote('request_count')} = {table}.{quote('request_count')} + excluded.{quote('request_count')}"
+    )
+    adapted = [
+        tuple(connection.ops.adapt_datefield_value(v) if isinstance(v, datetime.date) else v for v in row)
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, adapted)
+
+
 class MaintenanceTeam(models.Model):
     """Teams responsible for maintenance work"""
     name = models.CharField(max_length=100, unique=True)
@@ -99,27 +177,84 @@ class Equipment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Denormalized counters, kept in sync by MaintenanceRequest.save()/delete()
+    # and reconciled by the refresh_equipment_counters command
+    open_requests_count = models.PositiveIntegerField(default=0, editable=False)
+    recent_requests_count = models.PositiveIntegerField(default=0, editable=False)
+    counters_refreshed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    objects = BulkCreateQuerySet.as_manager()
+    
+    COUNTER_FIELDS = ('open_requests_count', 'recent_requests_count', 'counters_refreshed_at')
+    HEALTH_WINDOW_DAYS = 30
+    
+    # Set by gearguard.health when a list is scored in bulk
+    health_score = None
+    
     def __str__(self):
         return f"{self.name} ({self.serial_number})"
     
+    # Category as last read from the database, to keep RequestSummary in step
+    _loaded_category = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_category = instance.__dict__.get('category')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Counters are written with atomic UPDATEs; never overwrite them from a stale instance
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            skipped = set(self.COUNTER_FIELDS) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            category = self.__dict__.get('category')
+            if self._loaded_category and category and category != self._loaded_category:
+                RequestSummary.move_category(self.pk, self._loaded_category, category)
+        self._loaded_category = category
+    
     def get_open_requests_count(self):
-        return self.maintenance_requests.exclude(stage='repaired').exclude(stage='scrap').count()
+        return self.open_requests_count
     
-    def get_health_status(self):
-        """Calculate equipment health based on recent requests"""
-        recent_requests = self.maintenance_requests.filter(
-            created_at__gte=timezone.now() - timezone.timedelta(days=30)
-        ).count()
-        
+    @staticmethod
+    def health_for_count(recent_requests):
+        """Map a recent request count to a health status"""
         if recent_requests >= 5:
             return 'critical'
         elif recent_requests >= 3:
             return 'warning'
         return 'good'
     
+    @classmethod
+    def health_window_start(cls, today=None):
+        """First day (inclusive) of the rolling health window"""
+        today = today or timezone.localdate()
+        return today - timezone.timedelta(days=cls.HEALTH_WINDOW_DAYS - 1)
+    
+    def get_health_status(self):
+        """Health from the daily request buckets of the rolling window"""
+        if self.health_score is None:
+            # Never from recent_requests_count: nothing ages that out of the
+            # window but a counter refresh. Lists should score in bulk first.
+            from .health import scores_for
+            self.health_score = scores_for([self.pk])[self.pk]
+        return self.health_score.status
+    
     class Meta:
         ordering = ['name']
         verbose_name_plural = 'Equipment'
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
+
+
+# Requests still waiting for work; the condition of the open-request partial indexes
+OPEN_REQUESTS = models.Q(stage__in=['new', 'in_progress'])
 
 
 class MaintenanceRequest(models.Model):
@@ -143,11 +278,20 @@ class MaintenanceRequest(models.Model):
         ('critical', 'Critical'),
     ]
     
+    # Sort rank for each priority; higher is more urgent
+    PRIORITY_RANKS = {
+        'low': 1,
+        'medium': 2,
+        'high': 3,
+        'critical': 4,
+    }
+    
     # Basic info
     subject = models.CharField(max_length=300)
     description = models.TextField(blank=True)
     request_type = models.CharField(max_length=20, choices=REQUEST_TYPE_CHOICES, default='corrective')
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='medium')
+    priority_rank = models.PositiveSmallIntegerField(default=2, editable=False)
     
     # Related entities
     equipment = models.ForeignKey(
@@ -198,9 +342,88 @@ class MaintenanceRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MaintenanceRequestQuerySet.as_manager()
+    
+    OPEN_STAGES = ['new', 'in_progress']
+    
+    # Tracked state as last read from / written to the database
+    _loaded_state = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = instance.get_tracked_state()
+        return instance
+    
     def __str__(self):
         return f"{self.subject} - {self.equipment.name}"
     
+    def get_tracked_state(self):
+        """Snapshot of the fields that feed denormalized equipment data"""
+        # Read from __dict__ so deferred fields don't trigger a query
+        return {
+            'equipment_id': self.__dict__.get('equipment_id'),
+            'maintenance_team_id': self.__dict__.get('maintenance_team_id'),
+            'stage': self.__dict__.get('stage'),
+            'priority': self.__dict__.get('priority'),
+            'created_at': self.__dict__.get('created_at'),
+        }
+    
+    @classmethod
+    def apply_state_change(cls, before, after):
+        """
+        Apply the counter, bucket and summary deltas for a request moving from
+        state `before` to `after`. `before` is None for a new request, `after`
+        is None for a deleted one.
+        """
+        cls.apply_state_changes([(before, after)])
+    
+    @classmethod
+    def apply_state_changes(cls, changes):
+        """Apply a batch of (before, after) state changes with grouped writes"""
+        deltas = {}
+        bucket_deltas = {}
+        summary_deltas = {}
+        categories = dict(
+            Equipment.objects.filter(pk__in={
+                state['equipment_id'] for change in changes for state in change
+                if state and state['equipment_id']
+            }).values_list('pk', 'category')
+        )
+        recent_since = Equipment.health_window_start()
+        for before, after in changes:
+            for state, sign in ((before, -1), (after, 1)):
+                if not state or not state['equipment_id']:
+                    continue
+                open_delta, recent_delta = deltas.get(state['equipment_id'], (0, 0))
+                if state['stage'] in cls.OPEN_STAGES:
+                    open_delta += sign
+                if state['created_at']:
+                    day = timezone.localdate(state['created_at'])
+                    if day >= recent_since:
+                        recent_delta += sign
+                    key = (state['equipment_id'], day)
+                    bucket_deltas[key] = bucket_deltas.get(key, 0) + sign
+                    key = (
+                        state['maintenance_team_id'], categories.get(state['equipment_id']),
+                        state['priority'], state['stage'], day.replace(day=1),
+                    )
+                    summary_deltas[key] = summary_deltas.get(key, 0) + sign
+                deltas[state['equipment_id']] = (open_delta, recent_delta)
+        
+        # One UPDATE per distinct pair of deltas rather than per equipment
+        by_delta = {}
+        for equipment_id, equipment_deltas in deltas.items():
+            if any(equipment_deltas):
+                by_delta.setdefault(equipment_deltas, []).append(equipment_id)
+        for (open_delta, recent_delta), equipment_ids in by_delta.items():
+            Equipment.objects.filter(pk__in=equipment_ids).update(
+                open_requests_count=Greatest(F('open_requests_count') + open_delta, 0),
+                recent_requests_count=Greatest(F('recent_requests_count') + recent_delta, 0),
+            )
+        EquipmentRequestBucket.bump_many(bucket_deltas)
+        RequestSummary.bump_many({key: delta for key, delta in summary_deltas.items() if key[1]})
+    
     def is_overdue(self):
         """Check if request is overdue"""
         if self.stage in ['repaired', 'scrap']:
@@ -211,43 +434,377 @@ class MaintenanceRequest(models.Model):
     
     def save(self, *args, **kwargs):
         # Auto-fill logic: populate team from equipment
-        if self.equipment and not self.maintenance_team:
-            self.maintenance_team = self.equipment.maintenance_team
+        if self.equipment_id and not self.maintenance_team_id:
+            self.maintenance_team_id = self.equipment.maintenance_team_id
+        
+        # Keep the integer sort rank in step with the priority
+        self.priority_rank = self.PRIORITY_RANKS.get(self.priority, 0)
         
         # Mark completion date when moved to repaired
         if self.stage == 'repaired' and not self.completed_date:
             self.completed_date = timezone.now()
         
-        # Handle scrap logic
-        if self.stage == 'scrap' and not self.equipment.is_scrapped:
-            self.equipment.is_scrapped = True
-            self.equipment.scrapped_date = timezone.now()
-            self.equipment.save()
-        
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            # Handle scrap logic: a conditional UPDATE, without loading the
+            # equipment or going through Equipment.save() and its signals
+            if self.stage == 'scrap':
+                now = timezone.now()
+                scrapped = Equipment.objects.filter(pk=self.equipment_id, is_scrapped=False).update(
+                    is_scrapped=True, scrapped_date=now, updated_at=now
+                )
+                if scrapped and MaintenanceRequest.equipment.is_cached(self):
+                    self.equipment.is_scrapped = True
+                    self.equipment.scrapped_date = now
+            
+            new_state = self.get_tracked_state()
+            if new_state != self._loaded_state:
+                self.apply_state_change(self._loaded_state, new_state)
+        self._loaded_state = new_state
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['stage', 'scheduled_date']),
             models.Index(fields=['equipment', 'stage']),
+            models.Index(fields=['maintenance_team', 'stage', 'priority_rank', 'created_at']),
+            models.Index(fields=['request_type', 'scheduled_date']),
+            models.Index(fields=['equipment', 'scheduled_date', 'request_type']),
+            # Partial indexes covering only open requests, which stay a small
+            # slice of the table; queries must filter on stage__in=OPEN_STAGES
+            models.Index(fields=['equipment'], condition=OPEN_REQUESTS, name='gearguard_open_equipment_idx'),
+            models.Index(fields=['maintenance_team'], condition=OPEN_REQUESTS, name='gearguard_open_team_idx'),
+            models.Index(fields=['assigned_to'], condition=OPEN_REQUESTS, name='gearguard_open_assignee_idx'),
+            models.Index(fields=['scheduled_date'], condition=OPEN_REQUESTS, name='gearguard_open_schedule_idx'),
+        ]
+
+
+class EquipmentRequestBucket(models.Model):
+    """Daily count of maintenance requests raised against each equipment"""
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='request_buckets'
+    )
+    day = models.DateField()
+    request_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['equipment', 'day']
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day', 'equipment']),
         ]
+    
+    def __str__(self):
+        return f"{self.equipment_id} @ {self.day}: {self.request_count}"
+    
+    @classmethod
+    def bump(cls, equipment_id, day, delta):
+        """Atomically add `delta` to a bucket, creating it on first use"""
+        bucket = cls.objects.filter(equipment_id=equipment_id, day=day)
+        if bucket.update(request_count=Greatest(F('request_count') + delta, 0)) or delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(equipment_id=equipment_id, day=day, request_count=delta)
+        except IntegrityError:
+            # Lost the race to create it; the row exists now
+            bucket.update(request_count=F('request_count') + delta)
+    
+    @classmethod
+    def bump_many(cls, deltas):
+        """Apply {(equipment_id, day): delta}, upserting all increments in one statement"""
+        increments = [(*key, delta) for key, delta in deltas.items() if delta > 0]
+        upsert_increments(cls, ['equipment', 'day'], increments)
+        for (equipment_id, day), delta in deltas.items():
+            if delta < 0:
+                cls.bump(equipment_id, day, delta)
+
 
+class RequestSummary(models.Model):
+    """Pre-aggregated request counts per (team, category, priority, stage, month)"""
+    team = models.ForeignKey(
+        MaintenanceTeam,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='request_summaries'
+    )
+    category = models.CharField(max_length=50, choices=Equipment.CATEGORY_CHOICES)
+    priority = models.CharField(max_length=20, choices=MaintenanceRequest.PRIORITY_CHOICES)
+    stage = models.CharField(max_length=20, choices=MaintenanceRequest.STAGE_CHOICES)
+    month = models.DateField(help_text="First day of the month the requests were created in")
+    request_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['team', 'category', 'priority', 'stage', 'month']
+        ordering = ['-month']
+        indexes = [
+            models.Index(fields=['month', 'team']),
+        ]
+        constraints = [
+            # NULLs never collide in unique_together, so cells without a team need their own
+            models.UniqueConstraint(
+                fields=['category', 'priority', 'stage', 'month'],
+                condition=models.Q(team__isnull=True),
+                name='gearguard_summary_no_team_uniq',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.team_id}/{self.category}/{self.priority}/{self.stage} {self.month:%Y-%m}: {self.request_count}"
+    
+    @classmethod
+    def bump(cls, team_id, category, priority, stage, month, delta):
+        """Atomically add `delta` to a cell, creating it on first use"""
+        cell = cls.objects.filter(team_id=team_id, category=category, priority=priority, stage=stage, month=month)
+        if cell.update(request_count=Greatest(F('request_count') + delta, 0)) or delta < 0:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    team_id=team_id, category=category, priority=priority,
+                    stage=stage, month=month, request_count=delta,
+                )
+        except IntegrityError:
+            # Lost the race to create it; the row exists now
+            cell.update(request_count=F('request_count') + delta)
+    
+    @classmethod
+    def bump_many(cls, deltas):
+        """Apply {(team_id, category, priority, stage, month): delta} in as few statements as possible"""
+        increments = [(*key, delta) for key, delta in deltas.items() if delta > 0 and key[0] is not None]
+        upsert_increments(cls, ['team', 'category', 'priority', 'stage', 'month'], increments)
+        # Cells without a team conflict on their partial unique index instead
+        increments = [(*key[1:], delta) for key, delta in deltas.items() if delta > 0 and key[0] is None]
+        team_column = connections['default'].ops.quote_name(cls._meta.get_field('team').column)
+        upsert_increments(cls, ['category', 'priority', 'stage', 'month'], increments, where=f'{team_column} IS NULL')
+        for key, delta in deltas.items():
+            if delta < 0:
+                cls.bump(*key, delta)
+    
+    @classmethod
+    def release_team(cls, team_id):
+        """Fold a team's cells into the cells without a team, before the team is deleted"""
+        cells = cls.objects.filter(team_id=team_id)
+        for category, priority, stage, month, total in cells.values_list(
+            'category', 'priority', 'stage', 'month', 'request_count'
+        ):
+            if total:
+                cls.bump(None, category, priority, stage, month, total)
+        cells.delete()
+    
+    @classmethod
+    def move_category(cls, equipment_id, old_category, new_category):
+        """Re-file an equipment's requests after its category changes"""
+        rows = (
+            MaintenanceRequest.objects.filter(equipment_id=equipment_id)
+            .order_by()
+            .annotate(month=TruncMonth('created_at', output_field=models.DateField()))
+            .values_list('maintenance_team_id', 'priority', 'stage', 'month')
+            .annotate(total=Count('id'))
+        )
+        for team_id, priority, stage, month, total in rows:
+            cls.bump(team_id, old_category, priority, stage, month, -total)
+            cls.bump(team_id, new_category, priority, stage, month, total)
 
-class MaintenanceLog(models.Model):
+
+class LogEntry(models.Model):
+    """
+    Fields shared by the live activity log and its monthly archive tables
+    (see archive.py). Entries are append-only: what happened is an action
+    code, plus the stages a request moved between; notes only carry what
+    doesn't fit those columns.
+    """
+    CREATED = 1
+    UPDATED = 2
+    STAGE_CHANGED = 3
+    REASSIGNED = 4
+    OTHER = 9
+    ACTION_CHOICES = [
+        (CREATED, 'Request created'),
+        (UPDATED, 'Request updated'),
+        (STAGE_CHANGED, 'Stage changed'),
+        (REASSIGNED, 'Reassigned'),
+        (OTHER, 'Other'),
+    ]
+    
+    action_code = models.PositiveSmallIntegerField(choices=ACTION_CHOICES)
+    from_stage = models.CharField(max_length=20, choices=MaintenanceRequest.STAGE_CHOICES, blank=True)
+    to_stage = models.CharField(max_length=20, choices=MaintenanceRequest.STAGE_CHOICES, blank=True)
+    notes = models.TextField(blank=True)
+    # Not auto_now_add: logs written by a background task keep the time of the change
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    
+    class Meta:
+        abstract = True
+        ordering = ['-timestamp', '-id']
+    
+    @property
+    def action(self):
+        return self.get_action_code_display()
+    
+    @property
+    def details(self):
+        """Human-readable description of the change"""
+        parts = []
+        if self.from_stage or self.to_stage:
+            parts.append(f"From {self.get_from_stage_display() or '-'} to {self.get_to_stage_display() or '-'}")
+        if self.notes:
+            parts.append(self.notes)
+        return ', '.join(parts)
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Log entries are append-only')
+        super().save(*args, **kwargs)
+
+
+class MaintenanceLog(LogEntry):
     """Log entries for maintenance activities"""
+    # Indexed by the leading column of the (request, timestamp, id) index
     request = models.ForeignKey(
         MaintenanceRequest,
         on_delete=models.CASCADE,
-        related_name='logs'
+        related_name='logs',
+        db_index=False
+    )
+    # Copied from the request when the entry is written, for the equipment timeline
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='logs',
+        null=True,
+        db_index=False
     )
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
-    action = models.CharField(max_length=100)
-    notes = models.TextField(blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    
+    class Meta(LogEntry.Meta):
+        indexes = [
+            # A request's history, newest first, without sorting; also
+            # the (timestamp, id) keyset for paging through it
+            models.Index(fields=['request', 'timestamp', 'id'], name='gearguard_log_request_time_idx'),
+            # The same across all of an equipment's requests
+            models.Index(fields=['equipment', 'timestamp', 'id'], name='gearguard_log_equip_time_idx'),
+            # Month ranges for archiving
+            models.Index(fields=['timestamp'], name='gearguard_log_time_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} - {self.request.subject}"
+
+
+class MaintenanceSchedule(models.Model):
+    """Recurrence rule that generates preventive requests for one equipment"""
+    FREQUENCY_CHOICES = [
+        ('days', 'Every N days'),
+        ('months', 'Every N months on a day of the month'),
+    ]
+    
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='schedules'
+    )
+    subject = models.CharField(max_length=300)
+    description = models.TextField(blank=True)
+    priority = models.CharField(max_length=20, choices=MaintenanceRequest.PRIORITY_CHOICES, default='medium')
+    assigned_to = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text="Defaults to the equipment's technician"
+    )
+    
+    # Recurrence
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='days')
+    interval = models.PositiveIntegerField(default=90, help_text="Days or months between occurrences")
+    day_of_month = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        help_text="Monthly schedules only; clamped to the last day of shorter months"
+    )
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    
+    # Last occurrence already expanded into requests
+    generated_until = models.DateField(null=True, blank=True, editable=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['equipment', 'start_date']
+        indexes = [
+            models.Index(fields=['is_active', 'generated_until']),
+        ]
+    
+    def __str__(self):
+        return f"{self.subject} - {self.equipment_id} ({self.get_frequency_display()} x{self.interval})"
+    
+    def occurrences(self, start, end):
+        """Scheduled dates from `start` to `end` inclusive"""
+        start = max(start, self.start_date)
+        if self.end_date:
+            end = min(end, self.end_date)
+        interval = max(self.interval, 1)
+        
+        if self.frequency == 'days':
+            # Step from the anchor straight to the first occurrence on or after `start`
+            steps = -(-(start - self.start_date).days // interval)
+            day = self.start_date + datetime.timedelta(days=steps * interval)
+            while day <= end:
+                yield day
+                day += datetime.timedelta(days=interval)
+            return
+        
+        day_of_month = self.day_of_month or self.start_date.day
+        index = self.start_date.year * 12 + self.start_date.month - 1
+        while True:
+            year, month = divmod(index, 12)
+            last_day = calendar.monthrange(year, month + 1)[1]
+            day = datetime.date(year, month + 1, min(day_of_month, last_day))
+            if day > end:
+                return
+            if day >= start:
+                yield day
+            index += interval
+
+
+class Task(models.Model):
+    """A deferred side effect, run by the run_worker command (see tasks.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    
+    # Claim token of the worker running the task, and when it took it
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
-        ordering = ['-timestamp']
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['locked_by']),
+        ]
     
     def __str__(self):
-        return f"{self.action} - {self.request.subject}"
\ No newline at end of file
+        return f"{self.name} ({self.status}, attempt {self.attempts}/{self.max_attempts})"
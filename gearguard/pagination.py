@@ -0,0 +1,101 @@
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+COUNT_CACHE_TIMEOUT = 60
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset"""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Decode a cursor token, returning None if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    if not all(isinstance(v, (str, int, float)) for v in values):
+        return None
+    if any(isinstance(v, int) and not -2 ** 63 <= v < 2 ** 63 for v in values):
+        return None
+    return values
+
+
+def after(ordering, values):
+    """Q selecting rows strictly after `values` in `ordering`"""
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def keyset_page(queryset, ordering, cursor=None, page_size=50):
+    """
+    Return the page of `queryset` that follows `cursor` in `ordering`.
+    The last ordering field must be unique (normally the primary key) and
+    none of them may be nullable. An invalid cursor restarts from the top.
+    """
+    queryset = queryset.order_by(*ordering)
+    values = decode_cursor(cursor, len(ordering)) if cursor else None
+    if values is not None:
+        try:
+            queryset = queryset.filter(after(ordering, values))
+        except (ValidationError, ValueError, TypeError):
+            # Values that don't fit the fields, e.g. from a tampered cursor
+            pass
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([_value(last, field.lstrip('-')) for field in ordering])
+    return KeysetPage(items, next_cursor)
+
+
+def _value(item, name):
+    if isinstance(item, dict):
+        return item[name]
+    return getattr(item, name)
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT):
+    """COUNT(*) for a queryset, cached briefly by its SQL"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = 'gearguard:count:' + hashlib.md5(f'{sql}|{params!r}'.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
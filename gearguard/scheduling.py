@@ -0,0 +1,106 @@
+"""
+Expansion of MaintenanceSchedule recurrence rules into preventive requests.
+
+Schedules are processed in batches. For each batch the already existing
+preventive requests in the window are read in one query, served by the
+(equipment, scheduled_date, request_type) index, and the missing
+occurrences are written with a single bulk_create(). Each schedule
+remembers how far it has been expanded, so a rerun only looks at new dates.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MaintenanceRequest, MaintenanceSchedule
+
+DEFAULT_HORIZON_DAYS = 365
+DEFAULT_BATCH_SIZE = 1000
+
+
+def generate_preventive_requests(horizon_days=DEFAULT_HORIZON_DAYS, today=None,
+                                 batch_size=DEFAULT_BATCH_SIZE, equipment_ids=None):
+    """
+    Create the preventive requests due from today up to `horizon_days` ahead.
+    Returns (created, skipped), where skipped counts occurrences that already
+    had a preventive request for the same equipment and date.
+    """
+    today = today or timezone.localdate()
+    horizon = today + timedelta(days=horizon_days)
+
+    schedules = (
+        MaintenanceSchedule.objects
+        .filter(is_active=True, start_date__lte=horizon, equipment__is_scrapped=False)
+        .exclude(generated_until__gte=horizon)
+        .exclude(end_date__lt=today)
+        .select_related('equipment')
+        .only(
+            'equipment_id', 'subject', 'description', 'priority', 'assigned_to_id',
+            'frequency', 'interval', 'day_of_month', 'start_date', 'end_date', 'generated_until',
+            'equipment__maintenance_team_id', 'equipment__default_technician_id',
+        )
+        .order_by('pk')
+    )
+    if equipment_ids is not None:
+        schedules = schedules.filter(equipment_id__in=list(equipment_ids))
+
+    created = skipped = 0
+    last_pk = 0
+    while True:
+        batch = list(schedules.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        batch_created, batch_skipped = _generate_batch(batch, today, horizon)
+        created += batch_created
+        skipped += batch_skipped
+    return created, skipped
+
+
+def _generate_batch(schedules, today, horizon):
+    # Dates to expand for each schedule, starting after what earlier runs covered
+    due = {}
+    for schedule in schedules:
+        start = today
+        if schedule.generated_until and schedule.generated_until >= today:
+            start = schedule.generated_until + timedelta(days=1)
+        due[schedule] = list(schedule.occurrences(start, horizon))
+
+    first = min((dates[0] for dates in due.values() if dates), default=None)
+    existing = set()
+    if first:
+        existing = set(
+            MaintenanceRequest.objects.filter(
+                equipment_id__in={schedule.equipment_id for schedule in schedules},
+                scheduled_date__gte=first,
+                scheduled_date__lte=horizon,
+                request_type='preventive',
+            ).order_by().values_list('equipment_id', 'scheduled_date')
+        )
+
+    requests = []
+    skipped = 0
+    for schedule, dates in due.items():
+        equipment = schedule.equipment
+        for day in dates:
+            if (schedule.equipment_id, day) in existing:
+                skipped += 1
+                continue
+            existing.add((schedule.equipment_id, day))
+            requests.append(MaintenanceRequest(
+                subject=schedule.subject,
+                description=schedule.description,
+                request_type='preventive',
+                priority=schedule.priority,
+                equipment_id=schedule.equipment_id,
+                maintenance_team_id=equipment.maintenance_team_id,
+                assigned_to_id=schedule.assigned_to_id or equipment.default_technician_id,
+                scheduled_date=day,
+            ))
+
+    with transaction.atomic():
+        MaintenanceRequest.objects.bulk_create(requests, batch_size=DEFAULT_BATCH_SIZE)
+        MaintenanceSchedule.objects.filter(pk__in=[schedule.pk for schedule in schedules]).update(
+            generated_until=horizon
+        )
+    return len(requests), skipped
@@ -0,0 +1,175 @@
+"""
+Full-text search over equipment and maintenance requests.
+
+On SQLite the documents live in an FTS5 table. Each document's rowid encodes
+both the kind and the object id (``id * 2 + kind``), so updates and deletes
+go through the rowid b-tree and never scan the index. Other database engines
+fall back to ``istartswith`` lookups, the same prefix match FTS5 does, which
+PostgreSQL serves from the pattern indexes of migration 0015.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+
+from .models import Equipment, MaintenanceRequest
+
+TABLE = 'gearguard_search_index'
+
+EQUIPMENT = 0
+REQUEST = 1
+KINDS = {'equipment': EQUIPMENT, 'request': REQUEST}
+
+# Source columns for each kind: (table, title column, body expression)
+SOURCES = {
+    EQUIPMENT: ('gearguard_equipment', 'name', "serial_number || ' ' || location"),
+    REQUEST: ('gearguard_maintenancerequest', 'subject', 'description'),
+}
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def create_table(cursor):
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        "title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+
+
+def drop_table(cursor):
+    cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def build_match(query):
+    """Turn free text into an FTS5 query: every term must match, as a prefix"""
+    terms = re.findall(r'\w+', query or '')
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _rowid(kind, object_id):
+    return object_id * 2 + kind
+
+
+def index_equipment(equipment_list):
+    _index(EQUIPMENT, [
+        (item.pk, item.name, f'{item.serial_number} {item.location}')
+        for item in equipment_list
+    ])
+
+
+def index_requests(requests):
+    _index(REQUEST, [
+        (item.pk, item.subject, item.description)
+        for item in requests
+    ])
+
+
+def _index(kind, documents):
+    if not is_available() or not documents:
+        return
+    rows = [(_rowid(kind, object_id), title, body) for object_id, title, body in documents]
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(f'INSERT INTO {TABLE} (rowid, title, body) VALUES (%s, %s, %s)', rows)
+
+
+def remove(kind, object_ids):
+    if not is_available() or not object_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {TABLE} WHERE rowid = %s',
+            [(_rowid(kind, object_id),) for object_id in object_ids]
+        )
+
+
+def rebuild():
+    """Recreate the index from the source tables with INSERT ... SELECT"""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        drop_table(cursor)
+        create_table(cursor)
+        for kind, (source, title, body) in SOURCES.items():
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, title, body) '
+                f'SELECT id * 2 + {kind}, {title}, {body} FROM {source}'
+            )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+
+def matching_ids(kind, query):
+    """Subquery of object ids of one kind matching `query`, for use in pk__in"""
+    return RawSQL(
+        f'SELECT rowid / 2 FROM {TABLE} WHERE {TABLE} MATCH %s AND (rowid & 1) = {kind}',
+        [build_match(query)]
+    )
+
+
+def filter_equipment(queryset, query):
+    if is_available():
+        # FTS5 rejects an empty MATCH; a query without words filters nothing
+        if not build_match(query):
+            return queryset
+        return queryset.filter(pk__in=matching_ids(EQUIPMENT, query))
+    return queryset.filter(
+        Q(name__istartswith=query) |
+        Q(serial_number__istartswith=query) |
+        Q(location__istartswith=query)
+    )
+
+
+def search(query, kinds=None, limit=20):
+    """Ranked hits across equipment and requests as a list of dicts"""
+    kinds = [KINDS[name] for name in kinds] if kinds else list(KINDS.values())
+    match = build_match(query)
+    if not match:
+        return []
+    if not is_available():
+        return _fallback_search(query, kinds, limit)
+
+    kind_filter = '' if len(kinds) == len(KINDS) else f'AND (rowid & 1) = {kinds[0]}'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, title, snippet({TABLE}, 1, '', '', '…', 12) "
+            f'FROM {TABLE} WHERE {TABLE} MATCH %s {kind_filter} '
+            'ORDER BY rank LIMIT %s',
+            [match, limit]
+        )
+        rows = cursor.fetchall()
+    return [_hit(rowid & 1, rowid // 2, title, snippet) for rowid, title, snippet in rows]
+
+
+def _fallback_search(query, kinds, limit):
+    hits = []
+    if EQUIPMENT in kinds:
+        equipment = filter_equipment(Equipment.objects.all(), query)[:limit]
+        hits += [_hit(EQUIPMENT, item.pk, item.name, item.location) for item in equipment]
+    if REQUEST in kinds:
+        requests = MaintenanceRequest.objects.filter(
+            Q(subject__icontains=query) | Q(description__icontains=query)
+        ).only('pk', 'subject', 'description')[:limit]
+        hits += [_hit(REQUEST, item.pk, item.subject, item.description[:80]) for item in requests]
+    return hits[:limit]
+
+
+def _hit(kind, object_id, title, snippet):
+    if kind == EQUIPMENT:
+        return {
+            'type': 'equipment',
+            'id': object_id,
+            'title': title,
+            'snippet': snippet,
+            'url': reverse('gearguard:equipment_detail', args=[object_id]),
+        }
+    return {
+        'type': 'request',
+        'id': object_id,
+        'title': title,
+        'snippet': snippet,
+        'url': reverse('gearguard:request_update', args=[object_id]),
+    }
@@ -0,0 +1,130 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import caching, events, search, tasks
+from .models import Equipment, MaintenanceRequest, MaintenanceTeam, RequestSummary, TeamMember, bulk_created
+
+
+# Counters, buckets and the reporting summary. Cascades (deleting an
+# equipment) and queryset deletes never call MaintenanceRequest.delete(),
+# so removals are accounted for here, inside the deletion's transaction
+
+@receiver(post_delete, sender=MaintenanceRequest)
+def uncount_request(sender, instance, **kwargs):
+    MaintenanceRequest.apply_state_change(instance._loaded_state or instance.get_tracked_state(), None)
+
+
+@receiver(pre_delete, sender=MaintenanceTeam)
+def release_team_summary(sender, instance, **kwargs):
+    # The team's requests lose their team (SET_NULL) without being saved
+    RequestSummary.release_team(instance.pk)
+
+
+# Search documents of a saved or deleted row are written inline, inside the
+# save's transaction, so the row is searchable as soon as it commits. Only
+# bulk_create batches are (re)built by a background task
+
+REINDEX_CHUNK = 1000
+
+
+def reindex(kind, instances):
+    ids = [instance.pk for instance in instances]
+    for start in range(0, len(ids), REINDEX_CHUNK):
+        tasks.enqueue('reindex', kind, ids[start:start + REINDEX_CHUNK])
+
+
+@receiver(post_save, sender=Equipment)
+def index_equipment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_equipment([instance])
+
+
+@receiver(post_delete, sender=Equipment)
+def unindex_equipment(sender, instance, **kwargs):
+    search.remove(search.EQUIPMENT, [instance.pk])
+
+
+@receiver(post_save, sender=MaintenanceRequest)
+def index_request(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_requests([instance])
+
+
+@receiver(post_delete, sender=MaintenanceRequest)
+def unindex_request(sender, instance, **kwargs):
+    search.remove(search.REQUEST, [instance.pk])
+
+
+@receiver(bulk_created, sender=Equipment)
+def index_bulk_equipment(sender, instances, **kwargs):
+    reindex('equipment', instances)
+
+
+@receiver(bulk_created, sender=MaintenanceRequest)
+def index_bulk_requests(sender, instances, **kwargs):
+    reindex('request', instances)
+
+
+# Cache invalidation
+
+@receiver(pre_save, sender=MaintenanceRequest)
+def invalidate_previous_team(sender, instance, raw=False, **kwargs):
+    # A request moving to another team also changes what the old team sees
+    previous = instance._loaded_state
+    if not raw and previous and previous['maintenance_team_id'] != instance.maintenance_team_id:
+        caching.bump_on_commit([previous['maintenance_team_id']])
+
+
+@receiver(post_save, sender=MaintenanceRequest)
+@receiver(post_delete, sender=MaintenanceRequest)
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def invalidate_team(sender, instance, **kwargs):
+    caching.bump_on_commit([instance.maintenance_team_id])
+
+
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def invalidate_member_team(sender, instance, **kwargs):
+    caching.bump_on_commit([instance.team_id], scopes=[caching.TECHNICIANS])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_technicians(sender, instance, **kwargs):
+    # Technician choices are labelled with the username; logins save the
+    # user too, so leave the global fragments alone
+    caching.bump_on_commit(scopes=[caching.TECHNICIANS], include_global=False)
+
+
+@receiver(post_save, sender=MaintenanceTeam)
+@receiver(post_delete, sender=MaintenanceTeam)
+def invalidate_maintenance_team(sender, instance, **kwargs):
+    caching.bump_on_commit([instance.pk])
+
+
+@receiver(bulk_created)
+def invalidate_bulk(sender, instances, **kwargs):
+    caching.bump_on_commit({getattr(instance, 'maintenance_team_id', None) for instance in instances})
+
+
+# Live Kanban updates
+
+@receiver(post_save, sender=MaintenanceRequest)
+def publish_request_change(sender, instance, raw=False, **kwargs):
+    # Runs inside save(), before the loaded state is replaced
+    if raw:
+        return
+    previous = instance._loaded_state or {}
+    events.publish_card_on_commit(instance.pk, previous.get('stage'), previous.get('maintenance_team_id'))
+
+
+@receiver(post_delete, sender=MaintenanceRequest)
+def publish_request_delete(sender, instance, **kwargs):
+    events.publish_card_on_commit(instance.pk, instance.stage, instance.maintenance_team_id)
+
+
+@receiver(bulk_created, sender=MaintenanceRequest)
+def publish_bulk_requests(sender, instances, **kwargs):
+    events.publish_reset_on_commit({instance.maintenance_team_id for instance in instances})
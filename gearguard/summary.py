@@ -0,0 +1,30 @@
+from django.db import models, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from .models import MaintenanceRequest, RequestSummary
+
+
+def summary_rows(requests=None):
+    """GROUP BY the request table into RequestSummary cells"""
+    requests = MaintenanceRequest.objects.all() if requests is None else requests
+    return (
+        requests.order_by()
+        .annotate(month=TruncMonth('created_at', output_field=models.DateField()))
+        .values_list('maintenance_team_id', 'equipment__category', 'priority', 'stage', 'month')
+        .annotate(total=Count('id'))
+    )
+
+
+def rebuild_summary():
+    """Replace the whole reporting summary with a fresh aggregate"""
+    cells = [
+        RequestSummary(
+            team_id=team_id, category=category, priority=priority,
+            stage=stage, month=month, request_count=total,
+        )
+        for team_id, category, priority, stage, month, total in summary_rows()
+    ]
+    with transaction.atomic():
+        RequestSummary.objects.all().delete()
+        RequestSummary.objects.bulk_create(cells, batch_size=1000)
+    return len(cells)
@@ -0,0 +1,250 @@
+"""
+Database-backed background tasks.
+
+Side effects that don't have to finish before the user gets a response
+(activity logs, notification emails, search indexing) are queued as Task
+rows with enqueue(). The row is written in the caller's transaction, so a
+task exists exactly when the change that caused it was committed, and no
+broker is needed: ``python manage.py run_worker`` claims due tasks, runs
+them and deletes them, or schedules a retry with exponential backoff until
+the task runs out of attempts and is left as failed for inspection.
+
+A task's database writes and its removal from the queue commit together,
+but a worker can still die between sending an email and committing, so
+tasks must be safe to run twice. With settings.TASKS_EAGER, tasks run in
+the calling process once its transaction commits instead.
+"""
+import json
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import search
+from .counters import refresh_equipment_counters
+from .models import Equipment, MaintenanceLog, MaintenanceRequest, Task
+
+MAX_ATTEMPTS = getattr(settings, 'TASK_MAX_ATTEMPTS', 5)
+RETRY_DELAY = getattr(settings, 'TASK_RETRY_DELAY', 10)
+MAX_RETRY_DELAY = getattr(settings, 'TASK_MAX_RETRY_DELAY', 3600)
+ERROR_LENGTH = 4000
+
+PENDING = 'pending'
+RUNNING = 'running'
+FAILED = 'failed'
+
+logger = logging.getLogger(__name__)
+
+# Task name -> function
+REGISTRY = {}
+
+
+def task(name=None, max_attempts=MAX_ATTEMPTS):
+    """Register a function as a task under `name` (default: the function name)"""
+    def register(func):
+        func.task_name = name or func.__name__
+        func.max_attempts = max_attempts
+        REGISTRY[func.task_name] = func
+        return func
+    return register
+
+
+def enqueue(name, *args, **kwargs):
+    """
+    Run task `name` with the given arguments after the current transaction
+    commits. Arguments are stored as JSON; dates and datetimes come back to
+    the task as ISO strings.
+    """
+    func = REGISTRY[name]
+    args, kwargs = json.loads(json.dumps([args, kwargs], cls=DjangoJSONEncoder))
+    if getattr(settings, 'TASKS_EAGER', False):
+        transaction.on_commit(lambda: _run_eager(func, args, kwargs))
+        return None
+    return Task.objects.create(name=name, args=args, kwargs=kwargs, max_attempts=func.max_attempts)
+
+
+def _run_eager(func, args, kwargs):
+    try:
+        with transaction.atomic():
+            func(*args, **kwargs)
+    except Exception:
+        # The response has already been decided; don't fail it over a side effect
+        logger.exception('Task %s failed', func.task_name)
+
+
+def claim(worker, limit=1):
+    """Mark up to `limit` due tasks as running for `worker` and return them"""
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:12]}'
+    due = Task.objects.filter(status=PENDING, run_after__lte=now).order_by('run_after', 'pk')
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent workers pass over each other's rows instead of waiting
+            ids = list(due.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+        else:
+            # SQLite: one UPDATE takes the write lock up front, and the status
+            # condition keeps two workers from claiming the same row
+            ids = due.values('pk')[:limit]
+        claimed = Task.objects.filter(pk__in=ids, status=PENDING).update(
+            status=RUNNING, locked_by=token, locked_at=now, attempts=F('attempts') + 1,
+        )
+    if not claimed:
+        return []
+    return list(Task.objects.filter(locked_by=token))
+
+
+def run(queued):
+    """Run a claimed task; returns 'done', 'retry' or 'failed'"""
+    func = REGISTRY.get(queued.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {queued.name!r}')
+        with transaction.atomic():
+            # Dequeue first: the write comes before any read, so on SQLite the
+            # transaction waits for the write lock up front rather than
+            # failing to upgrade a read lock; a failure rolls the delete back
+            Task.objects.filter(pk=queued.pk, locked_by=queued.locked_by).delete()
+            func(*queued.args, **queued.kwargs)
+    except Exception as exc:
+        return _fail(queued, exc)
+    return 'done'
+
+
+def _fail(queued, exc):
+    error = ''.join(traceback.format_exception(exc))[-ERROR_LENGTH:]
+    if queued.attempts >= queued.max_attempts:
+        logger.error('Task %s (%s) failed after %s attempts: %s', queued.pk, queued.name, queued.attempts, exc)
+        status, run_after = FAILED, queued.run_after
+    else:
+        delay = min(RETRY_DELAY * 2 ** (queued.attempts - 1), MAX_RETRY_DELAY)
+        logger.warning('Task %s (%s) failed, retrying in %ss: %s', queued.pk, queued.name, delay, exc)
+        status, run_after = PENDING, timezone.now() + timedelta(seconds=delay)
+    Task.objects.filter(pk=queued.pk, locked_by=queued.locked_by).update(
+        status=status, run_after=run_after, locked_by='', locked_at=None, last_error=error,
+    )
+    return 'failed' if status == FAILED else 'retry'
+
+
+def requeue_stale(timeout):
+    """Release tasks whose worker has held them for over `timeout` seconds, presumably dead"""
+    stale = Task.objects.filter(status=RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=timeout))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=FAILED, locked_by='', locked_at=None, last_error='Worker did not finish the task',
+    )
+    return failed + stale.update(status=PENDING, locked_by='', locked_at=None)
+
+
+def retry_failed(names=None):
+    """Give failed tasks a fresh set of attempts"""
+    failed = Task.objects.filter(status=FAILED)
+    if names:
+        failed = failed.filter(name__in=names)
+    return failed.update(status=PENDING, attempts=0, run_after=timezone.now())
+
+
+# Tasks
+
+def _write_log(request_id, user_id, action_code, timestamp, notes='', from_stage='', to_stage=''):
+    equipment_id = MaintenanceRequest.objects.filter(pk=request_id).values_list('equipment_id', flat=True).first()
+    if equipment_id is None:
+        # Deleted before the task ran, and its logs with it
+        return
+    if user_id and not User.objects.filter(pk=user_id).exists():
+        user_id = None
+    MaintenanceLog.objects.create(
+        request_id=request_id, equipment_id=equipment_id, user_id=user_id, action_code=action_code,
+        from_stage=from_stage, to_stage=to_stage, notes=notes,
+        timestamp=parse_datetime(timestamp) if timestamp else timezone.now(),
+    )
+
+
+def _notify(user_id, assignments):
+    """Email each assignee about the requests newly assigned to them, except self-assignments"""
+    assignments = {
+        request_id: assignee_id for request_id, assignee_id in assignments
+        if assignee_id and assignee_id != user_id
+    }
+    if not assignments:
+        return
+    requests = MaintenanceRequest.objects.select_related('equipment').in_bulk(assignments)
+    emails = dict(
+        User.objects.filter(pk__in=set(assignments.values())).exclude(email='').values_list('pk', 'email')
+    )
+    messages = []
+    for request_id, assignee_id in assignments.items():
+        request = requests.get(request_id)
+        # Skip requests deleted or reassigned again since
+        if request is None or request.assigned_to_id != assignee_id or assignee_id not in emails:
+            continue
+        lines = [
+            f'Equipment: {request.equipment}',
+            f'Priority: {request.get_priority_display()}',
+            f'Stage: {request.get_stage_display()}',
+        ]
+        if request.scheduled_date:
+            lines.append(f'Scheduled: {request.scheduled_date:%Y-%m-%d}')
+        if request.description:
+            lines += ['', request.description]
+        messages.append(EmailMessage(
+            f'[GearGuard] Request #{request.pk} assigned to you: {request.subject}',
+            '\n'.join(lines),
+            settings.DEFAULT_FROM_EMAIL,
+            [emails[assignee_id]],
+        ))
+    if messages:
+        get_connection().send_messages(messages)
+
+
+@task()
+def request_created(request_id, user_id, subject, assignee_id, timestamp):
+    _write_log(request_id, user_id, MaintenanceLog.CREATED, timestamp, notes=f'Initial request: {subject}')
+    _notify(user_id, [(request_id, assignee_id)])
+
+
+@task()
+def request_updated(request_id, user_id, timestamp, old_stage, new_stage, old_assignee_id, new_assignee_id):
+    if old_stage == new_stage:
+        old_stage = new_stage = ''
+    notes = ''
+    if old_assignee_id != new_assignee_id:
+        users = User.objects.in_bulk([old_assignee_id, new_assignee_id])
+        old_name, new_name = (
+            users[pk].get_full_name() if pk in users else 'Unassigned'
+            for pk in (old_assignee_id, new_assignee_id)
+        )
+        notes = f'Assigned: {old_name} → {new_name}'
+        _notify(user_id, [(request_id, new_assignee_id)])
+    if old_stage or notes:
+        _write_log(
+            request_id, user_id, MaintenanceLog.UPDATED, timestamp,
+            notes=notes, from_stage=old_stage, to_stage=new_stage,
+        )
+
+
+@task()
+def notify_assignments(user_id, assignments):
+    """`assignments` is a list of [request id, assignee id] pairs"""
+    _notify(user_id, assignments)
+
+
+@task()
+def reindex(kind, ids):
+    """Refresh the search documents of equipment or requests, by id"""
+    if kind == 'equipment':
+        search.index_equipment(Equipment.objects.filter(pk__in=ids).only('name', 'serial_number', 'location'))
+    else:
+        search.index_requests(MaintenanceRequest.objects.filter(pk__in=ids).only('subject', 'description'))
+
+
+@task()
+def refresh_counters(equipment_ids=None):
+    refresh_equipment_counters(equipment_ids)
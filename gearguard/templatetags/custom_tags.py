@@ -1,12 +1,13 @@
 from django import template
+from gearguard import caching
 from gearguard.models import Equipment, MaintenanceTeam
 
 register = template.Library()
 
 @register.simple_tag
 def get_equipment_count():
-    return Equipment.objects.count()
+    return caching.fragment('equipment_count', Equipment.objects.count)
 
 @register.simple_tag
 def get_teams_count():
-    return MaintenanceTeam.objects.count()
+    return caching.fragment('teams_count', MaintenanceTeam.objects.count)
@@ -1,3 +1,1507 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import threading
+from collections import Counter, deque
+from datetime import date, datetime, timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import re
+
+from core.metrics import registry
+from core.middleware import QueryBudgetExceeded
+
+from . import analytics, archive, caching, events, exports, health, importers, search, tasks, views
+from .counters import refresh_equipment_counters
+from .forms import technician_choices
+from .models import (
+    Equipment, EquipmentRequestBucket, MaintenanceLog, MaintenanceRequest, MaintenanceSchedule,
+    MaintenanceTeam, RequestSummary, Task, TeamMember,
+)
+from .pagination import encode_cursor, keyset_page
+from .scheduling import generate_preventive_requests
+from .summary import rebuild_summary, summary_rows
+from .transitions import TransitionConflict, apply_batch, transition_stage
+
+
+def create_fixtures(test):
+    """A team with a technician, two machines and a request in every stage"""
+    test.team = MaintenanceTeam.objects.create(name='Mechanics')
+    test.technician = User.objects.create_user('tina', 'tina@example.com', 'secret', first_name='Tina')
+    TeamMember.objects.create(team=test.team, user=test.technician)
+    test.manager = User.objects.create_superuser('max', 'max@example.com', 'secret')
+
+    test.equipment = Equipment.objects.create(
+        name='Press', serial_number='PR-1', category='machinery', department='production',
+        location='Bay 1', maintenance_team=test.team,
+    )
+    test.other_equipment = Equipment.objects.create(
+        name='Printer', serial_number='PT-1', category='printer', department='it',
+        location='Office', maintenance_team=test.team,
+    )
+    test.requests = {
+        stage: MaintenanceRequest.objects.create(
+            subject=f'{stage} job', equipment=test.equipment, stage=stage, priority='high',
+            request_type='preventive', scheduled_date=timezone.localdate() + timedelta(days=3),
+            assigned_to=test.technician, created_by=test.manager,
+        )
+        for stage in ('new', 'in_progress', 'repaired', 'scrap')
+    }
+    for index in range(3):
+        MaintenanceLog.objects.create(
+            request=test.requests['new'], equipment=test.equipment, user=test.manager,
+            action_code=MaintenanceLog.UPDATED, notes=f'Edit {index}',
+        )
+
+
+def request_data(equipment, **changes):
+    data = {
+        'equipment': equipment.pk,
+        'request_type': 'corrective',
+        'subject': 'Leaking valve',
+        'description': 'Oil under the press',
+        'priority': 'medium',
+        'stage': 'new',
+        'maintenance_team': equipment.maintenance_team_id,
+        'assigned_to': '',
+        'scheduled_date': '',
+    }
+    data.update(changes)
+    return data
+
+
+class EquipmentCounterTests(TestCase):
+    """Open and recent request counters kept on Equipment by every kind of write"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def assertCounters(self, equipment, open_requests, recent_requests):
+        equipment.refresh_from_db()
+        self.assertEqual(
+            (equipment.open_requests_count, equipment.recent_requests_count), (open_requests, recent_requests)
+        )
+        # Nothing for a full recount to correct
+        self.assertEqual(refresh_equipment_counters(), 0)
+
+    def test_fixtures(self):
+        self.assertCounters(self.equipment, 2, 4)
+        self.assertCounters(self.other_equipment, 0, 0)
+
+    def test_stage_changes(self):
+        transition_stage(self.requests['new'].pk, 'new', 'repaired', self.technician)
+        self.assertCounters(self.equipment, 1, 4)
+
+        request = MaintenanceRequest.objects.get(pk=self.requests['scrap'].pk)
+        request.stage = 'new'
+        request.save()
+        self.assertCounters(self.equipment, 2, 4)
+
+    def test_move_to_other_equipment(self):
+        request = MaintenanceRequest.objects.get(pk=self.requests['in_progress'].pk)
+        request.equipment = self.other_equipment
+        request.save()
+        self.assertCounters(self.equipment, 1, 3)
+        self.assertCounters(self.other_equipment, 1, 1)
+
+    def test_bulk_create(self):
+        MaintenanceRequest.objects.bulk_create([
+            MaintenanceRequest(subject=f'Bulk {index}', equipment=self.other_equipment) for index in range(3)
+        ])
+        self.assertCounters(self.other_equipment, 3, 3)
+
+    def test_deletes(self):
+        self.requests['new'].delete()
+        self.assertCounters(self.equipment, 1, 3)
+        MaintenanceRequest.objects.filter(stage='in_progress').delete()
+        self.assertCounters(self.equipment, 0, 2)
+
+    def test_refresh_repairs_drift(self):
+        Equipment.objects.filter(pk=self.equipment.pk).update(open_requests_count=9, recent_requests_count=0)
+        self.assertEqual(refresh_equipment_counters(), 1)
+        self.assertCounters(self.equipment, 2, 4)
+
+
+class HealthTests(TestCase):
+    """Daily request buckets and the rolling-window health scores read from them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def assertBucketsMatchRequests(self):
+        buckets = {
+            (equipment_id, day): total for equipment_id, day, total in
+            EquipmentRequestBucket.objects.filter(request_count__gt=0).values_list('equipment_id', 'day', 'request_count')
+        }
+        expected = Counter(
+            (equipment_id, timezone.localdate(created_at)) for equipment_id, created_at in
+            MaintenanceRequest.objects.values_list('equipment_id', 'created_at')
+        )
+        self.assertEqual(buckets, dict(expected))
+
+    def test_buckets_follow_writes(self):
+        self.assertBucketsMatchRequests()
+        MaintenanceRequest.objects.create(subject='Another', equipment=self.other_equipment)
+        request = MaintenanceRequest.objects.get(pk=self.requests['new'].pk)
+        request.equipment = self.other_equipment
+        request.save()
+        self.requests['scrap'].delete()
+        self.assertBucketsMatchRequests()
+
+        EquipmentRequestBucket.objects.all().delete()
+        health.rebuild_buckets()
+        self.assertBucketsMatchRequests()
+
+    def test_windows(self):
+        today = timezone.localdate()
+        EquipmentRequestBucket.objects.all().delete()
+        for days_ago in (0, 10, 60, 100):
+            EquipmentRequestBucket.objects.create(
+                equipment=self.equipment, day=today - timedelta(days=days_ago), request_count=1
+            )
+        scores = health.scores_for([self.equipment.pk, self.other_equipment.pk], today=today)
+        self.assertEqual(scores[self.equipment.pk], health.HealthScore(1, 2, 3))
+        self.assertEqual(scores[self.equipment.pk].score, 100 - 10 - 5 - 1)
+        self.assertEqual(scores[self.other_equipment.pk], health.HealthScore())
+
+        # A month later the same buckets have aged out of the shorter windows
+        later = health.scores_for([self.equipment.pk], today=today + timedelta(days=31))[self.equipment.pk]
+        self.assertEqual(later, health.HealthScore(0, 0, 2))
+
+    def test_status_ignores_stale_counter(self):
+        # Four requests today; a counter nothing has refreshed says otherwise
+        Equipment.objects.filter(pk=self.equipment.pk).update(recent_requests_count=0)
+        equipment = Equipment.objects.get(pk=self.equipment.pk)
+        self.assertEqual(equipment.get_health_status(), 'warning')
+
+        Equipment.objects.filter(pk=self.other_equipment.pk).update(recent_requests_count=9)
+        self.assertEqual(Equipment.objects.get(pk=self.other_equipment.pk).get_health_status(), 'good')
+
+    def test_critical_equipment(self):
+        # The fixtures' scrap request took the press out of service
+        MaintenanceRequest.objects.bulk_create([
+            MaintenanceRequest(subject=f'Bulk {index}', equipment=self.other_equipment) for index in range(5)
+        ])
+        critical = health.critical_equipment()
+        self.assertEqual([(item.pk, item.request_count) for item in critical], [(self.other_equipment.pk, 5)])
+        self.assertEqual(critical[0].get_health_status(), 'critical')
+
+
+class RequestSummaryTests(TestCase):
+    """The reporting summary against a GROUP BY of the request table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+        cls.unassigned = Equipment.objects.create(
+            name='Forklift', serial_number='FL-1', category='vehicle', department='logistics', location='Yard',
+        )
+
+    def assertSummaryMatchesRequests(self):
+        cells = RequestSummary.objects.filter(request_count__gt=0).values_list(
+            'team_id', 'category', 'priority', 'stage', 'month', 'request_count'
+        )
+        # One cell per key, including the cells without a team
+        self.assertEqual(len(cells), len({cell[:5] for cell in cells}))
+        self.assertEqual(
+            {cell[:5]: cell[5] for cell in cells},
+            {row[:5]: row[5] for row in summary_rows()},
+        )
+
+    def test_writes(self):
+        MaintenanceRequest.objects.create(subject='No team', equipment=self.unassigned, priority='low')
+        MaintenanceRequest.objects.bulk_create([
+            MaintenanceRequest(subject=f'Bulk {index}', equipment=self.unassigned, priority='low')
+            for index in range(3)
+        ])
+        self.assertSummaryMatchesRequests()
+
+        transition_stage(self.requests['new'].pk, 'new', 'in_progress', self.manager)
+        apply_batch([{'id': self.requests['in_progress'].pk, 'stage': 'repaired'}], self.manager)
+        request = MaintenanceRequest.objects.get(pk=self.requests['scrap'].pk)
+        request.equipment = self.other_equipment
+        request.priority = 'low'
+        request.save()
+        self.assertSummaryMatchesRequests()
+
+    def test_equipment_category_change(self):
+        self.other_equipment.category = 'computer'
+        self.other_equipment.save()
+        self.equipment.category = 'hvac'
+        self.equipment.save()
+        self.assertSummaryMatchesRequests()
+
+    def test_deletes(self):
+        self.requests['repaired'].delete()
+        self.assertSummaryMatchesRequests()
+        # Cascades never call delete() on the requests
+        self.equipment.delete()
+        self.assertSummaryMatchesRequests()
+
+    def test_team_delete(self):
+        # The team's cells fold into those without a team, next to the ones already there
+        MaintenanceRequest.objects.create(subject='No team', equipment=self.unassigned, priority='high')
+        MaintenanceRequest.objects.create(
+            subject='Team', equipment=self.unassigned, maintenance_team=self.team, priority='high'
+        )
+        self.team.delete()
+        self.assertSummaryMatchesRequests()
+        self.assertFalse(RequestSummary.objects.exclude(team=None).exists())
+
+    def test_rebuild_and_report(self):
+        RequestSummary.objects.update(request_count=0)
+        self.assertEqual(rebuild_summary(), len(summary_rows()))
+        self.assertSummaryMatchesRequests()
+
+        report = analytics.summary_report()
+        self.assertEqual(report['total_requests'], 4)
+        self.assertEqual(report['open_requests'], 2)
+        self.assertEqual(report['requests_by_category'], [{'category': 'Machinery', 'count': 4}])
+
+
+class MonthStepTests(SimpleTestCase):
+
+    def test_add_months(self):
+        self.assertEqual(analytics.add_months(date(2026, 1, 1), 1), date(2026, 2, 1))
+        self.assertEqual(analytics.add_months(date(2026, 12, 1), 1), date(2027, 1, 1))
+        self.assertEqual(analytics.add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(analytics.add_months(date(2026, 3, 1), -27), date(2023, 12, 1))
+        self.assertEqual(analytics.add_months(date(2026, 5, 31), 1), date(2026, 6, 1))
+
+    def test_month_range(self):
+        self.assertEqual(
+            analytics.month_range(date(2025, 11, 20), date(2026, 2, 3)),
+            [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)],
+        )
+        self.assertEqual(analytics.month_range(date(2026, 2, 10), date(2026, 2, 10)), [date(2026, 2, 1)])
+        self.assertEqual(analytics.month_range(date(2026, 3, 1), date(2026, 2, 28)), [])
+
+    def test_last_months(self):
+        self.assertEqual(
+            analytics.last_months(3, today=date(2026, 1, 15)),
+            [date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)],
+        )
+
+
+class ReportingApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+        cls.other_team = MaintenanceTeam.objects.create(name='Electricians')
+        cls.old = MaintenanceRequest.objects.create(
+            subject='Old job', equipment=cls.other_equipment, maintenance_team=cls.other_team, priority='low',
+        )
+        # Two months back, at noon so the local date is the same everywhere
+        cls.old_day = analytics.add_months(timezone.localdate().replace(day=1), -2).replace(day=10)
+        MaintenanceRequest.objects.filter(pk=cls.old.pk).update(
+            created_at=timezone.make_aware(timezone.datetime.combine(cls.old_day, timezone.datetime.min.time()))
+            + timedelta(hours=12)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def report(self, **params):
+        response = self.client.get(reverse('gearguard:reporting_api'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_all(self):
+        data = self.report()
+        self.assertEqual((data['total_requests'], data['open_requests']), (5, 3))
+        self.assertEqual(len(data['monthly_trend']), 6)
+        self.assertEqual(
+            {row['key']: row['count'] for row in data['monthly_trend'] if row['count']},
+            {f'{timezone.localdate():%Y-%m}': 4, f'{self.old_day:%Y-%m}': 1},
+        )
+        self.assertEqual(
+            {row['name']: row['total_requests'] for row in data['requests_by_team']},
+            {'Mechanics': 4, 'Electricians': 1},
+        )
+
+    def test_team(self):
+        data = self.report(team=self.other_team.pk)
+        self.assertEqual(data['total_requests'], 1)
+        self.assertEqual([row['name'] for row in data['requests_by_team']], ['Electricians'])
+        self.assertEqual(data['requests_by_category'], [{'category': 'Printer', 'count': 1}])
+
+    def test_date_range(self):
+        data = self.report(start=self.old_day.isoformat(), end=self.old_day.isoformat())
+        self.assertEqual(data['total_requests'], 1)
+        self.assertEqual([row['key'] for row in data['monthly_trend']], [f'{self.old_day:%Y-%m}'])
+
+        # An open start reaches back to the oldest request; months are stepped to the end
+        data = self.report(end=timezone.localdate().isoformat())
+        self.assertEqual(data['total_requests'], 5)
+        self.assertEqual(data['monthly_trend'][0]['key'], f'{self.old_day:%Y-%m}')
+        self.assertEqual(len(data['monthly_trend']), 3)
+
+        data = self.report(start=(self.old_day + timedelta(days=1)).isoformat())
+        self.assertEqual(data['total_requests'], 4)
+
+    def test_invalid_filters(self):
+        for params in ({'start': '2026-02-30'}, {'end': 'soon'}, {'team': 'all'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('gearguard:reporting_api'), params)
+                self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def test_walk(self):
+        ordering = ['name', 'id']
+        first = keyset_page(Equipment.objects.all(), ordering, page_size=1)
+        self.assertEqual([item.name for item in first], ['Press'])
+        second = keyset_page(Equipment.objects.all(), ordering, first.next_cursor, page_size=1)
+        self.assertEqual([item.name for item in second], ['Printer'])
+        self.assertFalse(second.has_next)
+
+    def test_invalid_cursor_restarts(self):
+        for cursor in ('not base64!', encode_cursor(['Press', 'x']), encode_cursor(['Press', 2 ** 70]),
+                       encode_cursor([['Press'], 1])):
+            with self.subTest(cursor=cursor):
+                page = keyset_page(Equipment.objects.all(), ['name', 'id'], cursor, page_size=1)
+                self.assertEqual([item.name for item in page], ['Press'])
+
+    def test_equipment_list_api(self):
+        Equipment.objects.create(name='Lathe', serial_number='LA-1', maintenance_team=self.team)
+        self.client.force_login(self.manager)
+        url = reverse('gearguard:equipment_list_api')
+        with mock.patch.object(views, 'EQUIPMENT_PAGE_SIZE', 1):
+            first = self.client.get(url).json()
+            second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+        # Scrapped equipment is left out of the list
+        self.assertEqual(([item['name'] for item in first['results']], first['count']), (['Lathe'], 2))
+        self.assertEqual([item['name'] for item in second['results']], ['Printer'])
+        self.assertIsNone(second['next_cursor'])
+        self.assertNotIn('count', second)
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def ids(self, query, kind='equipment'):
+        return [hit['id'] for hit in search.search(query, kinds=[kind])]
+
+    def test_save_and_delete_keep_index_in_sync(self):
+        # Written inline by the save, with no task worker involved
+        lathe = Equipment.objects.create(name='Lathe', serial_number='LA-77', location='Bay 9')
+        self.assertEqual(self.ids('lathe'), [lathe.pk])
+        self.assertEqual(self.ids('LA-77'), [lathe.pk])
+
+        lathe.name = 'Grinder'
+        lathe.save()
+        self.assertEqual(self.ids('lathe'), [])
+        self.assertEqual(self.ids('grind'), [lathe.pk])
+
+        lathe.delete()
+        self.assertEqual(self.ids('grinder'), [])
+
+        job = self.requests['new']
+        job.description = 'Hydraulic leak under the ram'
+        job.save()
+        self.assertEqual(self.ids('hydraulic', 'request'), [job.pk])
+        MaintenanceRequest.objects.filter(pk=job.pk).delete()
+        self.assertEqual(self.ids('hydraulic', 'request'), [])
+
+    def test_ranking(self):
+        once = MaintenanceRequest.objects.create(
+            subject='Quarterly check', equipment=self.equipment,
+            description='Inspect the belts, the guards, the wiring, the lights and the coolant pump',
+        )
+        often = MaintenanceRequest.objects.create(
+            subject='Coolant pump', equipment=self.equipment, description='Coolant pump leaks coolant',
+        )
+        self.assertEqual(self.ids('coolant', 'request'), [often.pk, once.pk])
+        # Every term must match, each as a prefix
+        self.assertEqual(self.ids('cool insp', 'request'), [once.pk])
+        self.assertEqual(search.search('   '), [])
+
+    def test_view(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(reverse('gearguard:search'), {'q': 'pr', 'type': 'equipment'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual({hit['title'] for hit in results}, {'Press', 'Printer'})
+        self.assertEqual(
+            results[0]['url'], reverse('gearguard:equipment_detail', args=[results[0]['id']])
+        )
+
+        response = self.client.get(reverse('gearguard:search'), {'q': 'press'})
+        self.assertEqual([(hit['type'], hit['title']) for hit in response.json()['results']], [('equipment', 'Press')])
+
+        response = self.client.get(reverse('gearguard:search'), {'q': 'press', 'type': 'teams'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_fallback(self):
+        with mock.patch.object(search, 'is_available', return_value=False):
+            self.assertEqual(self.ids('Print'), [self.other_equipment.pk])
+            self.assertEqual(
+                list(search.filter_equipment(Equipment.objects.all(), 'PR-')), [self.equipment]
+            )
+
+
+class ImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def equipment_csv(self, *rows):
+        header = 'name,serial_number,category,department,location,maintenance_team\n'
+        return io.StringIO(header + ''.join(f'{row}\n' for row in rows))
+
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            importers.BaseImporter()
+
+    def test_row_errors(self):
+        result = importers.run_import('equipment', self.equipment_csv(
+            'Lathe,LA-1,machinery,production,Bay 2,mechanics',
+            'Drill,DR-1,spaceship,production,Bay 2,',
+            'Saw,SA-1,machinery,production,Bay 3,Plumbers',
+            'Copy,pr-1,printer,it,Office,',
+            'Lathe 2,LA-1,machinery,production,Bay 2,',
+        ), 'csv')
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error['line'] for error in result.errors], [3, 4, 5, 6])
+        self.assertIn('category:', result.errors[0]['error'])
+        self.assertIn('maintenance_team: Unknown value "plumbers"', result.errors[1]['error'])
+        # Serials are unique case-insensitively, against the table and earlier rows
+        self.assertIn('serial_number:', result.errors[2]['error'])
+        self.assertIn('serial_number:', result.errors[3]['error'])
+        self.assertEqual(Equipment.objects.get(serial_number='LA-1').maintenance_team, self.team)
+
+        result = importers.run_import('requests', io.StringIO(
+            '{"subject": "Oil", "equipment": "pr-1", "priority": "low", "request_type": "corrective"}\n'
+            '\n'
+            '{"subject": "Belt", "equipment": "XX-9"}\n'
+            'not json\n'
+            '["Oil"]\n'
+            '{"subject": "Belt", "equipment": "PR-1", "priority": "low", "request_type": "corrective",'
+            ' "assigned_to": "max"}\n'
+        ), 'jsonl', user=self.manager)
+        self.assertEqual(result.as_dict()['created'], 1)
+        self.assertEqual([error['line'] for error in result.errors], [3, 4, 5, 6])
+        self.assertIn('equipment: Unknown value "xx-9"', result.errors[0]['error'])
+        self.assertTrue(result.errors[1]['error'].startswith('Invalid JSON'))
+        self.assertEqual(result.errors[2]['error'], 'Expected a JSON object')
+        self.assertIn('assigned_to:', result.errors[3]['error'])
+        oil = MaintenanceRequest.objects.get(subject='Oil')
+        self.assertEqual((oil.maintenance_team, oil.created_by), (self.team, self.manager))
+
+    def test_batches(self):
+        rows = [f'Unit {n},UN-{n},machinery,production,Bay,' for n in range(5)]
+        importer = importers.EquipmentImporter(batch_size=2)
+        with mock.patch.object(importer, 'flush', wraps=importer.flush) as flush:
+            result = importer.run(importers.iter_rows(self.equipment_csv(*rows), 'csv'))
+        self.assertEqual([len(call.args[0]) for call in flush.call_args_list], [2, 2, 1])
+        self.assertEqual((result.created, result.errors), (5, []))
+        self.assertEqual(Equipment.objects.filter(serial_number__startswith='UN-').count(), 5)
+
+    def test_row_by_row_fallback(self):
+        importer = importers.EquipmentImporter(batch_size=10)
+        # Written after the lookups were loaded, so only the database catches it
+        Equipment.objects.create(name='Sneaky', serial_number='UN-1', category='machinery', department='it')
+        rows = [f'Unit {n},UN-{n},machinery,production,Bay,' for n in range(3)]
+        result = importer.run(importers.iter_rows(self.equipment_csv(*rows), 'csv'))
+        self.assertEqual(result.created, 2)
+        self.assertEqual([error['line'] for error in result.errors], [3])
+        self.assertTrue(result.errors[0]['error'].startswith('Database error'))
+        self.assertEqual(
+            list(Equipment.objects.filter(serial_number__startswith='UN-').order_by('name').values_list('name', flat=True)),
+            ['Sneaky', 'Unit 0', 'Unit 2'],
+        )
+
+    def test_upsert_increments(self):
+        month = date(2020, 1, 1)
+        key = ('printer', 'low', 'new', month)
+        RequestSummary.bump_many({(self.team.pk, *key): 2, (None, *key): 1})
+        RequestSummary.bump_many({(self.team.pk, *key): 3, (None, *key): 4})
+        self.assertEqual(
+            set(RequestSummary.objects.filter(month=month).values_list('team_id', 'request_count')),
+            {(self.team.pk, 5), (None, 5)},
+        )
+
+        day = date(2020, 1, 2)
+        EquipmentRequestBucket.bump_many({(self.equipment.pk, day): 2})
+        EquipmentRequestBucket.bump_many({(self.equipment.pk, day): 1})
+        EquipmentRequestBucket.bump_many({(self.equipment.pk, day): -2})
+        self.assertEqual(
+            list(EquipmentRequestBucket.objects.filter(day=day).values_list('request_count', flat=True)), [1]
+        )
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+        cls.other_team = MaintenanceTeam.objects.create(name='Electricians')
+        cls.other = MaintenanceRequest.objects.create(
+            subject='Toner', equipment=cls.other_equipment, maintenance_team=cls.other_team, priority='low',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+
+    def export(self, kind, **params):
+        response = self.client.get(reverse('gearguard:export_data', args=[kind]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(self.export('requests').splitlines()))
+        self.assertEqual([row['subject'] for row in rows], ['new job', 'in_progress job', 'repaired job', 'scrap job', 'Toner'])
+        self.assertEqual((rows[0]['assigned_to'], rows[0]['equipment_serial']), ('tina', 'PR-1'))
+
+    def test_jsonl(self):
+        lines = self.export('equipment', format='jsonl').splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['name'] for row in rows], ['Press', 'Printer'])
+        self.assertEqual(list(rows[1]), exports.EXPORTS['equipment'].headers)
+        self.assertEqual((rows[1]['serial_number'], rows[1]['maintenance_team']), ('PT-1', 'Mechanics'))
+
+    def test_filters(self):
+        def subjects(**params):
+            return [json.loads(line)['subject'] for line in self.export('requests', format='jsonl', **params).splitlines()]
+
+        self.assertEqual(subjects(team=self.other_team.pk), ['Toner'])
+        self.assertEqual(subjects(stage='repaired'), ['repaired job'])
+        today = timezone.localdate()
+        self.assertEqual(len(subjects(start=today.isoformat(), end=today.isoformat())), 5)
+        self.assertEqual(subjects(end=(today - timedelta(days=1)).isoformat()), [])
+        self.assertEqual(subjects(start=(today + timedelta(days=1)).isoformat()), [])
+
+    def test_invalid(self):
+        url = reverse('gearguard:export_data', args=['teams'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        url = reverse('gearguard:export_data', args=['equipment'])
+        for params in ({'format': 'xlsx'}, {'start': '2026-13-01'}, {'team': 'all'}, {'stage': 'new'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+        with self.assertRaises(ValueError):
+            exports.parse_filters('requests', {'stage': 'done'})
+
+    def test_streams_lazily(self):
+        lines = exports.stream_export('requests', 'csv', chunk_size=2)
+        self.assertTrue(next(lines).startswith('id,subject,'))
+        with self.assertNumQueries(1):
+            self.assertIn('new job', next(lines))
+
+
+class ArchivedLogExportTests(TransactionTestCase):
+
+    def setUp(self):
+        create_fixtures(self)
+        now = timezone.now()
+        self.old = [
+            MaintenanceLog.objects.create(
+                request=self.requests['new'], equipment=self.equipment, user=self.manager,
+                action_code=MaintenanceLog.OTHER, timestamp=now - timedelta(days=days),
+            )
+            for days in (100, 70)
+        ]
+        self.live = list(MaintenanceLog.objects.filter(timestamp__gte=now - timedelta(days=60)).values_list('pk', flat=True))
+        archive.archive_before(now - timedelta(days=60))
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            for month in archive.months():
+                editor.delete_model(archive.archive_model(month))
+
+    def test_archives_come_first(self):
+        self.assertFalse(MaintenanceLog.objects.filter(pk__in=[log.pk for log in self.old]).exists())
+        rows = [json.loads(line) for line in exports.stream_export('logs', 'jsonl')]
+        self.assertEqual([row['id'] for row in rows], [log.pk for log in self.old] + sorted(self.live))
+        self.assertEqual((rows[0]['request_subject'], rows[0]['user']), ('new job', 'max'))
+
+        recent = [row[0] for row in exports.iter_rows('logs', start=timezone.localdate() - timedelta(days=80))]
+        self.assertEqual(recent, [self.old[1].pk] + sorted(self.live))
+        self.assertEqual(list(exports.iter_rows('logs', team=self.team.pk + 1)), [])
+
+
+class CacheVersionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def setUp(self):
+        cache.clear()
+
+    def versions(self):
+        return (
+            caching.get_version(caching.GLOBAL_VERSION_KEY),
+            caching.get_version(caching.team_version_key(self.team.pk)),
+        )
+
+    def assertBumped(self, write):
+        before = self.versions()
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        after = self.versions()
+        self.assertGreater(after[0], before[0])
+        self.assertGreater(after[1], before[1])
+
+    def test_writes_bump_versions(self):
+        job = self.requests['new']
+        job.description = 'Squeaks'
+        self.assertBumped(job.save)
+        self.assertBumped(lambda: Equipment.objects.filter(pk=self.other_equipment.pk).get().save())
+        self.assertBumped(self.requests['repaired'].delete)
+
+    def test_transition_bumps_versions(self):
+        self.assertBumped(lambda: transition_stage(self.requests['new'].pk, 'new', 'in_progress', self.manager))
+
+    def test_bulk_create_bumps_versions(self):
+        self.assertBumped(lambda: MaintenanceRequest.objects.bulk_create([
+            MaintenanceRequest(subject=f'Bulk {n}', equipment=self.equipment, priority='low') for n in range(3)
+        ]))
+
+    def test_bumped_after_commit(self):
+        before = self.versions()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.requests['new'].save()
+            self.assertEqual(self.versions(), before)
+        self.assertTrue(callbacks)
+
+    def test_fragment(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            return len(builds)
+
+        self.assertEqual(caching.fragment('count', build, team=self.team.pk), 1)
+        self.assertEqual(caching.fragment('count', build, team=self.team.pk), 1)
+        caching.bump(include_global=False, team_ids=[self.team.pk + 1])
+        self.assertEqual(caching.fragment('count', build, team=self.team.pk), 1)
+        caching.bump([self.team.pk])
+        self.assertEqual(caching.fragment('count', build, team=self.team.pk), 2)
+
+
+class CalendarEtagTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def setUp(self):
+        self.client.force_login(self.manager)
+        today = timezone.localdate()
+        self.params = {'start': today.isoformat(), 'end': (today + timedelta(days=7)).isoformat()}
+
+    def get(self, etag=None, **params):
+        headers = {'if_none_match': etag} if etag else {}
+        return self.client.get(reverse('gearguard:calendar_events'), {**self.params, **params}, headers=headers)
+
+    def test_not_modified(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 4)
+        etag = response['ETag']
+
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        # Another range has its own validator
+        self.assertEqual(self.get(etag, end=(timezone.localdate() + timedelta(days=8)).isoformat()).status_code, 200)
+
+    def test_new_etag_after_change(self):
+        etag = self.get()['ETag']
+        job = self.requests['new']
+        job.subject = 'Renamed job'
+        job.save()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Press: Renamed job', [event['title'] for event in response.json()])
+
+        # A deletion leaves max(updated_at) alone but changes the count
+        etag = response['ETag']
+        self.requests['repaired'].delete()
+        response = self.get(etag)
+        self.assertEqual((response.status_code, len(response.json())), (200, 3))
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_invalid_range(self):
+        self.assertEqual(self.get(start='').status_code, 400)
+        self.assertEqual(self.get(end='2000-01-01').status_code, 400)
+
+
+class OccurrenceTests(SimpleTestCase):
+
+    def test_days(self):
+        schedule = MaintenanceSchedule(frequency='days', interval=10, start_date=date(2026, 1, 1))
+        self.assertEqual(
+            list(schedule.occurrences(date(2026, 1, 5), date(2026, 2, 1))),
+            [date(2026, 1, 11), date(2026, 1, 21), date(2026, 1, 31)],
+        )
+        schedule.end_date = date(2026, 1, 30)
+        self.assertEqual(list(schedule.occurrences(date(2025, 12, 1), date(2026, 2, 1)))[-1], date(2026, 1, 21))
+
+    def test_months(self):
+        schedule = MaintenanceSchedule(frequency='months', interval=1, day_of_month=31, start_date=date(2026, 1, 15))
+        self.assertEqual(
+            list(schedule.occurrences(date(2025, 1, 1), date(2026, 4, 30))),
+            [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30)],
+        )
+        # Without a day of month the start date's day is kept
+        schedule = MaintenanceSchedule(frequency='months', interval=5, start_date=date(2025, 11, 15))
+        self.assertEqual(
+            list(schedule.occurrences(date(2026, 1, 1), date(2027, 1, 1))),
+            [date(2026, 4, 15), date(2026, 9, 15)],
+        )
+
+
+class PreventiveGenerationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+        Equipment.objects.filter(pk=cls.other_equipment.pk).update(default_technician=cls.technician)
+        cls.today = date(2026, 3, 2)
+        cls.schedule = MaintenanceSchedule.objects.create(
+            equipment=cls.other_equipment, subject='Clean rollers', frequency='days', interval=3,
+            start_date=cls.today, priority='low',
+        )
+
+    def preventive(self):
+        return MaintenanceRequest.objects.filter(equipment=self.other_equipment, request_type='preventive')
+
+    def test_generate(self):
+        MaintenanceRequest.objects.create(
+            subject='Manual', equipment=self.other_equipment, request_type='preventive',
+            scheduled_date=self.today + timedelta(days=3),
+        )
+        self.assertEqual(generate_preventive_requests(horizon_days=9, today=self.today), (3, 1))
+        generated = self.preventive().exclude(subject='Manual').order_by('scheduled_date')
+        self.assertEqual(
+            [job.scheduled_date for job in generated],
+            [self.today, self.today + timedelta(days=6), self.today + timedelta(days=9)],
+        )
+        self.assertEqual(
+            {(job.maintenance_team_id, job.assigned_to_id, job.priority, job.stage) for job in generated},
+            {(self.team.pk, self.technician.pk, 'low', 'new')},
+        )
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.generated_until, self.today + timedelta(days=9))
+
+    def test_rerun_expands_only_new_dates(self):
+        generate_preventive_requests(horizon_days=9, today=self.today)
+        self.assertEqual(generate_preventive_requests(horizon_days=9, today=self.today), (0, 0))
+        self.assertEqual(generate_preventive_requests(horizon_days=15, today=self.today), (2, 0))
+        self.assertEqual(self.preventive().count(), 6)
+
+    def test_inactive_and_scrapped_are_left_out(self):
+        MaintenanceSchedule.objects.create(
+            equipment=self.equipment, subject='Oil', frequency='days', interval=1, start_date=self.today,
+        )
+        MaintenanceSchedule.objects.filter(pk=self.schedule.pk).update(is_active=False)
+        self.assertEqual(generate_preventive_requests(horizon_days=9, today=self.today), (0, 0))
+
+
+class TransitionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def test_transition(self):
+        request = self.requests['in_progress']
+        result = transition_stage(request.pk, 'in_progress', 'repaired', self.technician)
+        self.assertEqual(result['stage'], 'repaired')
+        self.assertIsNotNone(result['completed_date'])
+        log = request.logs.get(action_code=MaintenanceLog.STAGE_CHANGED)
+        self.assertEqual((log.from_stage, log.to_stage, log.user), ('in_progress', 'repaired', self.technician))
+
+    def test_scrap_marks_equipment(self):
+        transition_stage(self.requests['new'].pk, 'new', 'scrap', self.technician)
+        self.equipment.refresh_from_db()
+        self.assertTrue(self.equipment.is_scrapped)
+
+    def test_conflict(self):
+        with self.assertRaises(TransitionConflict) as raised:
+            transition_stage(self.requests['repaired'].pk, 'new', 'in_progress', self.technician)
+        self.assertEqual(raised.exception.current_stage, 'repaired')
+        self.assertFalse(self.requests['repaired'].logs.exists())
+
+    def test_same_stage_writes_nothing(self):
+        request = self.requests['new']
+        logs = request.logs.count()
+        result = transition_stage(request.pk, 'new', 'new', self.technician)
+        self.assertEqual(result['stage'], 'new')
+        self.assertEqual(request.logs.count(), logs)
+        with self.assertRaises(TransitionConflict):
+            transition_stage(request.pk, 'repaired', 'repaired', self.technician)
+
+    def test_missing_request(self):
+        with self.assertRaises(MaintenanceRequest.DoesNotExist):
+            transition_stage(0, 'new', 'in_progress', self.technician)
+        with self.assertRaises(MaintenanceRequest.DoesNotExist):
+            transition_stage(0, 'new', 'new', self.technician)
+
+    def test_update_stage_view(self):
+        self.client.force_login(self.technician)
+        url = reverse('gearguard:request_update_stage', args=[self.requests['new'].pk])
+        response = self.client.post(url, {'stage': 'in_progress', 'expected_stage': 'new'})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(url, {'stage': 'repaired', 'expected_stage': 'new'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['current_stage'], 'in_progress')
+
+        response = self.client.post(url, {'stage': 'done'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def test_batch_update(self):
+        self.client.force_login(self.manager)
+        operations = [
+            {'id': True, 'stage': 'new'},
+            {'id': self.requests['repaired'].pk, 'stage': 'scrap', 'expected_stage': 'new'},
+            {'id': self.requests['repaired'].pk + 100, 'stage': 'new'},
+            {'id': self.requests['new'].pk, 'stage': 'in_progress', 'assigned_to': None},
+            {'id': self.requests['in_progress'].pk, 'assigned_to': True},
+            {'id': self.requests['scrap'].pk},
+        ]
+        response = self.client.post(
+            reverse('gearguard:request_batch_update'), json.dumps({'operations': operations}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(
+            [result['status'] for result in body['results']],
+            ['invalid', 'conflict', 'not_found', 'updated', 'invalid', 'invalid'],
+        )
+        self.assertEqual(body['updated'], 1)
+        self.assertEqual(body['results'][1]['current_stage'], 'repaired')
+
+        request = MaintenanceRequest.objects.get(pk=self.requests['new'].pk)
+        self.assertEqual((request.stage, request.assigned_to_id), ('in_progress', None))
+        self.assertEqual(
+            set(request.logs.exclude(action_code=MaintenanceLog.UPDATED).values_list('action_code', flat=True)),
+            {MaintenanceLog.STAGE_CHANGED, MaintenanceLog.REASSIGNED},
+        )
+
+    def test_out_of_range_ids_are_invalid(self):
+        results = apply_batch([{'id': 0, 'stage': 'new'}, {'id': -3, 'stage': 'new'}, {'id': 2 ** 63, 'stage': 'new'},
+                               {'id': 2 ** 70, 'stage': 'new'}], self.manager)
+        self.assertEqual([result['status'] for result in results], ['invalid'] * 4)
+        self.assertEqual({result['message'] for result in results}, {'Invalid request id'})
+
+    def test_unchanged_writes_nothing(self):
+        scrap, in_progress = self.requests['scrap'], self.requests['in_progress']
+        before = dict(MaintenanceRequest.objects.values_list('pk', 'updated_at'))
+        logs = MaintenanceLog.objects.count()
+        with mock.patch.object(events, 'publish_card_on_commit') as publish:
+            results = apply_batch([
+                {'id': scrap.pk, 'stage': 'scrap'},
+                {'id': in_progress.pk, 'assigned_to': self.technician.pk},
+                {'id': in_progress.pk, 'stage': 'in_progress', 'assigned_to': self.technician.pk},
+            ], self.manager)
+        self.assertEqual(results, [
+            {'id': scrap.pk, 'status': 'unchanged', 'stage': 'scrap', 'assigned_to': self.technician.pk},
+            {'id': in_progress.pk, 'status': 'unchanged', 'stage': 'in_progress', 'assigned_to': self.technician.pk},
+            {'id': in_progress.pk, 'status': 'unchanged', 'stage': 'in_progress', 'assigned_to': self.technician.pk},
+        ])
+        publish.assert_not_called()
+        self.assertEqual(dict(MaintenanceRequest.objects.values_list('pk', 'updated_at')), before)
+        self.assertEqual(MaintenanceLog.objects.count(), logs)
+
+        # Only the operation that changes something is written
+        with mock.patch.object(events, 'publish_card_on_commit') as publish:
+            results = apply_batch([
+                {'id': scrap.pk, 'stage': 'scrap'},
+                {'id': in_progress.pk, 'assigned_to': None},
+            ], self.manager)
+        self.assertEqual([result['status'] for result in results], ['unchanged', 'updated'])
+        publish.assert_called_once_with(in_progress.pk, 'in_progress', self.team.pk)
+        self.assertEqual(MaintenanceRequest.objects.get(pk=scrap.pk).updated_at, before[scrap.pk])
+        self.assertGreater(MaintenanceRequest.objects.get(pk=in_progress.pk).updated_at, before[in_progress.pk])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'PostgreSQL only; run ./test_postgres.sh')
+class PostgresTests(TransactionTestCase):
+
+    def setUp(self):
+        create_fixtures(self)
+
+    @skipUnless('pool' in connection.settings_dict.get('OPTIONS', {}), 'Connection pool is disabled')
+    def test_pooled_connections(self):
+        options = connection.settings_dict['OPTIONS']['pool']
+        self.assertIsNotNone(connection.pool)
+        self.assertEqual(connection.pool.max_size, options['max_size'])
+
+        errors = []
+
+        def query():
+            try:
+                self.assertEqual(Equipment.objects.count(), 2)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                # Hands the connection back to the pool
+                connection.close()
+
+        threads = [threading.Thread(target=query) for _ in range(options['max_size'] * 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(connection.pool.get_stats()['pool_size'], options['max_size'])
+
+    def test_claim_skips_locked_tasks(self):
+        first = Task.objects.create(name='refresh_counters')
+        second = Task.objects.create(name='refresh_counters')
+        locked = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            try:
+                with transaction.atomic():
+                    list(Task.objects.select_for_update().filter(pk=first.pk))
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            claimed = tasks.claim('worker', limit=2)
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual([task.pk for task in claimed], [second.pk])
+
+    def test_summary_upsert_without_team(self):
+        month = date(2020, 1, 1)
+        for _ in range(2):
+            RequestSummary.bump_many({(None, 'printer', 'low', 'new', month): 1})
+        self.assertEqual(
+            list(RequestSummary.objects.filter(month=month).values_list('team_id', 'request_count')), [(None, 2)]
+        )
+
+    def test_equipment_prefix_search_uses_indexes(self):
+        equipment = search.filter_equipment(Equipment.objects.all(), 'pr')
+        self.assertEqual(list(equipment.order_by('name').values_list('name', flat=True)), ['Press', 'Printer'])
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Two rows are always cheaper to scan; make the planner show what it could use
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            plan = equipment.explain()
+        for column in ('name', 'serial_number', 'location'):
+            self.assertIn(f'gearguard_equipment_{column}_prefix', plan)
+
+
+class AutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+        cls.pump = Equipment.objects.create(
+            name='Pump', serial_number='XPU-9', category='machinery', department='production', location='Print shop',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.technician)
+        cache.clear()
+
+    def autocomplete(self, query):
+        response = self.client.get(reverse('gearguard:equipment_autocomplete'), {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_prefix_match(self):
+        # Press is scrapped by the fixtures; the location matches too
+        self.assertEqual([item['name'] for item in self.autocomplete('pr')], ['Printer', 'Pump'])
+        self.assertEqual(
+            self.autocomplete('xpu'),
+            [{'id': self.pump.pk, 'name': 'Pump', 'serial_number': 'XPU-9', 'location': 'Print shop'}],
+        )
+        self.assertEqual(self.autocomplete('rinter'), [])
+        self.assertEqual(self.autocomplete(' - '), [])
+
+    def test_fallback_is_a_prefix_match(self):
+        with mock.patch.object(search, 'is_available', return_value=False):
+            self.assertEqual([item['name'] for item in self.autocomplete('pr')], ['Printer', 'Pump'])
+            self.assertEqual([item['name'] for item in self.autocomplete('PU')], ['Pump'])
+            self.assertEqual(self.autocomplete('rinter'), [])
+
+    def test_technician_choices_cache(self):
+        self.assertEqual(technician_choices(), [(self.technician.pk, 'tina')])
+        with self.assertNumQueries(0):
+            technician_choices()
+
+        newcomer = User.objects.create_user('nina')
+        with self.captureOnCommitCallbacks(execute=True):
+            TeamMember.objects.create(team=self.team, user=newcomer)
+        self.assertEqual(technician_choices(), [(newcomer.pk, 'nina'), (self.technician.pk, 'tina')])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.technician.username = 'tia'
+            self.technician.save()
+        self.assertEqual(technician_choices(), [(newcomer.pk, 'nina'), (self.technician.pk, 'tia')])
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class QueryBudgetTests(TestCase):
+    """
+    Every budgeted view, as a technician and as a manager with no team.
+    With QUERY_BUDGET_MODE 'raise', a view over its budget in
+    settings.QUERY_BUDGETS fails here with QueryBudgetExceeded.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def setUp(self):
+        cache.clear()
+
+    def pages(self):
+        request = self.requests['new']
+        today = timezone.localdate()
+        return [
+            reverse('gearguard:dashboard'),
+            reverse('gearguard:equipment_list'),
+            reverse('gearguard:equipment_list') + '?search=press',
+            reverse('gearguard:equipment_list_api'),
+            reverse('gearguard:equipment_detail', args=[self.equipment.pk]),
+            reverse('gearguard:kanban_board'),
+            reverse('gearguard:kanban_board') + f'?team={self.team.pk}',
+            reverse('gearguard:kanban_column', args=['new']),
+            reverse('gearguard:request_create'),
+            reverse('gearguard:request_update', args=[request.pk]),
+            reverse('gearguard:request_history', args=[request.pk]),
+            reverse('gearguard:equipment_history', args=[self.equipment.pk]),
+            reverse('gearguard:calendar_view'),
+            reverse('gearguard:calendar_events') + f'?start={today}&end={today + timedelta(days=30)}',
+            reverse('gearguard:reporting'),
+            reverse('gearguard:reporting_api'),
+            reverse('gearguard:teams_list'),
+            reverse('gearguard:search') + '?q=press',
+        ]
+
+    def test_pages_within_budget(self):
+        for user in (self.technician, self.manager):
+            self.client.force_login(user)
+            for url in self.pages():
+                # Twice: with an empty cache and with warm fragments
+                for attempt in ('cold', 'warm'):
+                    with self.subTest(user=user.username, url=url, cache=attempt):
+                        response = self.client.get(url)
+                        self.assertEqual(response.status_code, 200)
+
+    def test_calendar_feed_within_budget(self):
+        self.client.force_login(self.technician)
+        today = timezone.localdate()
+        response = self.client.get(
+            reverse('gearguard:calendar_view'),
+            {'start': today, 'end': today + timedelta(days=30)},
+            headers={'X-Requested-With': 'XMLHttpRequest'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 4)
+
+    def test_create_within_budget(self):
+        self.client.force_login(self.technician)
+        response = self.client.post(
+            reverse('gearguard:request_create'),
+            request_data(self.equipment, assigned_to=self.technician.pk),
+        )
+        self.assertRedirects(response, reverse('gearguard:kanban_board'), fetch_redirect_response=False)
+        self.assertTrue(MaintenanceRequest.objects.filter(subject='Leaking valve').exists())
+
+    def test_update_within_budget(self):
+        self.client.force_login(self.manager)
+        request = self.requests['new']
+        response = self.client.post(
+            reverse('gearguard:request_update', args=[request.pk]),
+            request_data(self.equipment, subject='Moved', stage='in_progress', assigned_to=self.technician.pk),
+        )
+        self.assertRedirects(response, reverse('gearguard:kanban_board'), fetch_redirect_response=False)
+        request.refresh_from_db()
+        self.assertEqual(request.stage, 'in_progress')
+
+
+@override_settings(QUERY_BUDGET_MODE='raise', TASKS_EAGER=True)
+class EagerTaskQueryBudgetTests(TransactionTestCase):
+    """
+    Writes with TASKS_EAGER, whose tasks run when the request's transaction
+    commits. TestCase never commits, so these need real transactions to
+    count the tasks' queries against the view's budget.
+    """
+
+    def setUp(self):
+        cache.clear()
+        create_fixtures(self)
+
+    def test_create_runs_tasks_within_budget(self):
+        self.client.force_login(self.manager)
+        response = self.client.post(
+            reverse('gearguard:request_create'),
+            request_data(self.equipment, assigned_to=self.technician.pk),
+        )
+        self.assertEqual(response.status_code, 302)
+        created = MaintenanceRequest.objects.get(subject='Leaking valve')
+        self.assertEqual(list(created.logs.values_list('action_code', flat=True)), [MaintenanceLog.CREATED])
+
+    def test_update_runs_tasks_within_budget(self):
+        self.client.force_login(self.manager)
+        request = self.requests['new']
+        response = self.client.post(
+            reverse('gearguard:request_update', args=[request.pk]),
+            request_data(self.other_equipment, subject='Moved', stage='in_progress'),
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(request.logs.filter(from_stage='new', to_stage='in_progress').exists())
+
+
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+
+    def setUp(self):
+        registry.reset()
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(self.technician)
+        response = self.client.get('/metrics')
+        self.assertEqual((response.status_code, response.content), (403, b'Staff only'))
+
+    def test_prometheus_format(self):
+        self.client.force_login(self.manager)
+        self.client.get(reverse('gearguard:search'), {'q': 'press'})
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+
+        body = response.content.decode()
+        self.assertTrue(body.endswith('\n'))
+        sample = re.compile(r'[a-z_]+(\{[a-z_]+="[^"]*"(,[a-z_]+="[^"]*")*\})? -?[0-9.e+-]+')
+        for line in body.splitlines():
+            with self.subTest(line=line):
+                self.assertTrue(line.startswith(('# HELP ', '# TYPE ')) or sample.fullmatch(line))
+        self.assertIn('# TYPE gearguard_requests_total counter', body)
+        self.assertIn('gearguard_requests_total{view="gearguard:search",method="GET",status="200"} 1', body)
+        self.assertIn('# TYPE gearguard_request_queries summary', body)
+        self.assertIn('gearguard_request_queries_count{view="gearguard:search"} 1', body)
+
+    def search_over_budget(self, mode):
+        # The middleware reads its settings when a client builds its handler,
+        # so every mode needs a new client
+        with override_settings(QUERY_BUDGETS={'gearguard:search': 0}, QUERY_BUDGET_MODE=mode):
+            client = self.client_class()
+            client.force_login(self.manager)
+            return client.get(reverse('gearguard:search'), {'q': 'press'})
+
+    def test_budget_exceeded(self):
+        with self.assertLogs('core.middleware', 'WARNING'):
+            self.assertEqual(self.search_over_budget('log').status_code, 200)
+        self.assertIn('gearguard_query_budget_exceeded_total{view="gearguard:search"} 1', registry.render())
+        with self.assertRaises(QueryBudgetExceeded):
+            self.search_over_budget('raise')
+
+
+class GenerateLoadDataTests(TestCase):
+
+    def generate(self, **options):
+        call_command('generate_load_data', prefix='T', stdout=io.StringIO(), **options)
+
+    def test_explicit_zero_is_kept(self):
+        self.generate(requests=20, equipment=3, users=0, teams=1)
+        self.assertEqual(User.objects.count(), 0)
+        self.assertEqual(MaintenanceTeam.objects.count(), 1)
+        self.assertEqual(Equipment.objects.count(), 3)
+        self.assertEqual(MaintenanceRequest.objects.count(), 20)
+        self.assertFalse(MaintenanceRequest.objects.filter(assigned_to__isnull=False).exists())
+
+        self.generate(requests=0, equipment=0, users=2, teams=1)
+        self.assertEqual((User.objects.count(), Equipment.objects.count()), (2, 3))
+        self.assertEqual(MaintenanceRequest.objects.count(), 20)
+
+    def test_defaults(self):
+        self.generate(requests=30)
+        self.assertEqual(
+            (MaintenanceTeam.objects.count(), User.objects.count(), Equipment.objects.count()), (2, 10, 3)
+        )
+
+    def test_rejects_counts_that_cannot_work(self):
+        for options in ({'teams': 0}, {'requests': 5, 'equipment': 0}, {'users': -1}):
+            with self.subTest(options=options), self.assertRaises(CommandError):
+                self.generate(**options)
+        self.assertFalse(MaintenanceTeam.objects.exists())
+
+
+class EventBusTests(SimpleTestCase):
+
+    def drain(self, subscription):
+        received = []
+        while not subscription.queue.empty():
+            received.append(subscription.queue.get_nowait())
+        events.unsubscribe(subscription)
+        return received
+
+    def test_team_filter(self):
+        async def check():
+            team, everyone = events.Subscription(1), events.Subscription(None)
+            cases = [
+                ({'type': events.CARD, 'data': {'team_id': 1, 'previous_team_id': None}}, True),
+                # Moved away from the team: its board must drop the card
+                ({'type': events.CARD, 'data': {'team_id': 2, 'previous_team_id': 1}}, True),
+                ({'type': events.CARD, 'data': {'team_id': 2, 'previous_team_id': 2}}, False),
+                ({'type': events.RESET, 'data': {'team_id': None}}, True),
+                ({'type': events.RESET, 'data': {'team_id': 2}}, False),
+            ]
+            for event, wanted in cases:
+                with self.subTest(event=event):
+                    self.assertIs(team.wants(event), wanted)
+                    self.assertTrue(everyone.wants(event))
+        asyncio.run(check())
+
+    def test_replay_after_last_event_id(self):
+        async def check():
+            events.publish(events.CARD, {'id': 1, 'team_id': 1})
+            first = events._history[-1]['id']
+            events.publish(events.CARD, {'id': 2, 'team_id': 2})
+            events.publish(events.CARD, {'id': 3, 'team_id': 1})
+
+            replayed = self.drain(events.subscribe(1, first))
+            self.assertEqual([event['data']['id'] for event in replayed], [3])
+            replayed = self.drain(events.subscribe(None, first))
+            self.assertEqual([event['data']['id'] for event in replayed], [2, 3])
+            self.assertEqual(self.drain(events.subscribe(None, events._history[-1]['id'])), [])
+
+            # Live events reach the subscriber's loop
+            subscription = events.subscribe(1)
+            events.publish(events.CARD, {'id': 4, 'team_id': 1})
+            event = await asyncio.wait_for(subscription.queue.get(), 1)
+            events.unsubscribe(subscription)
+            self.assertEqual(event['data']['id'], 4)
+            self.assertEqual(events.encode(event).splitlines()[:2], [f"id: {event['id']}", 'event: card'])
+        asyncio.run(check())
+
+    def test_reset_when_events_were_missed(self):
+        async def check():
+            events.publish(events.CARD, {'id': 1, 'team_id': 1})
+            first = events._history[-1]['id']
+            for number in (2, 3, 4):
+                events.publish(events.CARD, {'id': number, 'team_id': 1})
+            # Event 2 has fallen out of the history
+            for last_event_id in (first, 'elsewhere-1', 'garbage'):
+                with self.subTest(last_event_id=last_event_id):
+                    replayed = self.drain(events.subscribe(1, last_event_id))
+                    self.assertEqual([event['type'] for event in replayed], [events.RESET])
+        with mock.patch.object(events, '_history', deque(maxlen=2)):
+            asyncio.run(check())
+
+
+@tasks.task(name='tests.failing', max_attempts=2)
+def failing_task():
+    raise RuntimeError('boom')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_fixtures(cls)
+        # Queued by the fixtures' own writes
+        Task.objects.all().delete()
+
+    def test_enqueue_claim_run(self):
+        request = self.requests['new']
+        now = timezone.now()
+        queued = tasks.enqueue('request_created', request.pk, self.manager.pk, request.subject, None, now)
+        # Arguments go through JSON, which keeps datetimes to the millisecond
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        self.assertEqual(parse_datetime(queued.args[-1]), now)
+
+        claimed = tasks.claim('worker', limit=5)
+        self.assertEqual([task.pk for task in claimed], [queued.pk])
+        self.assertEqual((claimed[0].status, claimed[0].attempts), (tasks.RUNNING, 1))
+        self.assertEqual(tasks.claim('worker'), [])
+
+        self.assertEqual(tasks.run(claimed[0]), 'done')
+        self.assertFalse(Task.objects.exists())
+        self.assertTrue(request.logs.filter(action_code=MaintenanceLog.CREATED, timestamp=now).exists())
+
+    def test_retry_then_fail(self):
+        queued = tasks.enqueue('tests.failing')
+        with self.assertLogs('gearguard.tasks', 'WARNING'):
+            self.assertEqual(tasks.run(tasks.claim('worker')[0]), 'retry')
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, tasks.PENDING)
+        self.assertGreater(queued.run_after, timezone.now())
+        self.assertIn('boom', queued.last_error)
+        self.assertEqual(tasks.claim('worker'), [])
+
+        Task.objects.update(run_after=timezone.now())
+        with self.assertLogs('gearguard.tasks', 'ERROR'):
+            self.assertEqual(tasks.run(tasks.claim('worker')[0]), 'failed')
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (tasks.FAILED, 2))
+
+        self.assertEqual(tasks.retry_failed(), 1)
+        self.assertEqual(len(tasks.claim('worker')), 1)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager(self):
+        request = self.requests['new']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(tasks.enqueue('request_created', request.pk, None, request.subject, None, None))
+        self.assertFalse(Task.objects.exists())
+        self.assertTrue(request.logs.filter(action_code=MaintenanceLog.CREATED).exists())
+
+
+class ArchiveTests(TransactionTestCase):
+
+    def setUp(self):
+        create_fixtures(self)
+        self.old = [
+            MaintenanceLog.objects.create(
+                request=self.requests['new'], equipment=self.equipment, user=self.manager,
+                action_code=MaintenanceLog.OTHER, notes=f'Old {day}',
+                timestamp=timezone.make_aware(datetime(2025, month, day, 12)),
+            )
+            for month, day in ((1, 10), (1, 20), (2, 5))
+        ]
+        self.cutoff = timezone.make_aware(datetime(2025, 2, 10))
+        self.live = MaintenanceLog.objects.count() - len(self.old)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            for month in archive.months():
+                editor.delete_model(archive.archive_model(month))
+
+    def test_archive_before(self):
+        months = [(date(2025, 1, 1), 2), (date(2025, 2, 1), 1)]
+        self.assertEqual(archive.pending(self.cutoff), months)
+        progress = []
+        moved = archive.archive_before(self.cutoff, batch_size=1, progress=lambda *args: progress.append(args))
+        self.assertEqual(moved, months)
+        self.assertEqual(progress, [(date(2025, 1, 1), 1), (date(2025, 1, 1), 2), (date(2025, 2, 1), 1)])
+
+        self.assertEqual(archive.months(), [date(2025, 1, 1), date(2025, 2, 1)])
+        self.assertEqual(archive.pending(self.cutoff), [])
+        self.assertEqual(MaintenanceLog.objects.count(), self.live)
+        archived = archive.archive_model(date(2025, 1, 1)).objects.order_by('timestamp')
+        self.assertEqual(
+            list(archived.values_list('id', 'request_id', 'equipment_id', 'user_id', 'notes')),
+            [(log.pk, self.requests['new'].pk, self.equipment.pk, self.manager.pk, log.notes) for log in self.old[:2]],
+        )
+        self.assertEqual(archive.archive_before(self.cutoff), [])
+
+    def test_restart_after_interrupted_batch(self):
+        # A copy whose delete never committed is copied again, not duplicated
+        model = archive.ensure_table(date(2025, 1, 1))
+        model.objects.create(**{
+            field.attname: getattr(self.old[0], field.attname) for field in MaintenanceLog._meta.concrete_fields
+        })
+        self.assertEqual(archive.archive_before(self.cutoff)[0], (date(2025, 1, 1), 2))
+        self.assertEqual(model.objects.count(), 2)
+
+    def test_append_only(self):
+        entry = self.old[0]
+        entry.notes = 'Rewritten'
+        with self.assertRaises(ValueError):
+            entry.save()
+
+
+class HistoryTests(TransactionTestCase):
+    """History pages across the live log and the monthly archive tables"""
+
+    def setUp(self):
+        create_fixtures(self)
+        self.request = self.requests['new']
+        now = timezone.now()
+        for days in (200, 170, 140, 110, 80, 1):
+            MaintenanceLog.objects.create(
+                request=self.request, equipment=self.equipment, user=self.manager,
+                action_code=MaintenanceLog.OTHER, timestamp=now - timedelta(days=days),
+            )
+        self.expected = list(self.request.logs.order_by('-timestamp', '-id').values_list('pk', flat=True))
+        self.assertEqual(len(self.expected), 9)
+        archive.archive_before(now - timedelta(days=60))
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            for month in archive.months():
+                editor.delete_model(archive.archive_model(month))
+
+    def test_walk_across_archives(self):
+        self.assertGreaterEqual(len(archive.months()), 4)
+        self.assertEqual(self.request.logs.count(), 4)
+
+        seen = []
+        cursor = None
+        while True:
+            page = archive.history_page(cursor, page_size=2, request_id=self.request.pk)
+            seen += [entry.pk for entry in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+
+    def test_invalid_cursor_restarts(self):
+        first = [entry.pk for entry in archive.history_page(page_size=2, request_id=self.request.pk)]
+        for cursor in ('not base64!', encode_cursor(['yesterday', 1]), encode_cursor(['2026-01-01T00:00:00', 1]),
+                       encode_cursor([timezone.now(), True])):
+            with self.subTest(cursor=cursor):
+                page = archive.history_page(cursor, page_size=2, request_id=self.request.pk)
+                self.assertEqual([entry.pk for entry in page], first)
+
+    def test_view(self):
+        self.client.force_login(self.manager)
+        url = reverse('gearguard:equipment_history', args=[self.equipment.pk])
+        response = self.client.get(url)
+        self.assertEqual([item['id'] for item in response.json()['results']], self.expected)
+
+        url = reverse('gearguard:request_history', args=[self.request.pk])
+        with mock.patch.object(views, 'HISTORY_PAGE_SIZE', 4):
+            first = self.client.get(url).json()
+            second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+            self.assertEqual(self.client.get(url, {'cursor': 'not base64!'}).json()['results'], first['results'])
+        self.assertEqual([item['id'] for item in first['results'] + second['results']], self.expected[:8])
+
+        for name in ('request_history', 'equipment_history'):
+            response = self.client.get(reverse(f'gearguard:{name}', args=[self.request.pk + 1000]))
+            self.assertEqual(response.status_code, 404)
@@ -0,0 +1,266 @@
+"""
+Stage transitions for maintenance requests with optimistic concurrency.
+
+A transition is a single conditional ``UPDATE ... WHERE stage = <expected>``
+followed by the log insert, in one short transaction. Nothing is read before
+the UPDATE, so on SQLite the transaction takes the write lock with its first
+statement instead of upgrading a read lock (the usual source of "database is
+locked"), and elsewhere the row lock is held only for the few statements
+that follow. If someone else moved the request first, the UPDATE matches no
+row and the caller gets a TransitionConflict instead of silently overwriting
+their change.
+"""
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import caching, events, tasks
+from .models import Equipment, MaintenanceLog, MaintenanceRequest, TeamMember
+
+STAGES = dict(MaintenanceRequest.STAGE_CHOICES)
+
+
+class TransitionConflict(Exception):
+    """The request is no longer in the stage the caller expected"""
+
+    def __init__(self, current_stage):
+        super().__init__(f'Request is now in stage {current_stage!r}')
+        self.current_stage = current_stage
+
+
+def transition_stage(request_id, expected_stage, new_stage, user):
+    """
+    Move request `request_id` from `expected_stage` to `new_stage`, applying
+    the same side effects as MaintenanceRequest.save() and logging the change.
+    Returns the updated fields as a dict.
+
+    Raises ValueError for an unknown stage, MaintenanceRequest.DoesNotExist
+    if the request is gone and TransitionConflict if its stage has changed.
+    """
+    if new_stage not in STAGES or expected_stage not in STAGES:
+        raise ValueError('Invalid stage')
+    if new_stage == expected_stage:
+        return _unchanged(request_id, expected_stage)
+
+    now = timezone.now()
+    changes = {'stage': new_stage, 'updated_at': now}
+    # Auto-assign if moving to in_progress and not assigned
+    if new_stage == 'in_progress' and user is not None:
+        changes['assigned_to'] = Coalesce(F('assigned_to'), Value(user.pk), output_field=models.IntegerField())
+    # Set completed date if moved to repaired
+    if new_stage == 'repaired':
+        changes['completed_date'] = Coalesce(F('completed_date'), Value(now))
+
+    with transaction.atomic():
+        updated = MaintenanceRequest.objects.filter(pk=request_id, stage=expected_stage).update(**changes)
+        if not updated:
+            current_stage = (
+                MaintenanceRequest.objects.filter(pk=request_id).values_list('stage', flat=True).first()
+            )
+            if current_stage is None:
+                raise MaintenanceRequest.DoesNotExist(f'No maintenance request {request_id}')
+            raise TransitionConflict(current_stage)
+
+        row = MaintenanceRequest.objects.filter(pk=request_id).values(
+            'equipment_id', 'maintenance_team_id', 'priority', 'created_at',
+            'assigned_to_id', 'completed_date',
+        ).get()
+        state = {key: row[key] for key in ('equipment_id', 'maintenance_team_id', 'priority', 'created_at')}
+        MaintenanceRequest.apply_state_change(
+            {**state, 'stage': expected_stage},
+            {**state, 'stage': new_stage},
+        )
+
+        # Handle scrap logic
+        if new_stage == 'scrap':
+            Equipment.objects.filter(pk=row['equipment_id'], is_scrapped=False).update(
+                is_scrapped=True, scrapped_date=now, updated_at=now
+            )
+
+        MaintenanceLog.objects.create(
+            request_id=request_id,
+            equipment_id=row['equipment_id'],
+            user=user,
+            action_code=MaintenanceLog.STAGE_CHANGED,
+            from_stage=expected_stage,
+            to_stage=new_stage,
+        )
+        # The UPDATE bypasses save(), so the post_save signal receivers never run
+        caching.bump_on_commit([row['maintenance_team_id']])
+        events.publish_card_on_commit(request_id, expected_stage, row['maintenance_team_id'])
+
+    return {
+        'id': request_id,
+        'stage': new_stage,
+        'assigned_to_id': row['assigned_to_id'],
+        'completed_date': row['completed_date'],
+    }
+
+
+def _unchanged(request_id, stage):
+    """
+    A card dropped back on its own column: check the stage as a transition
+    would, but write, log and publish nothing.
+    """
+    row = MaintenanceRequest.objects.filter(pk=request_id).values(
+        'stage', 'assigned_to_id', 'completed_date',
+    ).first()
+    if row is None:
+        raise MaintenanceRequest.DoesNotExist(f'No maintenance request {request_id}')
+    if row['stage'] != stage:
+        raise TransitionConflict(row['stage'])
+    return {
+        'id': request_id,
+        'stage': stage,
+        'assigned_to_id': row['assigned_to_id'],
+        'completed_date': row['completed_date'],
+    }
+
+
+MAX_BATCH_SIZE = 500
+
+
+def apply_batch(operations, user):
+    """
+    Apply many stage changes and reassignments in one transaction.
+
+    Each operation is a dict with ``id`` and at least one of ``stage`` and
+    ``assigned_to`` (a technician's user id, or None to unassign), plus an
+    optional ``expected_stage`` for the same conflict check as
+    transition_stage(). Rows are locked and read once, written back with a
+    single bulk_update() and logged with a single bulk_create(). Operations
+    that would leave a request as it is are reported as ``unchanged`` and
+    write nothing. Returns one result dict per operation, in order; failed
+    items don't stop the rest.
+    """
+    results = [None] * len(operations)
+    technicians = {}
+    if any('assigned_to' in operation for operation in operations if isinstance(operation, dict)):
+        technicians = dict(TeamMember.objects.values_list('user_id', 'user__username').distinct())
+
+    valid = []
+    for index, operation in enumerate(operations):
+        error = _validate(operation, technicians)
+        if error:
+            request_id = operation.get('id') if isinstance(operation, dict) else None
+            results[index] = {'id': request_id, 'status': 'invalid', 'message': error}
+        else:
+            valid.append((index, operation))
+    if not valid:
+        return results
+
+    now = timezone.now()
+    with transaction.atomic():
+        requests = MaintenanceRequest.objects.select_for_update().in_bulk(
+            {operation['id'] for _, operation in valid}
+        )
+        changed = {}
+        state_changes = []
+        logs = []
+        assignments = []
+        scrapped = set()
+        for index, operation in valid:
+            item = requests.get(operation['id'])
+            if item is None:
+                results[index] = {'id': operation['id'], 'status': 'not_found', 'message': 'No maintenance request found'}
+                continue
+            expected_stage = operation.get('expected_stage')
+            if expected_stage and item.stage != expected_stage:
+                results[index] = {
+                    'id': item.pk,
+                    'status': 'conflict',
+                    'message': 'This request was moved by someone else',
+                    'current_stage': item.stage,
+                }
+                continue
+
+            old_stage = item.stage
+            new_stage = operation.get('stage', old_stage)
+            reassign = 'assigned_to' in operation and operation['assigned_to'] != item.assigned_to_id
+            if new_stage == old_stage and not reassign:
+                # Already in the requested state: nothing to write, log or publish
+                results[index] = {
+                    'id': item.pk,
+                    'status': 'unchanged',
+                    'stage': item.stage,
+                    'assigned_to': item.assigned_to_id,
+                }
+                continue
+
+            before = item.get_tracked_state()
+            if new_stage != old_stage:
+                item.stage = new_stage
+                logs.append(MaintenanceLog(
+                    request_id=item.pk, equipment_id=item.equipment_id, user=user,
+                    action_code=MaintenanceLog.STAGE_CHANGED,
+                    from_stage=old_stage, to_stage=new_stage, timestamp=now,
+                ))
+            if reassign:
+                item.assigned_to_id = operation['assigned_to']
+                assignments.append((item.pk, item.assigned_to_id))
+                logs.append(MaintenanceLog(
+                    request_id=item.pk, equipment_id=item.equipment_id, user=user,
+                    action_code=MaintenanceLog.REASSIGNED,
+                    notes=f"Assigned to {technicians.get(item.assigned_to_id, 'nobody')}", timestamp=now,
+                ))
+            elif 'assigned_to' not in operation and new_stage == 'in_progress' and not item.assigned_to_id and user is not None:
+                # Auto-assign if moving to in_progress and not assigned
+                item.assigned_to_id = user.pk
+            if new_stage == 'repaired' and not item.completed_date:
+                item.completed_date = now
+            if new_stage == 'scrap':
+                scrapped.add(item.equipment_id)
+
+            item.updated_at = now
+            state_changes.append((before, item.get_tracked_state()))
+            events.publish_card_on_commit(item.pk, old_stage, before['maintenance_team_id'])
+            changed[item.pk] = item
+            results[index] = {
+                'id': item.pk,
+                'status': 'updated',
+                'stage': item.stage,
+                'assigned_to': item.assigned_to_id,
+            }
+
+        MaintenanceRequest.objects.bulk_update(
+            list(changed.values()), ['stage', 'assigned_to', 'completed_date', 'updated_at']
+        )
+        MaintenanceRequest.apply_state_changes(
+            [(before, after) for before, after in state_changes if before != after]
+        )
+        if scrapped:
+            Equipment.objects.filter(pk__in=scrapped, is_scrapped=False).update(
+                is_scrapped=True, scrapped_date=now, updated_at=now
+            )
+        MaintenanceLog.objects.bulk_create(logs)
+        if assignments:
+            tasks.enqueue('notify_assignments', user.pk if user else None, assignments)
+        if state_changes:
+            caching.bump_on_commit({after['maintenance_team_id'] for _, after in state_changes})
+
+    for item in changed.values():
+        item._loaded_state = item.get_tracked_state()
+    return results
+
+
+def _validate(operation, technicians):
+    """Error message for a malformed batch operation, or None"""
+    if not isinstance(operation, dict):
+        return 'Expected an object'
+    # JSON true and false decode to bools, which are ints too
+    if not isinstance(operation.get('id'), int) or isinstance(operation['id'], bool):
+        return 'Missing request id'
+    # Out of range for the id column; the database would reject it, not miss it
+    if not 0 < operation['id'] < 2 ** 63:
+        return 'Invalid request id'
+    if 'stage' not in operation and 'assigned_to' not in operation:
+        return 'Nothing to change'
+    if 'stage' in operation and operation['stage'] not in STAGES:
+        return 'Invalid stage'
+    if operation.get('expected_stage') and operation['expected_stage'] not in STAGES:
+        return 'Invalid expected stage'
+    assigned_to = operation.get('assigned_to')
+    if assigned_to is not None and (isinstance(assigned_to, bool) or assigned_to not in technicians):
+        return 'Assignee is not a technician'
+    return None
@@ -9,23 +9,37 @@ urlpatterns = [
     
     # Equipment
     path('equipment/', views.equipment_list, name='equipment_list'),
+    path('equipment/api/', views.equipment_list_api, name='equipment_list_api'),
+    path('equipment/autocomplete/', views.equipment_autocomplete, name='equipment_autocomplete'),
     path('equipment/<int:pk>/', views.equipment_detail, name='equipment_detail'),
     path('equipment/create/', views.equipment_create, name='equipment_create'),
+    path('equipment/import/', views.bulk_import, name='bulk_import'),
     path('equipment/<int:pk>/update/', views.equipment_update, name='equipment_update'),
     path('equipment/<int:pk>/details/', views.get_equipment_details, name='get_equipment_details'),
+    path('equipment/<int:pk>/history/', views.equipment_history, name='equipment_history'),
     
     # Maintenance Requests
     path('kanban/', views.kanban_board, name='kanban_board'),
+    path('kanban/column/<str:stage>/', views.kanban_column, name='kanban_column'),
+    path('kanban/events/', views.kanban_events, name='kanban_events'),
     path('requests/create/', views.request_create, name='request_create'),
     path('requests/<int:pk>/update/', views.request_update, name='request_update'),
     path('requests/<int:pk>/update-stage/', views.request_update_stage, name='request_update_stage'),
+    path('requests/<int:pk>/history/', views.request_history, name='request_history'),
+    path('requests/batch-update/', views.request_batch_update, name='request_batch_update'),
     
     # Calendar
     path('calendar/', views.calendar_view, name='calendar_view'),
+    path('calendar/events/', views.calendar_events, name='calendar_events'),
     
     # Reporting
     path('reporting/', views.reporting, name='reporting'),
+    path('reporting/api/', views.reporting_api, name='reporting_api'),
+    path('export/<str:kind>/', views.export_data, name='export_data'),
     
     # Teams
     path('teams/', views.teams_list, name='teams_list'),
+    
+    # Search
+    path('search/', views.search_view, name='search'),
 ]
\ No newline at end of file
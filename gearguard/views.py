@@ -1,100 +1,175 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db.models import Count, Q
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Count, Max, Q
 from django.utils import timezone
-from datetime import timedelta
-from .models import Equipment, MaintenanceRequest, MaintenanceTeam, TeamMember, MaintenanceLog
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.dateparse import parse_date
+from .models import Equipment, MaintenanceRequest, MaintenanceTeam, TeamMember
 from .forms import EquipmentForm, MaintenanceRequestForm
+from . import analytics, archive, caching, events, exports, health, importers, search, tasks, transitions
+from .pagination import cached_count, keyset_page
+import io
 import json
+from datetime import timedelta
 
 @login_required
 def dashboard(request):
     """Main dashboard view"""
-    # Critical equipment (high maintenance requests)
-    critical_equipment = Equipment.objects.annotate(
-        request_count=Count('maintenance_requests', 
-            filter=Q(maintenance_requests__created_at__gte=timezone.now()-timedelta(days=30))
-        )
-    ).filter(request_count__gte=3, is_scrapped=False).order_by('-request_count')[:5]
+    today = timezone.now().date()
+    stats = caching.fragment(f'dashboard:{today}', lambda: _dashboard_stats(today))
+    technician_stats = caching.fragment(
+        f'technician_stats:{request.user.pk}', lambda: _technician_stats(request.user)
+    )
+    
+    context = {
+        **stats,
+        'technician_stats': technician_stats,
+        'today': today,
+    }
+    return render(request, 'gearguard/dashboard.html', context)
+
+
+def _dashboard_stats(today):
+    # Critical equipment (high maintenance requests), from the daily request buckets
+    critical_equipment = health.critical_equipment(limit=5, threshold=3)
     
     # Open requests stats
-    open_requests = MaintenanceRequest.objects.exclude(stage__in=['repaired', 'scrap'])
+    open_requests = MaintenanceRequest.objects.filter(stage__in=MaintenanceRequest.OPEN_STAGES)
     pending_requests = open_requests.filter(stage='new').count()
-    overdue_requests = open_requests.filter(scheduled_date__lt=timezone.now().date()).count()
-    
-    # Technician utilization (for current user if they're a technician)
-    user_team_membership = TeamMember.objects.filter(user=request.user).first()
-    technician_stats = None
-    if user_team_membership:
-        assigned_count = MaintenanceRequest.objects.filter(
-            assigned_to=request.user,
-            stage__in=['new', 'in_progress']
-        ).count()
-        total_assigned = MaintenanceRequest.objects.filter(assigned_to=request.user).count()
-        if total_assigned > 0:
-            technician_stats = {
-                'assigned': assigned_count,
-                'total': total_assigned,
-                'utilization': round((assigned_count / total_assigned) * 100) if total_assigned else 0
-            }
+    overdue_requests = open_requests.filter(scheduled_date__lt=today).count()
     
     # Recent requests
-    recent_requests = MaintenanceRequest.objects.select_related(
+    recent_requests = list(MaintenanceRequest.objects.select_related(
         'equipment', 'assigned_to', 'maintenance_team'
-    ).order_by('-created_at')[:10]
+    ).order_by('-created_at')[:10])
     
-    context = {
+    return {
         'critical_equipment': critical_equipment,
         'pending_requests': pending_requests,
         'overdue_requests': overdue_requests,
-        'technician_stats': technician_stats,
         'recent_requests': recent_requests,
-        'today': timezone.now().date(),
     }
-    return render(request, 'gearguard/dashboard.html', context)
 
 
-@login_required
-def equipment_list(request):
-    """List all equipment"""
-    equipment = Equipment.objects.filter(is_scrapped=False).select_related(
-        'maintenance_team', 'assigned_employee', 'default_technician'
-    )
+def _technician_stats(user):
+    """Utilization for the current user if they're a technician"""
+    if not TeamMember.objects.filter(user=user).exists():
+        return None
+    
+    assigned_count = MaintenanceRequest.objects.filter(
+        assigned_to=user,
+        stage__in=MaintenanceRequest.OPEN_STAGES
+    ).count()
+    total_assigned = MaintenanceRequest.objects.filter(assigned_to=user).count()
+    if total_assigned > 0:
+        return {
+            'assigned': assigned_count,
+            'total': total_assigned,
+            'utilization': round((assigned_count / total_assigned) * 100) if total_assigned else 0
+        }
+    return None
+
+
+EQUIPMENT_PAGE_SIZE = 50
+EQUIPMENT_ORDERING = ('name', 'id')
+
+
+def _filtered_equipment(request):
+    """Non-scrapped equipment narrowed by the list filters in the query string"""
+    equipment = Equipment.objects.filter(is_scrapped=False)
     
     # Filters
-    category = request.GET.get('category')
-    department = request.GET.get('department')
-    team = request.GET.get('team')
-    search = request.GET.get('search')
+    filters = {
+        'category': request.GET.get('category'),
+        'department': request.GET.get('department'),
+        'team': request.GET.get('team'),
+        'search': request.GET.get('search'),
+    }
     
-    if category:
-        equipment = equipment.filter(category=category)
-    if department:
-        equipment = equipment.filter(department=department)
-    if team:
-        equipment = equipment.filter(maintenance_team_id=team)
-    if search:
-        equipment = equipment.filter(
-            Q(name__icontains=search) | 
-            Q(serial_number__icontains=search) |
-            Q(location__icontains=search)
-        )
+    if filters['category']:
+        equipment = equipment.filter(category=filters['category'])
+    if filters['department']:
+        equipment = equipment.filter(department=filters['department'])
+    if filters['team'] and filters['team'].isdigit():
+        equipment = equipment.filter(maintenance_team_id=filters['team'])
+    if filters['search']:
+        equipment = search.filter_equipment(equipment, filters['search'])
+    return equipment, filters
+
+
+@login_required
+def equipment_list(request):
+    """List equipment, one keyset page at a time"""
+    equipment, filters = _filtered_equipment(request)
+    page = keyset_page(
+        equipment.select_related('maintenance_team', 'assigned_employee', 'default_technician'),
+        EQUIPMENT_ORDERING,
+        cursor=request.GET.get('cursor'),
+        page_size=EQUIPMENT_PAGE_SIZE,
+    )
     
     context = {
-        'equipment_list': equipment,
+        'equipment_list': page,
+        'total_count': cached_count(equipment),
+        'next_cursor': page.next_cursor,
         'categories': Equipment.CATEGORY_CHOICES,
         'departments': Equipment.DEPARTMENT_CHOICES,
         'teams': MaintenanceTeam.objects.all(),
-        'selected_category': category,
-        'selected_department': department,
-        'selected_team': team,
-        'search_query': search,
+        'selected_category': filters['category'],
+        'selected_department': filters['department'],
+        'selected_team': filters['team'],
+        'search_query': filters['search'],
     }
     return render(request, 'gearguard/equipment_detail.html', context)
 
 
+@login_required
+def equipment_list_api(request):
+    """JSON page of the equipment list for infinite scroll"""
+    equipment, filters = _filtered_equipment(request)
+    cursor = request.GET.get('cursor')
+    page = keyset_page(
+        equipment.values(
+            'id', 'name', 'serial_number', 'category', 'department', 'location',
+            'maintenance_team_id', 'maintenance_team__name', 'open_requests_count',
+        ),
+        EQUIPMENT_ORDERING,
+        cursor=cursor,
+        page_size=EQUIPMENT_PAGE_SIZE,
+    )
+    
+    data = {
+        'status': 'success',
+        'results': [
+            {
+                'id': item['id'],
+                'name': item['name'],
+                'serial_number': item['serial_number'],
+                'category': item['category'],
+                'department': item['department'],
+                'location': item['location'],
+                'maintenance_team': item['maintenance_team_id'],
+                'maintenance_team_name': item['maintenance_team__name'] or '',
+                'open_requests_count': item['open_requests_count'],
+            }
+            for item in page
+        ],
+        'next_cursor': page.next_cursor,
+    }
+    # The total only matters for the first page of a scroll
+    if not cursor:
+        data['count'] = cached_count(equipment)
+    return JsonResponse(data)
+
+
 @login_required
 def equipment_detail(request, pk):
     """Equipment detail with maintenance history"""
@@ -118,7 +193,7 @@ def equipment_create(request):
         if form.is_valid():
             equipment = form.save()
             messages.success(request, f'Equipment {equipment.name} created successfully!')
-            return redirect('equipment_detail', pk=equipment.pk)
+            return redirect('gearguard:equipment_detail', pk=equipment.pk)
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -127,6 +202,29 @@ def equipment_create(request):
     return render(request, 'gearguard/equipment_form.html', {'form': form, 'action': 'Create'})
 
 
+@login_required
+def bulk_import(request):
+    """API endpoint to bulk import equipment or requests from an uploaded CSV/JSONL file"""
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
+    
+    kind = request.POST.get('kind', 'equipment')
+    upload = request.FILES.get('file')
+    if kind not in importers.IMPORTERS:
+        return JsonResponse({'status': 'error', 'message': 'Invalid kind'}, status=400)
+    if not upload:
+        return JsonResponse({'status': 'error', 'message': 'No file uploaded'}, status=400)
+    
+    fmt = request.POST.get('format') or importers.detect_format(upload.name)
+    if fmt not in importers.FORMATS:
+        return JsonResponse({'status': 'error', 'message': 'Invalid format'}, status=400)
+    
+    # Decode the upload as a stream rather than reading it into memory
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+    result = importers.run_import(kind, stream, fmt, user=request.user)
+    return JsonResponse({'status': 'success', **result.as_dict()})
+
+
 @login_required
 def equipment_update(request, pk):
     """Update equipment"""
@@ -136,7 +234,7 @@ def equipment_update(request, pk):
         if form.is_valid():
             form.save()
             messages.success(request, f'Equipment {equipment.name} updated successfully!')
-            return redirect('equipment_detail', pk=equipment.pk)
+            return redirect('gearguard:equipment_detail', pk=equipment.pk)
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -149,38 +247,118 @@ def equipment_update(request, pk):
     })
 
 
+KANBAN_PAGE_SIZE = 20
+
+# stage: (label, icon, empty text, keyset ordering)
+KANBAN_COLUMNS = {
+    'new': ('New', 'fa-inbox', 'No new requests', ('-priority_rank', '-created_at', '-id')),
+    'in_progress': ('In Progress', 'fa-spinner', 'No requests in progress', ('-priority_rank', '-created_at', '-id')),
+    'repaired': ('Repaired', 'fa-check-circle', 'No repaired items', ('-updated_at', '-id')),
+    'scrap': ('Scrap', 'fa-times-circle', 'No scrapped items', ('-updated_at', '-id')),
+}
+
+
+def _kanban_requests(request):
+    """Requests for the selected team, or the user's own team by default"""
+    team_filter = request.GET.get('team')
+    
+    requests_qs = MaintenanceRequest.objects.all()
+    team_id = None
+    
+    if team_filter and team_filter.isdigit():
+        team_id = int(team_filter)
+    elif not team_filter:
+        # Get user's team if they're a technician
+        team_id = TeamMember.objects.filter(user=request.user).values_list('team_id', flat=True).first()
+    if team_id:
+        requests_qs = requests_qs.filter(maintenance_team_id=team_id)
+    
+    return requests_qs, team_filter, team_id
+
+
+def _kanban_page(requests_qs, stage, cursor=None):
+    return keyset_page(
+        requests_qs.filter(stage=stage).select_related('equipment', 'assigned_to'),
+        KANBAN_COLUMNS[stage][3],
+        cursor=cursor,
+        page_size=KANBAN_PAGE_SIZE,
+    )
+
+
 @login_required
 def kanban_board(request):
     """Kanban board for maintenance requests"""
-    team_filter = request.GET.get('team')
+    requests_qs, team_filter, team_id = _kanban_requests(request)
     
-    requests_qs = MaintenanceRequest.objects.select_related(
-        'equipment', 'assigned_to', 'maintenance_team'
+    # All column counts in one grouped query, cached until the team's requests change
+    counts = caching.fragment(
+        f'kanban_counts:{team_id or "all"}',
+        lambda: dict(requests_qs.order_by().values_list('stage').annotate(count=Count('id'))),
+        team=team_id,
     )
     
-    if team_filter:
-        requests_qs = requests_qs.filter(maintenance_team_id=team_filter)
-    else:
-        # Get user's team if they're a technician
-        user_team = TeamMember.objects.filter(user=request.user).first()
-        if user_team:
-            requests_qs = requests_qs.filter(maintenance_team=user_team.team)
-    
-    requests = {
-        'new': requests_qs.filter(stage='new').order_by('-priority', '-created_at'),
-        'in_progress': requests_qs.filter(stage='in_progress').order_by('-priority', '-created_at'),
-        'repaired': requests_qs.filter(stage='repaired').order_by('-completed_date')[:20],  # Limit repaired
-        'scrap': requests_qs.filter(stage='scrap').order_by('-updated_at')[:10],  # Limit scrap
-    }
+    columns = []
+    for stage, (label, icon, empty_text, ordering) in KANBAN_COLUMNS.items():
+        page = _kanban_page(requests_qs, stage) if counts.get(stage) else None
+        columns.append({
+            'stage': stage,
+            'label': label,
+            'icon': icon,
+            'empty_text': empty_text,
+            'count': counts.get(stage, 0),
+            'cards': page.items if page else [],
+            'next_cursor': page.next_cursor if page else None,
+        })
     
     context = {
-        'requests': requests,
+        'columns': columns,
         'teams': MaintenanceTeam.objects.all(),
         'selected_team': team_filter,
+        'team_id': team_id,
     }
     return render(request, 'gearguard/kanban_board.html', context)
 
 
+@login_required
+def kanban_column(request, stage):
+    """Next page of cards in one Kanban column, for lazy loading on scroll"""
+    if stage not in KANBAN_COLUMNS:
+        return JsonResponse({'status': 'error', 'message': 'Invalid stage'}, status=404)
+    
+    requests_qs, team_filter, team_id = _kanban_requests(request)
+    page = _kanban_page(requests_qs, stage, cursor=request.GET.get('cursor'))
+    
+    return JsonResponse({
+        'status': 'success',
+        'stage': stage,
+        'ids': [card.id for card in page],
+        'html': render_to_string('gearguard/kanban_cards.html', {'cards': page.items}, request=request),
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+async def kanban_events(request):
+    """
+    Server-Sent Events stream of Kanban card changes for one team (?team=<id>)
+    or all teams. Needs an ASGI server: under WSGI the stream would hold a
+    worker thread for as long as the board is open.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'status': 'error', 'message': 'Live updates need an ASGI server'}, status=501)
+    
+    team = request.GET.get('team')
+    if team and not team.isdigit():
+        return JsonResponse({'status': 'error', 'message': 'Invalid team'}, status=400)
+    
+    subscription = events.subscribe(int(team) if team else None, request.headers.get('Last-Event-ID'))
+    response = StreamingHttpResponse(events.stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @login_required
 def request_create(request):
     """Create maintenance request"""
@@ -189,18 +367,17 @@ def request_create(request):
         if form.is_valid():
             maintenance_request = form.save(commit=False)
             maintenance_request.created_by = request.user
-            maintenance_request.save()
-            
-            # Log creation
-            MaintenanceLog.objects.create(
-                request=maintenance_request,
-                user=request.user,
-                action='Request created',
-                notes=f'Initial request: {maintenance_request.subject}'
-            )
+            with transaction.atomic():
+                maintenance_request.save()
+                
+                # Log creation and notify the assignee in the background
+                tasks.enqueue(
+                    'request_created', maintenance_request.pk, request.user.pk,
+                    maintenance_request.subject, maintenance_request.assigned_to_id, timezone.now(),
+                )
             
             messages.success(request, 'Maintenance request created successfully!')
-            return redirect('kanban_board')
+            return redirect('gearguard:kanban_board')
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -229,39 +406,33 @@ def request_update(request, pk):
     """Update maintenance request"""
     maintenance_request = get_object_or_404(MaintenanceRequest, pk=pk)
     old_stage = maintenance_request.stage
-    old_assigned = maintenance_request.assigned_to
+    old_assigned_id = maintenance_request.assigned_to_id
     
     if request.method == 'POST':
         form = MaintenanceRequestForm(request.POST, instance=maintenance_request)
         if form.is_valid():
-            updated_request = form.save()
-            
-            # Log changes
-            changes = []
-            if old_stage != updated_request.stage:
-                changes.append(f'Stage: {old_stage} → {updated_request.stage}')
-            if old_assigned != updated_request.assigned_to:
-                old_name = old_assigned.get_full_name() if old_assigned else 'Unassigned'
-                new_name = updated_request.assigned_to.get_full_name() if updated_request.assigned_to else 'Unassigned'
-                changes.append(f'Assigned: {old_name} → {new_name}')
-            
-            if changes:
-                MaintenanceLog.objects.create(
-                    request=updated_request,
-                    user=request.user,
-                    action='Request updated',
-                    notes=', '.join(changes)
-                )
+            with transaction.atomic():
+                updated_request = form.save()
+                
+                # Log changes and notify a new assignee in the background
+                if old_stage != updated_request.stage or old_assigned_id != updated_request.assigned_to_id:
+                    tasks.enqueue(
+                        'request_updated', updated_request.pk, request.user.pk, timezone.now(),
+                        old_stage, updated_request.stage, old_assigned_id, updated_request.assigned_to_id,
+                    )
             
             messages.success(request, 'Maintenance request updated successfully!')
-            return redirect('kanban_board')
+            return redirect('gearguard:kanban_board')
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
         form = MaintenanceRequestForm(instance=maintenance_request)
     
-    # Get logs for this request
-    logs = maintenance_request.logs.all()[:10]
+    # Latest log entries; older ones are loaded from request_history
+    logs = archive.history_page(page_size=REQUEST_FORM_LOG_COUNT, request_id=maintenance_request.pk)
+    user_names = _history_user_names(logs)
+    for log in logs:
+        log.user_name = user_names.get(log.user_id)
     
     return render(request, 'gearguard/request_form.html', {
         'form': form,
@@ -271,172 +442,290 @@ def request_update(request, pk):
     })
 
 
+REQUEST_FORM_LOG_COUNT = 10
+HISTORY_PAGE_SIZE = 50
+
+
+def _history_user_names(entries):
+    """{user id: display name} for the authors of some log entries"""
+    user_ids = {entry.user_id for entry in entries if entry.user_id}
+    if not user_ids:
+        return {}
+    users = User.objects.filter(pk__in=user_ids).only('username', 'first_name', 'last_name')
+    return {user.pk: user.get_full_name() or user.username for user in users}
+
+
+def _history_response(page, with_requests=False):
+    """JSON page of log entries from archive.history_page()"""
+    user_names = _history_user_names(page)
+    subjects = {}
+    if with_requests:
+        subjects = dict(
+            MaintenanceRequest.objects.filter(pk__in={entry.request_id for entry in page})
+            .values_list('pk', 'subject')
+        )
+    
+    results = []
+    for entry in page:
+        item = {
+            'id': entry.id,
+            'timestamp': entry.timestamp,
+            'action_code': entry.action_code,
+            'action': entry.action,
+            'from_stage': entry.from_stage or None,
+            'to_stage': entry.to_stage or None,
+            'notes': entry.notes,
+            'details': entry.details,
+            'user_id': entry.user_id,
+            'user': user_names.get(entry.user_id),
+        }
+        if with_requests:
+            # Archived entries can outlive their request
+            item['request_id'] = entry.request_id
+            item['request_subject'] = subjects.get(entry.request_id)
+        results.append(item)
+    
+    return JsonResponse({'status': 'success', 'results': results, 'next_cursor': page.next_cursor})
+
+
 @login_required
-def request_update_stage(request, pk):
+def request_history(request, pk):
+    """JSON page of a request's activity log, newest first; ?cursor= continues it"""
+    if not MaintenanceRequest.objects.filter(pk=pk).exists():
+        return JsonResponse({'status': 'error', 'message': 'Maintenance request not found'}, status=404)
+    page = archive.history_page(request.GET.get('cursor'), HISTORY_PAGE_SIZE, request_id=pk)
+    return _history_response(page)
+
+
+@login_required
+def equipment_history(request, pk):
+    """JSON page of the activity on all of an equipment's requests, newest first"""
+    if not Equipment.objects.filter(pk=pk).exists():
+        return JsonResponse({'status': 'error', 'message': 'Equipment not found'}, status=404)
+    page = archive.history_page(request.GET.get('cursor'), HISTORY_PAGE_SIZE, equipment_id=pk)
+    return _history_response(page, with_requests=True)
+
+
+@login_required
+async def request_update_stage(request, pk):
     """API endpoint to update request stage (for drag & drop)"""
     if request.method == 'POST':
-        maintenance_request = get_object_or_404(MaintenanceRequest, pk=pk)
         new_stage = request.POST.get('stage')
+        if new_stage not in dict(MaintenanceRequest.STAGE_CHOICES):
+            return JsonResponse({'status': 'error', 'message': 'Invalid stage'}, status=400)
         
-        if new_stage in dict(MaintenanceRequest.STAGE_CHOICES):
-            old_stage = maintenance_request.stage
-            maintenance_request.stage = new_stage
-            
-            # Auto-assign if moving to in_progress and not assigned
-            if new_stage == 'in_progress' and not maintenance_request.assigned_to:
-                maintenance_request.assigned_to = request.user
-            
-            # Set completed date if moved to repaired
-            if new_stage == 'repaired' and not maintenance_request.completed_date:
-                maintenance_request.completed_date = timezone.now()
-            
-            maintenance_request.save()
-            
-            # Log the change
-            MaintenanceLog.objects.create(
-                request=maintenance_request,
-                user=request.user,
-                action=f'Stage changed',
-                notes=f'From {old_stage} to {new_stage}'
-            )
-            
+        # The stage the client saw; older clients that don't send it get
+        # the current stage, which still guards the write itself
+        expected_stage = request.POST.get('expected_stage')
+        if not expected_stage:
+            expected_stage = await MaintenanceRequest.objects.filter(pk=pk).values_list('stage', flat=True).afirst()
+            if expected_stage is None:
+                raise Http404('No maintenance request found')
+        
+        try:
+            # The ORM has no async transactions; the whole transition runs in
+            # one hop to the sync thread
+            await sync_to_async(transitions.transition_stage)(pk, expected_stage, new_stage, await request.auser())
+        except ValueError as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+        except MaintenanceRequest.DoesNotExist:
+            raise Http404('No maintenance request found')
+        except transitions.TransitionConflict as e:
             return JsonResponse({
-                'status': 'success', 
-                'message': 'Stage updated',
-                'new_stage': new_stage
-            })
+                'status': 'error',
+                'message': 'This request was moved by someone else',
+                'current_stage': e.current_stage,
+            }, status=409)
         
-        return JsonResponse({'status': 'error', 'message': 'Invalid stage'}, status=400)
+        return JsonResponse({
+            'status': 'success', 
+            'message': 'Stage updated',
+            'new_stage': new_stage
+        })
     
     return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
 
 
 @login_required
-def calendar_view(request):
-    """Calendar view for preventive maintenance"""
-    # Get all preventive maintenance requests
+def request_batch_update(request):
+    """API endpoint to change the stage and/or assignee of many requests at once"""
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Invalid method'}, status=405)
+    
+    try:
+        operations = json.loads(request.body).get('operations')
+    except (ValueError, AttributeError):
+        operations = None
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({'status': 'error', 'message': 'Expected a JSON body with an operations list'}, status=400)
+    if len(operations) > transitions.MAX_BATCH_SIZE:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'At most {transitions.MAX_BATCH_SIZE} operations per batch'
+        }, status=400)
+    
+    results = transitions.apply_batch(operations, request.user)
+    return JsonResponse({
+        'status': 'success',
+        'updated': sum(1 for result in results if result['status'] == 'updated'),
+        'results': results,
+    })
+
+
+CALENDAR_MAX_RANGE = timedelta(days=400)
+
+# Event colours by stage; open requests past their date are shown as overdue
+CALENDAR_COLORS = {
+    'repaired': '#28a745',
+    'overdue': '#dc3545',
+    'in_progress': '#17a2b8',
+    'default': '#3788d8',
+}
+
+
+@login_required
+async def calendar_view(request):
+    """Calendar view for preventive maintenance; events are fetched per visible range"""
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return await calendar_events(request)
+    # Context processors read request.user lazily, which must happen off the event loop
+    return await sync_to_async(render)(request, 'gearguard/calendar.html')
+
+
+def _calendar_date(value):
+    """Date part of a FullCalendar range bound (a date or an ISO datetime)"""
+    try:
+        return parse_date((value or '')[:10])
+    except ValueError:
+        return None
+
+
+@login_required
+async def calendar_events(request):
+    """
+    Preventive maintenance events scheduled in [start, end) as FullCalendar
+    JSON. Revalidation is answered with 304 while nothing in the range changed.
+    """
+    start = _calendar_date(request.GET.get('start'))
+    end = _calendar_date(request.GET.get('end'))
+    if not start or not end or end < start:
+        return JsonResponse({'status': 'error', 'message': 'start and end dates are required'}, status=400)
+    if end - start > CALENDAR_MAX_RANGE:
+        return JsonResponse({'status': 'error', 'message': 'Date range too large'}, status=400)
+    
     preventive_requests = MaintenanceRequest.objects.filter(
-        request_type='preventive'
-    ).select_related('equipment', 'assigned_to')
+        request_type='preventive',
+        scheduled_date__gte=start,
+        scheduled_date__lt=end,
+    ).order_by()
     
-    # Filter by date range if provided (for FullCalendar AJAX)
-    start_date = request.GET.get('start')
-    end_date = request.GET.get('end')
+    # Overdue colouring depends on today, so it is part of the validator too
+    today = timezone.now().date()
+    state = await preventive_requests.aaggregate(last_modified=Max('updated_at'), count=Count('id'))
+    changed = state['last_modified']
+    # Last-Modified only has whole seconds; the ETag keeps full precision so
+    # two edits within one second still revalidate. The count catches
+    # deletions, which leave max(updated_at) unchanged.
+    last_modified = int(changed.timestamp()) if changed else None
+    etag = f'"{start}:{end}:{today}:{state["count"]}:{changed.isoformat() if changed else 0}"'
     
-    if start_date and end_date:
-        preventive_requests = preventive_requests.filter(
-            scheduled_date__range=[start_date, end_date]
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        # values() rather than values_list(): its iterator is lazy, so
+        # aiterator() runs the query in the sync thread, not on the event loop
+        rows = preventive_requests.order_by('scheduled_date', 'id').values(
+            'id', 'subject', 'scheduled_date', 'stage', 'priority', 'equipment__name',
+            'assigned_to_id', 'assigned_to__first_name', 'assigned_to__last_name',
         )
-    
-    # Convert to calendar event format
-    events = []
-    for req in preventive_requests:
-        if req.scheduled_date:
-            # Determine color based on stage and overdue status
-            if req.stage == 'repaired':
-                bg_color = '#28a745'
-                border_color = '#28a745'
-            elif req.is_overdue():
-                bg_color = '#dc3545'
-                border_color = '#dc3545'
-            elif req.stage == 'in_progress':
-                bg_color = '#17a2b8'
-                border_color = '#17a2b8'
+        events = []
+        async for row in rows.aiterator():
+            stage = row['stage']
+            if stage == 'repaired':
+                color = CALENDAR_COLORS['repaired']
+            elif stage != 'scrap' and row['scheduled_date'] < today:
+                color = CALENDAR_COLORS['overdue']
             else:
-                bg_color = '#3788d8'
-                border_color = '#3788d8'
+                color = CALENDAR_COLORS.get(stage, CALENDAR_COLORS['default'])
             
+            assignee = f"{row['assigned_to__first_name']} {row['assigned_to__last_name']}".strip()
             events.append({
-                'id': req.id,
-                'title': f"{req.equipment.name}: {req.subject}",
-                'start': req.scheduled_date.isoformat(),
-                'backgroundColor': bg_color,
-                'borderColor': border_color,
-                'url': f'/requests/{req.id}/update/',
+                'id': row['id'],
+                'title': f"{row['equipment__name']}: {row['subject']}",
+                'start': row['scheduled_date'].isoformat(),
+                'backgroundColor': color,
+                'borderColor': color,
+                'url': f"/requests/{row['id']}/update/",
                 'extendedProps': {
-                    'stage': req.stage,
-                    'priority': req.priority,
-                    'assigned_to': req.assigned_to.get_full_name() if req.assigned_to else 'Unassigned'
+                    'stage': stage,
+                    'priority': row['priority'],
+                    'assigned_to': assignee if row['assigned_to_id'] else 'Unassigned'
                 }
             })
+        response = JsonResponse(events, safe=False)
     
-    # If this is an AJAX request for events, return JSON
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return JsonResponse(events, safe=False)
-    
-    context = {
-        'events_json': json.dumps(events),
-    }
-    return render(request, 'gearguard/calendar.html', context)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Let the browser keep the feed but revalidate it on every navigation
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @login_required
 def reporting(request):
-    """Reporting and analytics"""
-    # Requests by team
-    requests_by_team = MaintenanceTeam.objects.annotate(
-        total_requests=Count('requests'),
-        open_requests=Count('requests', filter=Q(requests__stage__in=['new', 'in_progress'])),
-        completed_requests=Count('requests', filter=Q(requests__stage='repaired'))
-    ).order_by('-total_requests')
-    
-    # Requests by equipment category
-    from django.db.models import Value
-    from django.db.models.functions import Coalesce
-    
-    requests_by_category = []
-    for category_code, category_name in Equipment.CATEGORY_CHOICES:
-        count = MaintenanceRequest.objects.filter(equipment__category=category_code).count()
-        if count > 0:
-            requests_by_category.append({
-                'category': category_name,
-                'count': count
-            })
-    requests_by_category.sort(key=lambda x: x['count'], reverse=True)
-    
-    # Requests by priority
-    requests_by_priority = []
-    for priority_code, priority_name in MaintenanceRequest.PRIORITY_CHOICES:
-        count = MaintenanceRequest.objects.filter(priority=priority_code).count()
-        requests_by_priority.append({
-            'priority': priority_name,
-            'count': count
-        })
+    """Reporting and analytics, answered from the pre-aggregated RequestSummary"""
+    context = analytics.summary_report()
+    context['total_equipment'] = Equipment.objects.filter(is_scrapped=False).count()
+    return render(request, 'gearguard/reporting.html', context)
+
+
+@login_required
+def reporting_api(request):
+    """JSON reporting breakdowns with optional date range and team filters"""
+    filters = {}
+    for param in ('start', 'end'):
+        value = request.GET.get(param)
+        if value:
+            try:
+                filters[param] = parse_date(value)
+            except ValueError:
+                filters[param] = None
+            if filters[param] is None:
+                return JsonResponse({'status': 'error', 'message': f'Invalid {param} date'}, status=400)
     
-    # Monthly trend (last 6 months)
-    current_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    last_6_months = []
-    for i in range(6):
-        month = current_month - timedelta(days=30*i)
-        count = MaintenanceRequest.objects.filter(
-            created_at__year=month.year,
-            created_at__month=month.month
-        ).count()
-        last_6_months.append({
-            'month': month.strftime('%B %Y'),
-            'count': count
-        })
-    last_6_months.reverse()
+    team = request.GET.get('team')
+    if team:
+        if not team.isdigit():
+            return JsonResponse({'status': 'error', 'message': 'Invalid team'}, status=400)
+        filters['team'] = int(team)
     
-    # Overall statistics
-    total_equipment = Equipment.objects.filter(is_scrapped=False).count()
-    total_requests = MaintenanceRequest.objects.count()
-    open_requests = MaintenanceRequest.objects.exclude(stage__in=['repaired', 'scrap']).count()
-    avg_resolution_time = MaintenanceRequest.objects.filter(
-        stage='repaired',
-        duration_hours__isnull=False
-    ).aggregate(avg=Count('duration_hours'))
+    return JsonResponse({
+        'status': 'success',
+        'data': analytics.request_report(**filters),
+    })
+
+
+@login_required
+def export_data(request, kind):
+    """Stream a CSV or JSON Lines export with optional date range, team and stage filters"""
+    if kind not in exports.EXPORTS:
+        return JsonResponse({'status': 'error', 'message': 'Invalid export'}, status=404)
     
-    context = {
-        'requests_by_team': requests_by_team,
-        'requests_by_category': requests_by_category,
-        'requests_by_priority': requests_by_priority,
-        'monthly_trend': last_6_months,
-        'total_equipment': total_equipment,
-        'total_requests': total_requests,
-        'open_requests': open_requests,
-    }
-    return render(request, 'gearguard/reporting.html', context)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in exports.FORMATS:
+        return JsonResponse({'status': 'error', 'message': 'Invalid format'}, status=400)
+    try:
+        filters = exports.parse_filters(kind, request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    
+    response = StreamingHttpResponse(
+        exports.stream_export(kind, fmt, **filters),
+        content_type=exports.CONTENT_TYPES[fmt],
+    )
+    filename = f'{kind}-{timezone.localdate():%Y%m%d}.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 
 @login_required
@@ -445,7 +734,7 @@ def teams_list(request):
     teams = MaintenanceTeam.objects.annotate(
         member_count=Count('members'),
         request_count=Count('requests'),
-        open_request_count=Count('requests', filter=Q(requests__stage__in=['new', 'in_progress']))
+        open_request_count=Count('requests', filter=Q(requests__stage__in=MaintenanceRequest.OPEN_STAGES))
     ).prefetch_related('members__user')
     
     context = {
@@ -454,21 +743,62 @@ def teams_list(request):
     return render(request, 'gearguard/teams_list.html', context)
 
 
+@login_required
+def search_view(request):
+    """Ranked full-text search across equipment and maintenance requests"""
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type')
+    if kind and kind not in search.KINDS:
+        return JsonResponse({'status': 'error', 'message': 'Invalid type'}, status=400)
+    
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+    except ValueError:
+        limit = 20
+    
+    return JsonResponse({
+        'status': 'success',
+        'query': query,
+        'results': search.search(query, kinds=[kind] if kind else None, limit=limit),
+    })
+
+
 # AJAX endpoint for auto-filling equipment details
+EQUIPMENT_AUTOCOMPLETE_LIMIT = 20
+
+
+@login_required
+def equipment_autocomplete(request):
+    """API endpoint for the equipment picker: non-scrapped equipment matching a prefix"""
+    query = request.GET.get('q', '').strip()
+    if not search.build_match(query):
+        return JsonResponse({'status': 'success', 'results': []})
+    
+    # Prefix match through the search index (name, serial number and location)
+    equipment = search.filter_equipment(Equipment.objects.filter(is_scrapped=False), query)
+    results = list(
+        equipment.order_by('name', 'id')
+        .values('id', 'name', 'serial_number', 'location')[:EQUIPMENT_AUTOCOMPLETE_LIMIT]
+    )
+    return JsonResponse({'status': 'success', 'results': results})
+
+
 @login_required
-def get_equipment_details(request, pk):
+async def get_equipment_details(request, pk):
     """API endpoint to get equipment details for auto-fill"""
     try:
-        equipment = Equipment.objects.select_related('maintenance_team', 'default_technician').get(pk=pk)
-        return JsonResponse({
-            'status': 'success',
-            'data': {
-                'maintenance_team': equipment.maintenance_team.id if equipment.maintenance_team else None,
-                'maintenance_team_name': equipment.maintenance_team.name if equipment.maintenance_team else '',
-                'default_technician': equipment.default_technician.id if equipment.default_technician else None,
-                'category': equipment.category,
-                'department': equipment.department,
-            }
-        })
+        equipment = await Equipment.objects.values(
+            'maintenance_team_id', 'maintenance_team__name', 'default_technician_id', 'category', 'department',
+        ).aget(pk=pk)
     except Equipment.DoesNotExist:
-        return JsonResponse({'status': 'error', 'message': 'Equipment not found'}, status=404)
\ No newline at end of file
+        return JsonResponse({'status': 'error', 'message': 'Equipment not found'}, status=404)
+    return JsonResponse({
+        'status': 'success',
+        'data': {
+            'maintenance_team': equipment['maintenance_team_id'],
+            'maintenance_team_name': equipment['maintenance_team__name'] or '',
+            'default_technician': equipment['default_technician_id'],
+            'category': equipment['category'],
+            'department': equipment['department'],
+        }
+    })
\ No newline at end of file
@@ -0,0 +1,54 @@
+#!/bin/bash
+
+# GearGuard - PostgreSQL Test Harness
+# Starts a throwaway PostgreSQL container, runs the migrations, checks and
+# test suite against it, then removes the container again.
+#
+# Usage: ./test_postgres.sh [extra "manage.py test" arguments]
+# Requires Docker. POSTGRES_IMAGE overrides the server version.
+
+set -euo pipefail
+
+IMAGE="${POSTGRES_IMAGE:-postgres:16-alpine}"
+CONTAINER="gearguard-test-postgres-$$"
+PASSWORD="gearguard"
+
+echo "🐘 Starting throwaway PostgreSQL ($IMAGE)..."
+docker run --detach --rm --name "$CONTAINER" \
+    --env POSTGRES_USER=gearguard \
+    --env POSTGRES_PASSWORD="$PASSWORD" \
+    --env POSTGRES_DB=gearguard \
+    --publish 127.0.0.1::5432 \
+    "$IMAGE" > /dev/null
+trap 'echo "🧹 Removing $CONTAINER..."; docker rm --force "$CONTAINER" > /dev/null' EXIT
+
+# Wait until the server accepts connections
+for _ in $(seq 1 30); do
+    if docker exec "$CONTAINER" pg_isready --username gearguard --quiet; then
+        break
+    fi
+    sleep 1
+done
+
+export GEARGUARD_DB_ENGINE=postgresql
+export GEARGUARD_DB_NAME=gearguard
+export GEARGUARD_DB_USER=gearguard
+export GEARGUARD_DB_PASSWORD="$PASSWORD"
+export GEARGUARD_DB_HOST=127.0.0.1
+export GEARGUARD_DB_PORT="$(docker port "$CONTAINER" 5432/tcp | head -n 1 | cut -d: -f2)"
+
+echo "📥 Installing PostgreSQL dependencies..."
+pip install -r requirements-postgres.txt --quiet
+
+echo "🗄️  Applying migrations..."
+python manage.py migrate --noinput
+
+echo "🔍 Checking models and migrations..."
+python manage.py check --database default
+python manage.py makemigrations --check --dry-run
+
+echo "🧪 Running tests..."
+python manage.py test --noinput "$@"
+
+echo ""
+echo "✅ PostgreSQL test run complete!"